@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ValidationError
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -17,11 +17,14 @@ class Settings(BaseSettings):
     # Redis
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
+    REDIS_COMPRESS_MIN_BYTES: int = 1024  # Packed cache values this large are compressed (-1 disables)
     
     # LanguageTool grammar server
     # Example: http://languagetool:8010 or http://localhost:8010
     LANGUAGETOOL_URL: str = "http://languagetool:8010"
     LANGUAGETOOL_ENABLED: bool = True
+    LANGUAGETOOL_TIMEOUT_SECONDS: float = 4.0  # LT results arriving later are dropped
+    LANGUAGETOOL_CACHE_SIZE: int = 2000  # In-process cache of LT matches per (language, text)
     
     # Admin
     ADMIN_IDS: str = ""
@@ -30,10 +33,44 @@ class Settings(BaseSettings):
     MAX_CONCURRENT_USERS: int = 100
     DAILY_TRAINER_TIMES: str = "08:00,14:00,20:00"
     
+    # OpenAI gateway (per-model concurrency, priority lanes, rate limits)
+    LLM_MAX_CONCURRENCY: int = 16  # Concurrent requests per model
+    LLM_MODEL_CONCURRENCY: str = ""  # Per-model overrides, e.g. "gpt-4o=16,gpt-4o-mini=32"
+    LLM_BACKGROUND_SHARE: float = 0.5  # Share of slots background work (generation, explanations) may use
+    OPENAI_RPM_LIMIT: int = 500  # Requests per minute per model (0 = unlimited)
+    OPENAI_TPM_LIMIT: int = 300000  # Tokens per minute per model (0 = unlimited)
+    
+    # Outbound Telegram queue (scheduled tasks, reports, reminders, broadcasts)
+    OUTBOUND_WORKERS: int = 8  # Concurrent senders draining the queue
+    OUTBOUND_GLOBAL_RATE: float = 25  # Messages per second for the whole bot (Telegram allows ~30)
+    OUTBOUND_PER_CHAT_INTERVAL: float = 1.0  # Minimum seconds between messages to one chat
+    OUTBOUND_MAX_RETRIES: int = 3  # Retries of a message after a flood-control RetryAfter
+    
     # Token Limits
     MAX_TOKENS_PER_USER_DAILY: int = 10000
     CACHE_TTL_SECONDS: int = 2592000  # 30 days
-    
+    GRADED_VERDICT_TTL_SECONDS: int = 86400  # Reuse of an LLM grade for an identical answer
+    TRANSLATION_L1_MAX_SIZE: int = 5000  # In-process translation cache entries (0 disables)
+    TRANSLATION_L1_TTL_SECONDS: int = 3600  # In-process translation cache TTL
+    OPENAI_SINGLE_FLIGHT_LOCK_MS: int = 15000  # Cross-replica lock for identical OpenAI requests (0 = in-process only)
+    USER_CACHE_MAX_SIZE: int = 10000  # In-process cache of user profiles (0 disables)
+    USER_CACHE_TTL_SECONDS: int = 60  # How long another replica's profile change may go unseen
+
+    # Trainer sentence pool (pre-generated tasks, refilled in background)
+    SENTENCE_POOL_ENABLED: bool = True
+    SENTENCE_POOL_LOW_WATERMARK: int = 5  # Refill a pool once it drops below this size
+    SENTENCE_POOL_HIGH_WATERMARK: int = 20  # ...back up to this size
+    SENTENCE_POOL_REFILL_INTERVAL_SECONDS: int = 60  # Periodic check of all pools
+
+    # Write-behind buffer for stats and activity counters
+    WRITE_BUFFER_FLUSH_INTERVAL_MS: int = 1000  # Buffered counter updates are written at least this often
+    WRITE_BUFFER_MAX_PENDING: int = 500  # Flush early once this many documents have pending updates
+
+    # Flashcards overview cache (mini app dashboard, set list and session)
+    FLASHCARDS_OVERVIEW_CACHE_TTL_SECONDS: int = 60  # Also bounds how late due counts and day changes show up
+    FLASHCARDS_OVERVIEW_L1_MAX_SIZE: int = 2000  # In-process overview copies (0 disables)
+    FLASHCARDS_OVERVIEW_L1_TTL_SECONDS: int = 10  # In-process overview cache TTL
+
     # Subscription
     STRIPE_PAYMENT_LINK: str = ""  # Stripe payment link for €4/month subscription (translator only)
     ADMIN_CONTACT: str = "@reeziat"  # Admin contact for support
@@ -61,6 +98,15 @@ class Settings(BaseSettings):
     def trainer_times(self) -> List[str]:
         return [x.strip() for x in self.DAILY_TRAINER_TIMES.split(",")]
     
+    @property
+    def llm_model_concurrency(self) -> Dict[str, int]:
+        result = {}
+        for item in self.LLM_MODEL_CONCURRENCY.split(","):
+            model, _, limit = item.partition("=")
+            if model.strip() and limit.strip().isdigit():
+                result[model.strip()] = int(limit.strip())
+        return result
+    
     @property
     def mongo_enabled(self) -> bool:
         """Check if MongoDB URI is provided and valid"""
@@ -17,6 +17,7 @@ from bot.utils.keyboards import (
     get_user_access_keyboard,
 )
 from bot.config import settings
+from bot.services import mongo_service
 
 
 router = Router()
@@ -215,6 +216,11 @@ async def approve_user(callback: CallbackQuery):
         user_to_approve = await UserService.get_or_create_user(session, user_id)
         if user_to_approve.status != UserStatus.APPROVED:
             await UserService.update_user(session, user_to_approve, status=UserStatus.APPROVED)
+            from bot.services.scheduler_service import scheduler_service
+            try:
+                await scheduler_service.reschedule_user(user_to_approve)
+            except Exception:
+                pass
             
             # Notify user
             user_lang = user_to_approve.interface_language.value
@@ -257,6 +263,11 @@ async def manage_user_access(callback: CallbackQuery):
         # Base: user must be approved to manage access
         if user.status != UserStatus.APPROVED:
             await UserService.update_user(session, user, status=UserStatus.APPROVED)
+            from bot.services.scheduler_service import scheduler_service
+            try:
+                await scheduler_service.reschedule_user(user)
+            except Exception:
+                pass
 
         from bot.services.database_service import _now
 
@@ -388,14 +399,96 @@ async def show_user_stats(message: Message):
         lang = user.interface_language.value
         
         stats = await UserService.get_user_stats(session)
+        text = get_text(lang, "total_users",
+                        total=stats["total"],
+                        approved=stats["approved"],
+                        pending=stats["pending"],
+                        rejected=stats["rejected"])
         
-        await message.answer(
-            get_text(lang, "total_users",
-                    total=stats["total"],
-                    approved=stats["approved"],
-                    pending=stats["pending"],
-                    rejected=stats["rejected"])
+        # Today's OpenAI usage per feature
+        try:
+            from bot.services.token_budget_service import token_budget_service
+            usage = await token_budget_service.get_global_usage()
+            text += "\n\n" + get_text(lang, "token_usage_today",
+                                      total=usage.get("total", 0),
+                                      translator=usage.get("translator", 0),
+                                      trainer=usage.get("trainer", 0),
+                                      subtitles=usage.get("subtitles", 0),
+                                      other=usage.get("other", 0))
+        except Exception:
+            pass
+        
+        await message.answer(text)
+
+
+@router.message(Command("llmstats"))
+async def show_llm_stats(message: Message):
+    """Show OpenAI gateway metrics (diagnostics, admin only)"""
+    if not is_admin(message.from_user.id):
+        return
+    
+    from bot.services.llm_gateway import llm_gateway
+    metrics = llm_gateway.metrics()
+    lines = ["🤖 LLM gateway"]
+    for name, m in metrics["calls"].items():
+        lines.append(
+            f"{name}: {m['calls']} calls, {m['errors']} errors, "
+            f"avg {m['avg_latency_ms']} ms (queue {m['avg_queue_ms']} ms), max {m['max_latency_ms']} ms, "
+            f"tokens {m['prompt_tokens']}+{m['completion_tokens']}"
         )
+    for model, q in metrics["queues"].items():
+        lines.append(f"{model}: active {q['active']} (background {q['background_active']}), waiting {q['waiting']}")
+    if len(lines) == 1:
+        lines.append("No calls yet")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("outbound"))
+async def show_outbound_stats(message: Message):
+    """Show outbound message queue metrics (diagnostics, admin only)"""
+    if not is_admin(message.from_user.id):
+        return
+    
+    from bot.services.outbound_service import outbound_service
+    m = outbound_service.metrics()
+    queued = ", ".join(f"{name} {n}" for name, n in m["queued"].items())
+    lines = [
+        "📤 Outbound queue",
+        f"queued: {queued}",
+        f"sent {m['sent']}, failed {m['failed']}, retried {m['retried']}",
+        f"latency avg {m['avg_latency_ms']} ms, max {m['max_latency_ms']} ms",
+        f"workers {m['workers']}, paused {m['paused_for_s']}s",
+    ]
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("dbcheck"))
+async def show_db_check(message: Message):
+    """Explain the hot MongoDB queries and flag collection scans (diagnostics, admin only)"""
+    if not is_admin(message.from_user.id):
+        return
+    if not mongo_service.is_ready():
+        await message.answer("MongoDB is not initialized")
+        return
+    
+    from bot.services import mongo_migrations
+    applied = await mongo_migrations.get_applied_version(mongo_service.db())
+    results = await mongo_migrations.check_hot_queries(mongo_service.db())
+    lines = [
+        "🗄 MongoDB schema",
+        f"declared v{mongo_migrations.SCHEMA_VERSION}, applied v{applied['_id'] if applied else '-'}",
+        "",
+    ]
+    for r in results:
+        if r.get("error"):
+            lines.append(f"❔ {r['name']}: {r['error'][:80]}")
+        else:
+            mark = "⚠️" if r["collscan"] else "✅"
+            lines.append(f"{mark} {r['name']}: {' > '.join(r['stages'])}")
+    scans = sum(1 for r in results if r["collscan"])
+    lines.append("")
+    lines.append(f"{scans} collection scan(s)")
+    await message.answer("\n".join(lines))
 
 
 @router.message(F.text.in_([
@@ -441,15 +534,20 @@ async def receive_broadcast_message(message: Message, state: FSMContext):
         return
     
     async with async_session_maker() as session:
-        recipients = await UserService.get_broadcast_recipients(session)
-        count = len(recipients)
+        count = await UserService.count_broadcast_recipients(session)
         
         await message.answer(
             get_text(lang, "broadcast_confirm", count=count),
             reply_markup=get_broadcast_confirm_keyboard()
         )
         
-        await state.update_data(message_text=message.text, recipients_count=count)
+        # The message itself is copied to recipients, so any content type works
+        await state.update_data(
+            message_text=message.text or message.caption,
+            source_chat_id=message.chat.id,
+            source_message_id=message.message_id,
+            recipients_count=count,
+        )
         await state.set_state(BroadcastStates.confirming)
 
 
@@ -461,32 +559,26 @@ async def confirm_broadcast(callback: CallbackQuery, state: FSMContext):
     message_text = data.get("message_text")
     admin_id = data.get("admin_id")
     
+    # This message becomes the progress display of the job
     await callback.message.edit_text(get_text(lang, "broadcast_started"))
     
     async with async_session_maker() as session:
-        # Create broadcast record
-        broadcast = await BroadcastService.create_broadcast(session, message_text, admin_id)
-        
-        # Get recipients
-        recipients = await UserService.get_broadcast_recipients(session)
-        
-        sent = 0
-        failed = 0
-        
-        for recipient in recipients:
-            try:
-                await callback.bot.send_message(recipient.telegram_id, message_text)
-                sent += 1
-            except Exception:
-                failed += 1
-        
-        # Update broadcast record
-        await BroadcastService.update_broadcast(session, broadcast.id, sent, failed, True)
-        
-        await callback.message.answer(
-            get_text(lang, "broadcast_completed", sent=sent, failed=failed)
+        # Create a durable job; the worker sends in the background and resumes after restarts
+        broadcast = await BroadcastService.create_broadcast(
+            session,
+            message_text,
+            admin_id,
+            source_chat_id=data.get("source_chat_id"),
+            source_message_id=data.get("source_message_id"),
+            total=data.get("recipients_count", 0),
+            lang=lang,
+            status_chat_id=callback.message.chat.id,
+            status_message_id=callback.message.message_id,
         )
     
+    from bot.services.broadcast_job_service import broadcast_job_service
+    broadcast_job_service.launch(broadcast)
+    
     await state.clear()
     await callback.answer()
 
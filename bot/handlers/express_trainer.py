@@ -7,6 +7,8 @@ from aiogram.fsm.state import State, StatesGroup
 from bot.models.database import UserStatus, DifficultyLevel, TrainerTopic, TOPIC_METADATA, LearningLanguage, async_session_maker
 from bot.services.database_service import UserService, TrainingService
 from bot.services.translation_service import translation_service
+from bot.services.sentence_pool_service import sentence_pool_service
+from bot.services.llm_gateway import PRIORITY_INTERACTIVE
 from bot.locales.texts import get_text
 from bot.utils.keyboards import (
     get_express_trainer_keyboard, 
@@ -246,8 +248,11 @@ async def show_hint(callback: CallbackQuery):
         await callback.message.edit_reply_markup(reply_markup=None)
         # Send hint as a new message so the original task remains visible
         # Include button to get next sentence
+        hint_text = get_text(lang, "hint_activated", translation=expected_translation)
+        if training.get("hint"):
+            hint_text += "\n\n" + get_text(lang, "hint_tip", hint=training["hint"])
         await callback.message.answer(
-            get_text(lang, "hint_activated", translation=expected_translation),
+            hint_text,
             reply_markup=get_express_next_keyboard(lang)
         )
         
@@ -291,22 +296,32 @@ async def send_express_task(user_id: int, bot, chat_id: int):
                 if level_topics:
                     topic = random.choice(level_topics)
         
-        # Generate sentence (passing user_id to avoid mastered sentences)
-        sentence = await translation_service.generate_sentence(
+        # Take a pre-generated task from the pool; generate live only on a miss
+        pooled = await sentence_pool_service.pop_task(
             difficulty.value,
-            learning_lang,
-            lang,
             topic,
-            user_id=user.id
-        )
-        
-        # Get expected translation
-        expected_translation, _ = await translation_service.translate(
-            sentence,
             lang,
             learning_lang,
-            None  # Don't count tokens for system-generated tasks
+            user_id=user.id
         )
+        if pooled:
+            sentence = pooled["sentence"]
+            expected_translation = pooled["expected_translation"]
+            hint = pooled.get("hint", "")
+        else:
+            # Sentence, reference translation and hint in one completion
+            # (passing user_id to avoid mastered sentences)
+            task = await translation_service.generate_task(
+                difficulty.value,
+                learning_lang,
+                lang,
+                topic,
+                user_id=user.id,
+                priority=PRIORITY_INTERACTIVE  # The user just asked for the next sentence
+            )
+            sentence = task["sentence"]
+            expected_translation = task["translation"]
+            hint = task["hint"]
         
         # Get topic metadata for display
         topic_metadata = TOPIC_METADATA.get(topic, {"level": difficulty.value, "number": 0})
@@ -332,7 +347,8 @@ async def send_express_task(user_id: int, bot, chat_id: int):
             sentence,
             expected_translation,
             difficulty,
-            topic  # Pass topic to training session
+            topic,  # Pass topic to training session
+            hint=hint
         )
         # Optional mirror to Mongo
         if settings.mongo_enabled and mongo_service.is_ready():
@@ -405,7 +421,8 @@ async def check_express_answer(message: Message, state: FSMContext):
                 training["sentence"],
                 user_answer,
                 learning_lang,
-                lang
+                lang,
+                expected_translation=training.get("expected_translation")
             )
         except Exception as e:
             import logging
@@ -424,14 +441,14 @@ async def check_express_answer(message: Message, state: FSMContext):
             quality_percentage
         )
         
-        # Update user stats
-        user.total_answers += 1
-        if is_correct:
-            user.correct_answers += 1
-        await UserService.update_user(session, user, total_answers=user.total_answers, correct_answers=user.correct_answers)
-        
-        # Increment activity
-        await UserService.increment_activity(session, user, 2 if is_correct else 1)
+        # Update user stats and activity
+        await UserService.increment_counters(
+            session,
+            user,
+            total_answers=1,
+            correct_answers=1 if is_correct else 0,
+            activity_score=2 if is_correct else 1,
+        )
         
         # If 100% quality, mark sentence as mastered (won't be shown again)
         if quality_percentage == 100:
@@ -9,6 +9,7 @@ from bot.config import settings
 from bot.models.database import UserStatus, async_session_maker
 from bot.services.database_service import UserService
 from bot.services import mongo_service
+import bot.services.flashcards_service as flashcards_service
 from bot.locales.texts import get_text
 from bot.utils.keyboards import (
     get_flashcards_menu_keyboard,
@@ -130,10 +131,12 @@ async def create_set_finish(message: Message, state: FSMContext):
             "user_id": message.from_user.id,
             "name": set_name,
             "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "updated_at": datetime.now(timezone.utc),
+            "counters": flashcards_service.build_set_counters([], datetime.now(timezone.utc))
         }
         
         result = await mongo_service.db().flashcard_sets.insert_one(set_doc)
+        await flashcards_service.invalidate_overview(message.from_user.id)
         
         await state.clear()
         text = get_text(lang, "flashcards_set_created", name=set_name)
@@ -288,10 +291,13 @@ async def add_card_example(message: Message, state: FSMContext):
 
         await mongo_service.db().flashcards.insert_one(card_doc)
 
-        # Update set's updated_at
-        await mongo_service.db().flashcard_sets.update_one(
-            {"_id": ObjectId(set_id)},
-            {"$set": {"updated_at": datetime.now(timezone.utc)}}
+        # Count the card in its set and update the set's updated_at
+        await flashcards_service.record_card_change(
+            message.from_user.id,
+            set_id,
+            None,
+            card_doc,
+            set_fields={"updated_at": datetime.now(timezone.utc)},
         )
 
         await state.clear()
@@ -428,9 +434,11 @@ async def delete_card(callback: CallbackQuery):
             return
         
         # Delete the card
-        await mongo_service.db().flashcards.delete_one(
+        card = await mongo_service.db().flashcards.find_one_and_delete(
             {"_id": ObjectId(card_id), "user_id": callback.from_user.id}
         )
+        if card:
+            await flashcards_service.record_card_change(callback.from_user.id, card.get("set_id"), card, None)
         
         # Check if there are more cards
         remaining_cards = await mongo_service.db().flashcards.find(
@@ -499,6 +507,7 @@ async def delete_set_execute(callback: CallbackQuery):
             await mongo_service.db().flashcard_sets.delete_one(
                 {"_id": ObjectId(set_id), "user_id": callback.from_user.id}
             )
+            await flashcards_service.invalidate_overview(callback.from_user.id)
             
             text = get_text(lang, "flashcards_set_deleted")
             await callback.message.edit_text(text, reply_markup=get_flashcards_menu_keyboard(lang))
@@ -5,8 +5,11 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from bot.models.database import UserStatus, DifficultyLevel, TrainerTopic, TOPIC_METADATA, LearningLanguage, async_session_maker
-from bot.services.database_service import UserService, TrainingService
+from bot.services.database_service import UserService, UserModel, TrainingService
 from bot.services.translation_service import translation_service
+from bot.services.sentence_pool_service import sentence_pool_service
+from bot.services.mastered_index_service import mastered_index_service
+from bot.services.outbound_service import outbound_service, PRIORITY_SCHEDULED
 from bot.locales.texts import get_text
 from bot.utils.keyboards import get_trainer_keyboard, get_main_menu_keyboard
 from bot.config import settings
@@ -97,7 +100,7 @@ async def my_progress(message: Message, state: FSMContext):
         try:
             if mongo_service.is_ready():
                 streak_info = await mongo_service.get_streak(user.id)
-                mastered_count = await mongo_service.get_mastered_count(user.id)
+                mastered_count = await mastered_index_service.count(user.id)
                 today_stats = await mongo_service.get_today_stats(user.id)
         except Exception:
             streak_info = {}
@@ -157,6 +160,7 @@ async def start_trainer(callback: CallbackQuery):
         
         # Get progress and countdown information
         from bot.services.scheduler_service import scheduler_service
+        await scheduler_service.reschedule_user(user)
         tasks_sent, total_tasks = await scheduler_service.get_daily_progress(user)
         _, countdown = await scheduler_service.calculate_next_task_time(user)
         
@@ -187,6 +191,8 @@ async def stop_trainer(callback: CallbackQuery):
         lang = user.interface_language.value
         # Disable trainer
         await UserService.update_user(session, user, daily_trainer_enabled=False)
+        from bot.services.scheduler_service import scheduler_service
+        await scheduler_service.reschedule_user(user)
         
         # Clear any pending training state
         await redis_service.clear_user_state(callback.from_user.id)
@@ -306,15 +312,8 @@ async def set_time_period(callback: CallbackQuery):
         
         # When time window changes, reset today's counters so scheduling
         # starts fresh with the new settings
-        from bot.services.redis_service import redis_service
-        from datetime import datetime
-        from zoneinfo import ZoneInfo
-        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
-        current_date = now_kyiv.date()
-        tasks_today_key = f"tasks_today:{user.id}:{current_date}"
-        last_task_time_key = f"last_task_time:{user.id}:{current_date}"
-        await redis_service.delete(tasks_today_key)
-        await redis_service.delete(last_task_time_key)
+        await scheduler_service.reset_daily_counters(user)
+        await scheduler_service.reschedule_user(user)
         
         # Get updated progress using the already-updated user object
         if user.daily_trainer_enabled:
@@ -370,15 +369,8 @@ async def set_message_count(callback: CallbackQuery):
         
         # When daily count changes, reset today's counters so scheduling
         # adapts cleanly to the new limit
-        from bot.services.redis_service import redis_service
-        from datetime import datetime
-        from zoneinfo import ZoneInfo
-        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
-        current_date = now_kyiv.date()
-        tasks_today_key = f"tasks_today:{user.id}:{current_date}"
-        last_task_time_key = f"last_task_time:{user.id}:{current_date}"
-        await redis_service.delete(tasks_today_key)
-        await redis_service.delete(last_task_time_key)
+        await scheduler_service.reset_daily_counters(user)
+        await scheduler_service.reschedule_user(user)
         
         # Get updated progress using the already-updated user object
         if user.daily_trainer_enabled:
@@ -552,6 +544,8 @@ async def show_hint(callback: CallbackQuery):
         # Send hint as a new message so the original task remains visible
         # Include info about next task for daily trainer
         hint_text = get_text(lang, "hint_activated", translation=expected_translation)
+        if training.get("hint"):
+            hint_text += "\n\n" + get_text(lang, "hint_tip", hint=training["hint"])
         hint_text += "\n\n" + get_text(lang, "hint_next_task_info")
         await callback.message.answer(hint_text)
         
@@ -565,141 +559,154 @@ async def show_hint(callback: CallbackQuery):
     await callback.answer()
 
 
-async def send_training_task(bot, user_id: int):
-    """Send a training task to user (called by scheduler)"""
-    from bot.services.redis_service import redis_service
-    import random
+async def send_training_task(bot, user_id: int, user=None) -> bool:
+    """Send a training task to user (called by scheduler).
+    Returns True if a task was sent."""
+    from bot.services.scheduler_service import scheduler_service
     
     async with async_session_maker() as session:
-        user = await UserService.get_or_create_user(session, user_id)
+        if user is None:
+            user = await UserService.get_or_create_user(session, user_id)
         
         if not user.daily_trainer_enabled or user.status != UserStatus.APPROVED:
-            return
+            return False
         
-        lang = user.interface_language.value
-        learning_lang = user.learning_language.value
-        difficulty = user.difficulty_level or DifficultyLevel.A2
-        topic = user.trainer_topic or TrainerTopic.RANDOM
-        
-        # Check if there's a level-specific random topic setting
-        if topic == TrainerTopic.RANDOM:
-            random_level = await redis_service.get(f"random_topic_level:{user.id}")
-            if random_level:
-                # Level-specific random: pick a random topic from this level
-                from bot.models.database import TOPIC_METADATA
-                level_topics = [t for t, meta in TOPIC_METADATA.items() 
-                               if meta["level"] == random_level and t != TrainerTopic.RANDOM]
-                if level_topics:
-                    topic = random.choice(level_topics)
-            else:
-                # Global random: pick random level first, then random topic from that level
-                from bot.models.database import TOPIC_METADATA
-                levels = ["A2", "B1", "B2"]
-                random_level = random.choice(levels)
-                level_topics = [t for t, meta in TOPIC_METADATA.items() 
-                               if meta["level"] == random_level and t != TrainerTopic.RANDOM]
-                if level_topics:
-                    topic = random.choice(level_topics)
-        
-        # Get current progress
-        from bot.services.scheduler_service import scheduler_service
-        tasks_sent, total_tasks = await scheduler_service.get_daily_progress(user)
-        # Hard cap: never show progress above daily limit
-        if tasks_sent > total_tasks:
-            tasks_sent = total_tasks
-        
-        # Generate sentence (passing user_id to avoid mastered sentences)
-        sentence = await translation_service.generate_sentence(
+        # Claim today's next slot before generating anything, so overlapping
+        # ticks or replicas can never both send it
+        claim = await scheduler_service.claim_task_slot(user)
+        if claim is None:
+            return False
+        try:
+            await _deliver_training_task(session, user, claim)
+        except Exception:
+            await scheduler_service.release_task_slot(claim)
+            raise
+        return True
+
+
+async def _deliver_training_task(session, user, claim: dict):
+    """Pick a sentence for a claimed slot and send it"""
+    from bot.services.redis_service import redis_service
+    import random
+    
+    user_id = user.telegram_id
+    lang = user.interface_language.value
+    learning_lang = user.learning_language.value
+    difficulty = user.difficulty_level or DifficultyLevel.A2
+    topic = user.trainer_topic or TrainerTopic.RANDOM
+    
+    # Check if there's a level-specific random topic setting
+    if topic == TrainerTopic.RANDOM:
+        random_level = await redis_service.get(f"random_topic_level:{user.id}")
+        if random_level:
+            # Level-specific random: pick a random topic from this level
+            from bot.models.database import TOPIC_METADATA
+            level_topics = [t for t, meta in TOPIC_METADATA.items() 
+                           if meta["level"] == random_level and t != TrainerTopic.RANDOM]
+            if level_topics:
+                topic = random.choice(level_topics)
+        else:
+            # Global random: pick random level first, then random topic from that level
+            from bot.models.database import TOPIC_METADATA
+            levels = ["A2", "B1", "B2"]
+            random_level = random.choice(levels)
+            level_topics = [t for t, meta in TOPIC_METADATA.items() 
+                           if meta["level"] == random_level and t != TrainerTopic.RANDOM]
+            if level_topics:
+                topic = random.choice(level_topics)
+    
+    # Progress shown with the task: tasks sent before this one
+    tasks_sent = claim["slot"] - 1
+    total_tasks = claim["total"]
+    
+    # Take a pre-generated task from the pool; generate live only on a miss
+    pooled = await sentence_pool_service.pop_task(
+        difficulty.value,
+        topic,
+        lang,
+        learning_lang,
+        user_id=user.id
+    )
+    if pooled:
+        sentence = pooled["sentence"]
+        expected_translation = pooled["expected_translation"]
+        hint = pooled.get("hint", "")
+    else:
+        # Sentence, reference translation and hint in one completion
+        # (passing user_id to avoid mastered sentences)
+        task = await translation_service.generate_task(
             difficulty.value,
             learning_lang,
             lang,
             topic,
             user_id=user.id
         )
-        
-        # Get expected translation
-        expected_translation, _ = await translation_service.translate(
-            sentence,
-            lang,
-            learning_lang,
-            None  # Don't count tokens for system-generated tasks
-        )
-        
-        # Get topic metadata for display
-        from bot.models.database import TOPIC_METADATA
-        topic_metadata = TOPIC_METADATA.get(topic, {"level": difficulty.value, "number": 0})
-        topic_level = topic_metadata["level"]
-
-        # Choose topic name based on learning language:
-        # - if user learns German (de) -> German topic label
-        # - if user learns English (en) -> English topic label
-        if topic in TOPIC_METADATA:
-            if user.learning_language.value == "de":
-                topic_name = topic_metadata.get("de")
-            elif user.learning_language.value == "en":
-                topic_name = topic_metadata.get("en")
-            else:
-                # Fallback to German label if something unexpected
-                topic_name = topic_metadata.get("de")
+        sentence = task["sentence"]
+        expected_translation = task["translation"]
+        hint = task["hint"]
+    
+    # Get topic metadata for display
+    from bot.models.database import TOPIC_METADATA
+    topic_metadata = TOPIC_METADATA.get(topic, {"level": difficulty.value, "number": 0})
+    topic_level = topic_metadata["level"]
+
+    # Choose topic name based on learning language:
+    # - if user learns German (de) -> German topic label
+    # - if user learns English (en) -> English topic label
+    if topic in TOPIC_METADATA:
+        if user.learning_language.value == "de":
+            topic_name = topic_metadata.get("de")
+        elif user.learning_language.value == "en":
+            topic_name = topic_metadata.get("en")
         else:
-            # Fallback to legacy locale-based key if metadata missing
-            topic_name = get_text(lang, f"topic_{topic.value}")
-        
-        # Create training session
-        training = await TrainingService.create_session(
-            session,
-            user.id,
-            sentence,
-            expected_translation,
-            difficulty,
-            topic  # Pass topic to training session
-        )
-        # Optional mirror to Mongo
-        if settings.mongo_enabled and mongo_service.is_ready():
-            try:
-                await mongo_service.store_training_session(user.id, sentence, expected_translation, difficulty.value)
-            except Exception:
-                pass
-        
-        # Send task to user with progress information and topic/level
-        from bot.utils.keyboards import get_trainer_task_keyboard
-        await bot.send_message(
-            user_id,
-            get_text(lang, "trainer_task_with_progress", 
-                    current=tasks_sent, 
-                    total=total_tasks,
-                    level=topic_level,
-                    topic=topic_name,
-                    sentence=sentence),
-            reply_markup=get_trainer_task_keyboard(lang, str(training["_id"]))
-        )
-        
-        # Update task counter and last task time in Redis after successful send
-        from datetime import datetime
-        from zoneinfo import ZoneInfo
-        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
-        current_date = now_kyiv.date()
-        current_time_str = now_kyiv.time().strftime("%H:%M")
-        
-        tasks_today_key = f"tasks_today:{user.id}:{current_date}"
-        last_task_time_key = f"last_task_time:{user.id}:{current_date}"
-        
-        # Increase counter by one but never above daily limit
-        new_tasks_sent = min(tasks_sent + 1, total_tasks)
-        await redis_service.set(tasks_today_key, new_tasks_sent, ex=86400)
-        await redis_service.set(last_task_time_key, current_time_str, ex=86400)
-        
-        # Store training session ID in Redis for answer processing
-        # Convert ObjectId to string for JSON serialization
-        await redis_service.set_user_state(
-            user_id,
-            "awaiting_training_answer",
-            {"training_id": str(training["_id"])}
-        )
+            # Fallback to German label if something unexpected
+            topic_name = topic_metadata.get("de")
+    else:
+        # Fallback to legacy locale-based key if metadata missing
+        topic_name = get_text(lang, f"topic_{topic.value}")
+    
+    # Create training session
+    training = await TrainingService.create_session(
+        session,
+        user.id,
+        sentence,
+        expected_translation,
+        difficulty,
+        topic,  # Pass topic to training session
+        hint=hint
+    )
+    # Optional mirror to Mongo
+    if settings.mongo_enabled and mongo_service.is_ready():
+        try:
+            await mongo_service.store_training_session(user.id, sentence, expected_translation, difficulty.value)
+        except Exception:
+            pass
+    
+    # Send task to user with progress information and topic/level
+    from bot.utils.keyboards import get_trainer_task_keyboard
+    await outbound_service.send_message(
+        user_id,
+        get_text(lang, "trainer_task_with_progress", 
+                current=tasks_sent, 
+                total=total_tasks,
+                level=topic_level,
+                topic=topic_name,
+                sentence=sentence),
+        reply_markup=get_trainer_task_keyboard(lang, str(training["_id"])),
+        priority=PRIORITY_SCHEDULED
+    )
+    
+    # Store training session ID in Redis for answer processing
+    # Convert ObjectId to string for JSON serialization
+    await redis_service.set_user_state(
+        user_id,
+        "awaiting_training_answer",
+        {"training_id": str(training["_id"])}
+    )
 
 
 @router.message(_RedisStateFilter("awaiting_training_answer"), F.text)
-async def check_training_answer(message: Message, state: FSMContext):
+async def check_training_answer(message: Message, state: FSMContext, db_user: UserModel | None = None):
     """
     Check if message is an answer to training task.
     
@@ -725,7 +732,7 @@ async def check_training_answer(message: Message, state: FSMContext):
         return
     
     async with async_session_maker() as session:
-        user = await UserService.get_or_create_user(session, message.from_user.id)
+        user = db_user or await UserService.get_or_create_user(session, message.from_user.id)
         lang = user.interface_language.value
         learning_lang = user.learning_language.value
         
@@ -748,7 +755,8 @@ async def check_training_answer(message: Message, state: FSMContext):
                 training["sentence"],
                 user_answer,
                 learning_lang,
-                lang
+                lang,
+                expected_translation=training.get("expected_translation")
             )
         except Exception as e:
             import logging
@@ -780,14 +788,14 @@ async def check_training_answer(message: Message, state: FSMContext):
             is_correct,
         )
         
-        # Update user stats
-        user.total_answers += 1
-        if is_correct:
-            user.correct_answers += 1
-        await UserService.update_user(session, user, total_answers=user.total_answers, correct_answers=user.correct_answers)
-        
-        # Increment activity
-        await UserService.increment_activity(session, user, 2 if is_correct else 1)
+        # Update user stats and activity
+        await UserService.increment_counters(
+            session,
+            user,
+            total_answers=1,
+            correct_answers=1 if is_correct else 0,
+            activity_score=2 if is_correct else 1,
+        )
         
         # If 100% quality, mark sentence as mastered (won't be shown again)
         if quality_percentage == 100:
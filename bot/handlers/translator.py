@@ -5,7 +5,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from bot.models.database import UserStatus, async_session_maker
-from bot.services.database_service import UserService, WordService, TranslationHistoryService
+from bot.services.database_service import UserService, UserModel, WordService, TranslationHistoryService
 from bot.services.translation_service import translation_service
 from bot.locales.texts import get_text
 from bot.utils.keyboards import get_translator_keyboard, get_main_menu_keyboard
@@ -73,7 +73,7 @@ async def translator_mode(message: Message, state: FSMContext):
         "💬 Техподдержка", "💬 Техпідтримка"
     ])
 )
-async def process_translation(message: Message, state: FSMContext):
+async def process_translation(message: Message, state: FSMContext, db_user: UserModel | None = None):
     """Process translation request"""
     # Check if user has an active training session (daily OR express)
     from bot.services.redis_service import redis_service
@@ -103,7 +103,7 @@ async def process_translation(message: Message, state: FSMContext):
                 # Route to appropriate handler based on state type
                 if state_type == "awaiting_training_answer":
                     from bot.handlers.trainer import check_training_answer
-                    await check_training_answer(message, state)
+                    await check_training_answer(message, state, db_user)
                 else:  # awaiting_express_answer
                     from bot.handlers.express_trainer import check_express_answer
                     await check_express_answer(message, state)
@@ -127,7 +127,7 @@ async def process_translation(message: Message, state: FSMContext):
         return await show_saved_words(message)
     
     async with async_session_maker() as session:
-        user = await UserService.get_or_create_user(session, message.from_user.id)
+        user = db_user or await UserService.get_or_create_user(session, message.from_user.id)
         
         # Admins have unrestricted access
         if not is_admin(message.from_user.id):
@@ -165,7 +165,8 @@ async def process_translation(message: Message, state: FSMContext):
             
             # Translate
             translation, tokens = await translation_service.translate(
-                text, source_lang, target_lang, user_id
+                text, source_lang, target_lang, user_id,
+                timezone=user.trainer_timezone
             )
             
             # Save to history
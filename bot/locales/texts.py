@@ -74,6 +74,7 @@ LOCALES = {
         "trainer_task_with_progress": "🎯 Завдання {current}/{total} на сьогодні\n\n📚 Рівень: {level} | Тема: {topic}\n\nПерекладіть це речення:\n\n{sentence}",
         "hint_activated": "💡 Підказка активована!\n\n✏️ Правильний переклад:\n{translation}\n\n⚠️ Це завдання не враховується в денній статистиці, але відображається як 'активація підказки'.",
         "hint_next_task_info": "⏰ Наступне завдання прийде автоматично за розкладом.",
+        "hint_tip": "🔑 Порада: {hint}",
         "correct_answer_with_quality": "✅ Правильно! Якість перекладу: {quality}%\n\n💡 Оцінка враховує: пунктуацію, закінчення слів та точність значення.\n\nЧудова робота!",
     "incorrect_answer": "❌ Не зовсім правильно. Якість: {quality}%\n\n💡 Оцінка враховує: пунктуацію, закінчення слів та точність значення.\n\n📚 Пояснення:\n{explanation}\n\n✏️ Правильний переклад:\n{correct}",
         "daily_report": "📊 Підсумок дня:\n\n🎯 Режим: {planned} завдань/день\n✅ Виконано: {completed}\n⚠️ Пропущено: {missed}\n📈 Середня точність: {quality}%\n⛳️ Після штрафів (-{penalty}%): {final}%\n\n{motivation}",
@@ -189,11 +190,13 @@ LOCALES = {
         "user_rejected": "❌ Користувача відхилено.",
         
         "total_users": "📊 Загальна статистика:\n\nВсього користувачів: {total}\nПідтверджено: {approved}\nОчікують: {pending}\nВідхилено: {rejected}",
+        "token_usage_today": "🔢 Токени OpenAI сьогодні (UTC): {total}\n• Перекладач: {translator}\n• Тренажер: {trainer}\n• Субтитри: {subtitles}\n• Інше: {other}",
         
         "broadcast_prompt": "📢 Введіть повідомлення для розсилки:",
         "broadcast_confirm": "Відправити повідомлення {count} користувачам?",
         "broadcast_started": "📢 Розсилка розпочата...",
         "broadcast_completed": "✅ Розсилка завершена!\n\nВідправлено: {sent}\nПомилок: {failed}",
+        "broadcast_progress": "📢 Розсилка триває...\n\nВідправлено: {sent} з {total}\nПомилок: {failed}",
         
         "user_rating": "🏆 Статистика користувачів {period}",
         "user_rating_period_line": "Період: {period}",
@@ -365,6 +368,7 @@ LOCALES = {
         "trainer_task_with_progress": "🎯 Задание {current}/{total} на сегодня\n\n📚 Уровень: {level} | Тема: {topic}\n\nПереведите это предложение:\n\n{sentence}",
         "hint_activated": "💡 Подсказка активирована!\n\n✏️ Правильный перевод:\n{translation}\n\n⚠️ Это задание не учитывается в дневной статистике, но отображается как 'активация подсказки'.",
         "hint_next_task_info": "⏰ Следующее задание придёт автоматически по расписанию.",
+        "hint_tip": "🔑 Совет: {hint}",
         "correct_answer_with_quality": "✅ Правильно! Качество перевода: {quality}%\n\n💡 Оценка учитывает: пунктуацию, окончания слов и точность значения.\n\nОтличная работа!",
     "incorrect_answer": "❌ Не совсем правильно. Качество: {quality}%\n\n💡 Оценка учитывает: пунктуацию, окончания слов и точность значения.\n\n📚 Пояснение:\n{explanation}\n\n✏️ Правильный перевод:\n{correct}",
         "daily_report": "📊 Итоги дня:\n\n🎯 Режим: {planned} заданий/день\n✅ Выполнено: {completed}\n⚠️ Пропущено: {missed}\n📈 Средняя точность: {quality}%\n⛳️ После штрафов (-{penalty}%): {final}%\n\n{motivation}",
@@ -480,11 +484,13 @@ LOCALES = {
         "user_rejected": "❌ Пользователь отклонён.",
         
         "total_users": "📊 Общая статистика:\n\nВсего пользователей: {total}\nПодтверждено: {approved}\nОжидают: {pending}\nОтклонено: {rejected}",
+        "token_usage_today": "🔢 Токены OpenAI сегодня (UTC): {total}\n• Переводчик: {translator}\n• Тренажёр: {trainer}\n• Субтитры: {subtitles}\n• Другое: {other}",
         
         "broadcast_prompt": "📢 Введите сообщение для рассылки:",
         "broadcast_confirm": "Отправить сообщение {count} пользователям?",
         "broadcast_started": "📢 Рассылка начата...",
         "broadcast_completed": "✅ Рассылка завершена!\n\nОтправлено: {sent}\nОшибок: {failed}",
+        "broadcast_progress": "📢 Рассылка идёт...\n\nОтправлено: {sent} из {total}\nОшибок: {failed}",
         
         "user_rating": "🏆 Статистика пользователей {period}",
         "user_rating_period_line": "Период: {period}",
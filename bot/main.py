@@ -11,9 +11,16 @@ from bot.models.database import init_db, async_session_maker
 from bot.services.redis_service import redis_service
 from bot.services.database_service import UserService
 from bot.services.scheduler_service import scheduler_service
+from bot.services.outbound_service import outbound_service
+from bot.services.broadcast_job_service import broadcast_job_service
+from bot.services.write_buffer_service import write_buffer_service
+from bot.services.sentence_pool_service import sentence_pool_service
+from bot.services.translation_service import translation_service
+from bot.services.llm_gateway import llm_gateway
 from bot.handlers import start, translator, trainer, settings as settings_handler, admin, friends, express_trainer, flashcards, subtitle_trainer
 from bot.models.database import UserStatus
 from bot.services import mongo_service, cloudinary_service
+from bot.middlewares.user_context import DbUserMiddleware
 
 
 # Configure logging
@@ -52,6 +59,9 @@ async def main():
         except Exception as e:
             logger.error(f"MongoDB initialization failed: {e}")
     
+    # Stats and activity counters are buffered and written in bulk
+    write_buffer_service.start()
+    
     # Initialize Cloudinary for image storage
     logger.info("Initializing Cloudinary for image storage...")
     try:
@@ -87,6 +97,10 @@ async def main():
         
     dp = Dispatcher(storage=storage)
     
+    # Load the sender's profile once per update and pass it to handlers as `db_user`
+    dp.message.outer_middleware(DbUserMiddleware())
+    dp.callback_query.outer_middleware(DbUserMiddleware())
+    
     # Register handlers (order matters - more specific handlers first)
     dp.include_router(start.router)
     dp.include_router(translator.router)
@@ -102,12 +116,18 @@ async def main():
     
     # Start new scheduler service with individual user scheduling
     logger.info("Starting scheduler service...")
+    outbound_service.start(bot)
     scheduler_service.set_bot(bot)
     await scheduler_service.start()
+    await broadcast_job_service.start(bot)
 
     # Prepare the fixed 20-video trainer catalog before users need it.
     from bot.services.subtitle_service import schedule_prepared_library_bootstrap
     schedule_prepared_library_bootstrap()
+
+    # Keep trainer task pools topped up so scheduled sends don't wait on the LLM
+    logger.info("Starting sentence pool refill worker...")
+    sentence_pool_service.start()
     
     try:
         logger.info("Bot started!")
@@ -116,6 +136,12 @@ async def main():
         # Cleanup
         logger.info("Shutting down...")
         scheduler_service.scheduler.shutdown()
+        await sentence_pool_service.stop()
+        await broadcast_job_service.stop()
+        await outbound_service.stop()
+        await write_buffer_service.stop()
+        await translation_service.close()
+        await llm_gateway.close()
         await redis_service.disconnect()
         # Cleanup web app server
         if webapp_runner:
@@ -0,0 +1,44 @@
+"""
+Loads the sender's profile once per update.
+
+The model is passed to handlers as `db_user` and also sits in UserService's
+cache, so handlers that still call `UserService.get_or_create_user` get the
+same object without another users-collection read.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from bot.models.database import async_session_maker
+from bot.services import mongo_service
+from bot.services.database_service import UserService
+
+logger = logging.getLogger(__name__)
+
+
+class DbUserMiddleware(BaseMiddleware):
+    """Outer middleware that injects the sender's UserModel as `db_user`"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        from_user: User | None = data.get("event_from_user")
+        if from_user and not from_user.is_bot and mongo_service.is_ready():
+            try:
+                async with async_session_maker() as session:
+                    data["db_user"] = await UserService.get_or_create_user(
+                        session,
+                        from_user.id,
+                        from_user.username,
+                        from_user.first_name,
+                        from_user.last_name,
+                    )
+            except Exception as e:
+                # Handlers fall back to loading the user themselves
+                logger.error(f"Failed to load user {from_user.id}: {e}")
+        return await handler(event, data)
@@ -0,0 +1,147 @@
+"""
+Background runner for admin broadcasts.
+
+A broadcast is a durable job in the `broadcasts` collection. The runner
+streams recipients from a Mongo cursor ordered by telegram_id, sends in
+windows through the outbound queue (copy_message, so any message type
+works), records each recipient's result and then moves the job's cursor
+past the window. Jobs still marked running are resumed at startup;
+recipients of a half-finished window that already have a result are not
+messaged again.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from aiogram import Bot
+
+from bot.models.database import async_session_maker
+from bot.services.database_service import UserService, BroadcastService
+from bot.services.outbound_service import outbound_service, PRIORITY_BULK
+from bot.locales.texts import get_text
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SIZE = 50  # Recipients sent concurrently before the cursor is saved
+PROGRESS_INTERVAL_SECONDS = 5  # How often the admin's status message is edited
+
+
+class BroadcastJobService:
+    """Runs broadcast jobs in the background and resumes them after restarts"""
+
+    def __init__(self):
+        self.bot: Bot | None = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self, bot: Bot):
+        """Attach to the bot and resume jobs interrupted by a restart"""
+        self.bot = bot
+        try:
+            async with async_session_maker() as session:
+                running = await BroadcastService.get_running_broadcasts(session)
+        except Exception as e:
+            logger.error(f"Failed to load pending broadcasts: {e}")
+            return
+        for broadcast in running:
+            logger.info(f"Resuming broadcast {broadcast['_id']} after {broadcast.get('cursor', 0)}")
+            self.launch(broadcast)
+
+    def launch(self, broadcast: dict):
+        """Run a broadcast job in the background"""
+        key = str(broadcast["_id"])
+        task = self._tasks.get(key)
+        if task and not task.done():
+            return
+        task = asyncio.create_task(self._run(broadcast), name=f"broadcast-{key}")
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+
+    async def stop(self):
+        """Stop running jobs; they stay marked running and resume on next start"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, broadcast: dict):
+        broadcast_id = broadcast["_id"]
+        cursor = broadcast.get("cursor") or 0
+        sent = broadcast.get("sent_count", 0)
+        failed = broadcast.get("failed_count", 0)
+        last_progress = time.monotonic()
+
+        try:
+            async with async_session_maker() as session:
+                window = []
+                recipients = UserService.iter_broadcast_recipient_ids(session, after_telegram_id=cursor)
+                async for telegram_id in recipients:
+                    window.append(telegram_id)
+                    if len(window) < WINDOW_SIZE:
+                        continue
+                    ok, bad = await self._send_window(session, broadcast, window)
+                    sent, failed, window = sent + ok, failed + bad, []
+                    if time.monotonic() - last_progress >= PROGRESS_INTERVAL_SECONDS:
+                        last_progress = time.monotonic()
+                        await self._show_progress(broadcast, "broadcast_progress", sent, failed)
+                if window:
+                    ok, bad = await self._send_window(session, broadcast, window)
+                    sent, failed = sent + ok, failed + bad
+
+                await BroadcastService.complete_broadcast(session, broadcast_id)
+            await self._show_progress(broadcast, "broadcast_completed", sent, failed)
+            logger.info(f"Broadcast {broadcast_id} completed: sent={sent}, failed={failed}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The job stays running and continues from its cursor on the next start
+            logger.error(f"Broadcast {broadcast_id} interrupted: {e}")
+
+    async def _send_window(self, session, broadcast: dict, window: list) -> tuple[int, int]:
+        broadcast_id = broadcast["_id"]
+        done = await BroadcastService.get_recorded_recipients(session, broadcast_id, window)
+        results = await asyncio.gather(*(
+            self._send_one(session, broadcast, telegram_id)
+            for telegram_id in window if telegram_id not in done
+        ))
+        ok = sum(1 for r in results if r)
+        bad = len(results) - ok
+        await BroadcastService.advance_broadcast(session, broadcast_id, window[-1], ok, bad)
+        return ok, bad
+
+    async def _send_one(self, session, broadcast: dict, telegram_id: int) -> bool:
+        source_chat_id = broadcast.get("source_chat_id")
+        source_message_id = broadcast.get("source_message_id")
+        if source_chat_id and source_message_id:
+            call = lambda bot: bot.copy_message(telegram_id, source_chat_id, source_message_id)
+        else:
+            call = lambda bot: bot.send_message(telegram_id, broadcast.get("message") or "")
+
+        error = None
+        try:
+            await outbound_service.submit(telegram_id, call, PRIORITY_BULK)
+        except Exception as e:
+            error = str(e)[:200]
+        await BroadcastService.record_recipient(session, broadcast["_id"], telegram_id, error is None, error)
+        return error is None
+
+    async def _show_progress(self, broadcast: dict, text_key: str, sent: int, failed: int):
+        chat_id = broadcast.get("status_chat_id")
+        message_id = broadcast.get("status_message_id")
+        if not self.bot or not chat_id or not message_id:
+            return
+        text = get_text(
+            broadcast.get("lang", "ru"),
+            text_key,
+            sent=sent,
+            failed=failed,
+            total=broadcast.get("total", 0),
+        )
+        try:
+            await self.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+        except Exception as e:
+            logger.debug(f"Broadcast progress update failed: {e}")
+
+
+# Global instance
+broadcast_job_service = BroadcastJobService()
@@ -7,6 +7,7 @@ attribute access where necessary.
 """
 from __future__ import annotations
 
+from enum import Enum
 from typing import List, Optional, Tuple, Any, Dict
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
@@ -16,81 +17,151 @@ from bot.models.database import (
 )
 from bot.config import settings
 from bot.services import mongo_service
+from bot.services.write_buffer_service import write_buffer_service
+from bot.utils.cache import TTLLRUCache
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Read-through cache of users by telegram_id. Writes made through UserService
+# refresh the cached model; the TTL bounds staleness from other processes.
+_user_cache = TTLLRUCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+# Persisted user fields and their defaults. Enum fields keep the raw stored
+# value until first read; counters are written as `$inc` deltas.
+_PLAIN_FIELDS: Dict[str, Any] = {
+    "username": None,
+    "first_name": None,
+    "last_name": None,
+    "allow_broadcasts": True,
+    "daily_trainer_enabled": False,
+    "trainer_start_time": "09:00",
+    "trainer_end_time": "21:00",
+    "trainer_messages_per_day": 3,
+    "trainer_timezone": "Europe/Berlin",
+    "flashcards_daily_new_limit": 10,
+    "flashcards_reminder_enabled": True,
+    "flashcards_last_reminder_local_date": None,
+    "tokens_used_today": 0,
+    "last_token_reset": None,
+    # Trial system fields
+    "trial_activated": False,
+    "trial_activation_date": None,
+    # Subscription system: active flag + optional expiration date
+    "subscription_active": False,
+    "subscription_until": None,
+    "updated_at": None,
+}
+_ENUM_FIELDS: Dict[str, Tuple[type, str]] = {
+    "status": (UserStatus, UserStatus.PENDING.value),
+    "interface_language": (InterfaceLanguage, InterfaceLanguage.RUSSIAN.value),
+    "learning_language": (LearningLanguage, LearningLanguage.ENGLISH.value),
+    "work_mode": (WorkMode, WorkMode.TRANSLATOR.value),
+    "difficulty_level": (DifficultyLevel, DifficultyLevel.A2.value),
+    "trainer_topic": (TrainerTopic, TrainerTopic.RANDOM.value),
+    "express_trainer_topic": (TrainerTopic, TrainerTopic.RANDOM.value),
+}
+_COUNTER_FIELDS: Tuple[str, ...] = ("activity_score", "translations_count", "correct_answers", "total_answers")
+
+
+def _enum_property(name: str, enum_cls: type, default: str) -> property:
+    slot = "_" + name
+
+    def getter(self):
+        value = getattr(self, slot)
+        if not isinstance(value, enum_cls):
+            value = enum_cls(default if value is None else value)
+            object.__setattr__(self, slot, value)
+        return value
+
+    return property(getter)
+
+
 class UserModel:
+    """A user document with attribute access.
+
+    Assignments to persisted fields are remembered so `UserService.update_user`
+    writes only what changed: a `$set` of the changed fields plus `$inc`
+    deltas for the counters.
+    """
+
+    __slots__ = (
+        "_id", "telegram_id", "_dirty", "_persisted",
+        *_PLAIN_FIELDS, *_COUNTER_FIELDS, *("_" + name for name in _ENUM_FIELDS),
+    )
+
     def __init__(self, doc: Dict[str, Any]):
-        self._doc = doc
-        self._id = doc.get("_id")  # Mongo ObjectId
-        self.telegram_id = doc.get("telegram_id")
-        # For backward compatibility, many handlers used numeric user.id from SQL.
-        # We expose telegram_id via `id` to keep callbacks/data consistent.
-        self.id = self.telegram_id
-        self.username = doc.get("username")
-        self.first_name = doc.get("first_name")
-        self.last_name = doc.get("last_name")
-        self.status: UserStatus = UserStatus(doc.get("status", UserStatus.PENDING.value))
-        self.interface_language: InterfaceLanguage = InterfaceLanguage(doc.get("interface_language", InterfaceLanguage.RUSSIAN.value))
-        self.learning_language: LearningLanguage = LearningLanguage(doc.get("learning_language", LearningLanguage.ENGLISH.value))
-        self.work_mode: WorkMode = WorkMode(doc.get("work_mode", WorkMode.TRANSLATOR.value))
-        self.difficulty_level: DifficultyLevel = DifficultyLevel(doc.get("difficulty_level", DifficultyLevel.A2.value))
-        self.allow_broadcasts = doc.get("allow_broadcasts", True)
-        self.daily_trainer_enabled = doc.get("daily_trainer_enabled", False)
-        self.trainer_start_time = doc.get("trainer_start_time", "09:00")
-        self.trainer_end_time = doc.get("trainer_end_time", "21:00")
-        self.trainer_messages_per_day = doc.get("trainer_messages_per_day", 3)
-        self.trainer_timezone = doc.get("trainer_timezone", "Europe/Berlin")
-        self.flashcards_daily_new_limit = doc.get("flashcards_daily_new_limit", 10)
-        self.flashcards_reminder_enabled = doc.get("flashcards_reminder_enabled", True)
-        self.flashcards_last_reminder_local_date = doc.get("flashcards_last_reminder_local_date")
-        self.trainer_topic = TrainerTopic(doc.get("trainer_topic", TrainerTopic.RANDOM.value))
-        self.express_trainer_topic = TrainerTopic(doc.get("express_trainer_topic", TrainerTopic.RANDOM.value))
-        self.activity_score = doc.get("activity_score", 0)
-        self.translations_count = doc.get("translations_count", 0)
-        self.correct_answers = doc.get("correct_answers", 0)
-        self.total_answers = doc.get("total_answers", 0)
-        self.tokens_used_today = doc.get("tokens_used_today", 0)
-        self.last_token_reset = doc.get("last_token_reset")
-        # Trial system fields
-        self.trial_activated = doc.get("trial_activated", False)
-        self.trial_activation_date = doc.get("trial_activation_date")
-        # Subscription system: active flag + optional expiration date
-        self.subscription_active = doc.get("subscription_active", False)
-        self.subscription_until = doc.get("subscription_until")
-
-    def to_update_dict(self) -> Dict[str, Any]:
-        return {
-            "status": self.status.value,
-            "interface_language": self.interface_language.value,
-            "learning_language": self.learning_language.value,
-            "work_mode": self.work_mode.value,
-            "difficulty_level": self.difficulty_level.value,
-            "allow_broadcasts": self.allow_broadcasts,
-            "daily_trainer_enabled": self.daily_trainer_enabled,
-            "trainer_start_time": self.trainer_start_time,
-            "trainer_end_time": self.trainer_end_time,
-            "trainer_messages_per_day": self.trainer_messages_per_day,
-            "trainer_timezone": self.trainer_timezone,
-            "flashcards_daily_new_limit": self.flashcards_daily_new_limit,
-            "flashcards_reminder_enabled": self.flashcards_reminder_enabled,
-            "flashcards_last_reminder_local_date": self.flashcards_last_reminder_local_date,
-            "trainer_topic": self.trainer_topic.value,
-            "express_trainer_topic": self.express_trainer_topic.value,
-            "activity_score": self.activity_score,
-            "translations_count": self.translations_count,
-            "correct_answers": self.correct_answers,
-            "total_answers": self.total_answers,
-            "tokens_used_today": self.tokens_used_today,
-            "last_token_reset": self.last_token_reset,
-            "trial_activated": self.trial_activated,
-            "trial_activation_date": self.trial_activation_date,
-            "subscription_active": self.subscription_active,
-            "subscription_until": self.subscription_until,
+        set_ = object.__setattr__
+        set_(self, "_id", doc.get("_id"))  # Mongo ObjectId
+        set_(self, "telegram_id", doc.get("telegram_id"))
+        for name, default in _PLAIN_FIELDS.items():
+            set_(self, name, doc.get(name, default))
+        for name in _ENUM_FIELDS:
+            set_(self, "_" + name, doc.get(name))
+        for name in _COUNTER_FIELDS:
+            set_(self, name, doc.get(name, 0))
+        set_(self, "_dirty", set())
+        # Counter values last written to (or read from) Mongo
+        set_(self, "_persisted", {name: getattr(self, name) for name in _COUNTER_FIELDS})
+
+    # For backward compatibility, many handlers used numeric user.id from SQL.
+    # We expose telegram_id via `id` to keep callbacks/data consistent.
+    @property
+    def id(self):
+        return self.telegram_id
+
+    def __setattr__(self, name: str, value: Any):
+        if name in _ENUM_FIELDS:
+            object.__setattr__(self, "_" + name, value)
+        else:
+            object.__setattr__(self, name, value)
+        if name in _PLAIN_FIELDS or name in _ENUM_FIELDS:
+            self._dirty.add(name)
+
+    def _stored_value(self, name: str) -> Any:
+        value = getattr(self, "_" + name) if name in _ENUM_FIELDS else getattr(self, name)
+        return value.value if isinstance(value, Enum) else value
+
+    def to_doc(self) -> Dict[str, Any]:
+        """Current state as a plain document (as stored in Mongo)"""
+        doc = {"_id": self._id, "telegram_id": self.telegram_id}
+        for name in (*_PLAIN_FIELDS, *_ENUM_FIELDS, *_COUNTER_FIELDS):
+            doc[name] = self._stored_value(name)
+        return doc
+
+    def pending_update(self) -> Dict[str, Dict[str, Any]]:
+        """Mongo update for changes not yet written: `$set` of changed fields,
+        `$inc` of counter deltas. Empty when nothing changed."""
+        update: Dict[str, Dict[str, Any]] = {}
+        if self._dirty:
+            update["$set"] = {name: self._stored_value(name) for name in self._dirty}
+        inc = {
+            name: getattr(self, name) - self._persisted[name]
+            for name in _COUNTER_FIELDS
+            if getattr(self, name) != self._persisted[name]
         }
+        if inc:
+            update["$inc"] = inc
+        return update
+
+    def mark_written(self, update: Dict[str, Dict[str, Any]]):
+        """Forget changes included in `update` once it has been applied"""
+        self._dirty.difference_update(update.get("$set", ()))
+        for name, delta in update.get("$inc", {}).items():
+            self._persisted[name] += delta
+
+    def apply_increment(self, name: str, amount: int):
+        """Reflect a `$inc` already applied in Mongo"""
+        object.__setattr__(self, name, getattr(self, name) + amount)
+        self._persisted[name] += amount
+
+
+for _name, (_enum_cls, _default) in _ENUM_FIELDS.items():
+    setattr(UserModel, _name, _enum_property(_name, _enum_cls, _default))
+del _name, _enum_cls, _default
 
 
 class UserService:
@@ -106,6 +177,11 @@ class UserService:
         import logging
         logger = logging.getLogger(__name__)
         
+        cached = _user_cache.get(telegram_id)
+        if cached is not None:
+            return cached
+        
+        await write_buffer_service.flush("users", {"telegram_id": telegram_id})
         col = await UserService._collection()
         doc = await col.find_one({"telegram_id": telegram_id})
         is_admin = telegram_id in settings.admin_id_list
@@ -158,29 +234,33 @@ class UserService:
                 )
                 doc["status"] = UserStatus.APPROVED.value
         
-        return UserModel(doc)
+        user = UserModel(doc)
+        _user_cache.set(telegram_id, user)
+        return user
+
+    @staticmethod
+    def invalidate_cached_user(telegram_id: int):
+        """Drop a cached user after writing its document outside UserService"""
+        _user_cache.delete(telegram_id)
 
     @staticmethod
     async def update_user(session, user: UserModel, **kwargs):
-        col = await UserService._collection()
-        # Apply changes to object
+        """Apply `kwargs` to the user and write every unsaved change
+        (changed fields via `$set`, counters via `$inc`)"""
         for k, v in kwargs.items():
-            if k == "status" and isinstance(v, UserStatus):
-                user.status = v
-            elif k == "interface_language" and isinstance(v, InterfaceLanguage):
-                user.interface_language = v
-            elif k == "learning_language" and isinstance(v, LearningLanguage):
-                user.learning_language = v
-            elif k == "difficulty_level" and isinstance(v, DifficultyLevel):
-                user.difficulty_level = v
-            elif k == "trainer_topic" and isinstance(v, TrainerTopic):
-                user.trainer_topic = v
-            elif k == "express_trainer_topic" and isinstance(v, TrainerTopic):
-                user.express_trainer_topic = v
-            else:
-                setattr(user, k, v)
+            setattr(user, k, v)
+        await UserService._write_changes(user)
+
+    @staticmethod
+    async def _write_changes(user: UserModel):
+        if not user.pending_update():
+            return
         user.updated_at = _now()
-        await col.update_one({"telegram_id": user.telegram_id}, {"$set": user.to_update_dict()})
+        update = user.pending_update()
+        col = await UserService._collection()
+        await col.update_one({"telegram_id": user.telegram_id}, update)
+        user.mark_written(update)
+        _user_cache.set(user.telegram_id, user)
 
     @staticmethod
     async def get_pending_users(session) -> List[UserModel]:
@@ -210,25 +290,46 @@ class UserService:
         cursor = col.find({"status": UserStatus.APPROVED.value})
         return [UserModel(d) async for d in cursor]
 
+    @staticmethod
+    async def get_users_by_ids(session, telegram_ids: List[int]) -> Dict[int, UserModel]:
+        """Load several users in one query, keyed by telegram_id. Unknown ids are skipped."""
+        if not telegram_ids:
+            return {}
+        col = await UserService._collection()
+        cursor = col.find({"telegram_id": {"$in": list(telegram_ids)}})
+        return {d["telegram_id"]: UserModel(d) async for d in cursor}
+
     @staticmethod
     async def get_top_users(session, limit: int = 10) -> List[UserModel]:
+        await write_buffer_service.flush("users")
         col = await UserService._collection()
         cursor = col.find({"status": UserStatus.APPROVED.value}).sort("activity_score", -1).limit(limit)
         return [UserModel(d) async for d in cursor]
 
     @staticmethod
     async def increment_activity(session, user: UserModel, points: int = 1):
-        col = await UserService._collection()
-        user.activity_score += points
-        await col.update_one({"telegram_id": user.telegram_id}, {"$inc": {"activity_score": points}})
+        await UserService.increment_counters(session, user, activity_score=points)
+
+    @staticmethod
+    async def increment_counters(session, user: UserModel, **amounts: int):
+        """Add to counter fields (activity_score, total_answers, ...) through
+        the write-behind buffer; the model and its cached copy update at once"""
+        amounts = {name: amount for name, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        await write_buffer_service.add("users", {"telegram_id": user.telegram_id}, inc=amounts, upsert=False)
+        cached = _user_cache.get(user.telegram_id)
+        for name, amount in amounts.items():
+            user.apply_increment(name, amount)
+            if cached is not None and cached is not user:
+                cached.apply_increment(name, amount)
 
     @staticmethod
     async def reset_daily_tokens_if_needed(session, user: UserModel):
         if user.last_token_reset and (_now() - user.last_token_reset > timedelta(days=1)):
-            col = await UserService._collection()
             user.tokens_used_today = 0
             user.last_token_reset = _now()
-            await col.update_one({"telegram_id": user.telegram_id}, {"$set": {"tokens_used_today": 0, "last_token_reset": user.last_token_reset}})
+            await UserService._write_changes(user)
 
     @staticmethod
     async def get_broadcast_recipients(session) -> List[UserModel]:
@@ -236,6 +337,27 @@ class UserService:
         cursor = col.find({"status": UserStatus.APPROVED.value, "allow_broadcasts": True})
         return [UserModel(d) async for d in cursor]
     
+    @staticmethod
+    async def count_broadcast_recipients(session) -> int:
+        col = await UserService._collection()
+        return await col.count_documents({"status": UserStatus.APPROVED.value, "allow_broadcasts": True})
+
+    @staticmethod
+    async def iter_broadcast_recipient_ids(session, after_telegram_id: int = 0):
+        """Stream broadcast recipient telegram_ids in ascending order, starting
+        after `after_telegram_id` (the cursor of a resumed broadcast)"""
+        col = await UserService._collection()
+        cursor = col.find(
+            {
+                "status": UserStatus.APPROVED.value,
+                "allow_broadcasts": True,
+                "telegram_id": {"$gt": after_telegram_id},
+            },
+            {"telegram_id": 1},
+        ).sort("telegram_id", 1)
+        async for doc in cursor:
+            yield doc["telegram_id"]
+    
     @staticmethod
     async def get_user_by_username(session, username: str) -> Optional[UserModel]:
         """Find a user by their username."""
@@ -369,7 +491,8 @@ class TranslationHistoryService:
 class TrainingService:
     @staticmethod
     async def create_session(session, user_id: ObjectId, sentence: str,
-                             expected: str, difficulty: DifficultyLevel, topic: TrainerTopic = None):
+                             expected: str, difficulty: DifficultyLevel, topic: TrainerTopic = None,
+                             hint: str = None):
         col = mongo_service.db().training_sessions
         doc = {
             "user_id": user_id,
@@ -381,6 +504,7 @@ class TrainingService:
             "quality_percentage": None,
             "difficulty_level": difficulty.value,
             "topic": topic.value if topic else None,
+            "hint": hint or None,
             "created_at": _now(),
             "answered_at": None,
         }
@@ -426,12 +550,30 @@ class TrainingService:
 
 
 class BroadcastService:
+    """Broadcast jobs. A running job is resumed from its `cursor` (the last
+    recipient telegram_id handled) after a restart; per-recipient results
+    live in `broadcast_recipients`."""
+
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+
     @staticmethod
-    async def create_broadcast(session, message: str, created_by: int):
+    async def create_broadcast(session, message: str, created_by: int, *,
+                               source_chat_id: int = None, source_message_id: int = None,
+                               total: int = 0, lang: str = "ru",
+                               status_chat_id: int = None, status_message_id: int = None):
         col = mongo_service.db().broadcasts
         doc = {
             "message": message,
             "created_by": created_by,
+            "source_chat_id": source_chat_id,
+            "source_message_id": source_message_id,
+            "status": BroadcastService.STATUS_RUNNING,
+            "cursor": 0,
+            "total": total,
+            "lang": lang,
+            "status_chat_id": status_chat_id,
+            "status_message_id": status_message_id,
             "sent_count": 0,
             "failed_count": 0,
             "created_at": _now(),
@@ -449,3 +591,49 @@ class BroadcastService:
         if completed:
             update_doc["completed_at"] = _now()
         await col.update_one({"_id": broadcast_id}, {"$set": update_doc})
+
+    @staticmethod
+    async def get_running_broadcasts(session) -> List[Dict[str, Any]]:
+        col = mongo_service.db().broadcasts
+        return await col.find({"status": BroadcastService.STATUS_RUNNING}).to_list(length=None)
+
+    @staticmethod
+    async def get_recorded_recipients(session, broadcast_id: Any, telegram_ids: List[int]) -> set:
+        """Recipients of `telegram_ids` that already have a result (sent or failed)"""
+        col = mongo_service.db().broadcast_recipients
+        cursor = col.find(
+            {"broadcast_id": broadcast_id, "telegram_id": {"$in": telegram_ids}},
+            {"telegram_id": 1},
+        )
+        return {d["telegram_id"] async for d in cursor}
+
+    @staticmethod
+    async def record_recipient(session, broadcast_id: Any, telegram_id: int,
+                               sent: bool, error: str = None):
+        col = mongo_service.db().broadcast_recipients
+        await col.update_one(
+            {"broadcast_id": broadcast_id, "telegram_id": telegram_id},
+            {"$set": {
+                "status": "sent" if sent else "failed",
+                "error": error,
+                "updated_at": _now(),
+            }},
+            upsert=True,
+        )
+
+    @staticmethod
+    async def advance_broadcast(session, broadcast_id: Any, cursor: int, sent: int, failed: int):
+        """Move the job past `cursor` and add this window's counts"""
+        col = mongo_service.db().broadcasts
+        await col.update_one(
+            {"_id": broadcast_id},
+            {"$set": {"cursor": cursor}, "$inc": {"sent_count": sent, "failed_count": failed}},
+        )
+
+    @staticmethod
+    async def complete_broadcast(session, broadcast_id: Any):
+        col = mongo_service.db().broadcasts
+        await col.update_one(
+            {"_id": broadcast_id},
+            {"$set": {"status": BroadcastService.STATUS_COMPLETED, "completed_at": _now()}},
+        )
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import math
 from collections import defaultdict
 from datetime import date, datetime, timezone, timedelta
 from typing import Any
@@ -12,8 +15,15 @@ except Exception:  # pragma: no cover - local fallback when bson deps are absent
         def __new__(cls, value: str = ""):
             return str.__new__(cls, value or "mock-object-id")
 
+from pymongo import ReturnDocument, UpdateOne
+
+from bot.config import settings
 from bot.services import mongo_service
+from bot.services.redis_service import redis_service
+from bot.utils.cache import TTLLRUCache
+from bot.utils.single_flight import SingleFlight
 
+logger = logging.getLogger(__name__)
 
 DECK_STATUS_QUEUED = "queued"
 DECK_STATUS_ACTIVE = "active"
@@ -26,6 +36,27 @@ DEFAULT_FLASHCARDS_DAILY_NEW_LIMIT = 10
 DEFAULT_FLASHCARDS_REMINDER_ENABLED = True
 DEFAULT_FLASHCARDS_TIMEZONE = "Europe/Berlin"
 
+# Batched reviews (review_session_cards)
+REVIEW_BATCH_MAX_SIZE = 200
+REVIEW_MAX_AGE = timedelta(days=7)  # Older client timestamps are clamped to this age
+APPLIED_REVIEW_IDS_KEPT = 50  # Review ids remembered per card for retried batches
+
+# Per-set counters materialized on flashcard_sets documents (see build_set_counters)
+SET_COUNTERS_VERSION = 1
+COUNTER_CARD_FIELDS = {"set_id": 1, "srs_status": 1, "srs_next_review": 1, "last_reviewed_at": 1}
+SET_COUNTERS_BUILD_ATTEMPTS = 3
+
+# Today's session is chosen from SRS fields only; bodies are loaded for the chosen cards
+SESSION_CARD_FIELDS = {**COUNTER_CARD_FIELDS, "last_review_result": 1, "created_at": 1}
+SESSION_BODY_FIELDS = {"front": 1, "back": 1, "example": 1, "image_url": 1}
+
+# Overview snapshots are cached per user and version; any set or card change bumps the version
+OVERVIEW_VERSION_TTL_SECONDS = 7 * 86400
+OVERVIEW_LOCK_MS = 5000
+
+_overview_l1 = TTLLRUCache(settings.FLASHCARDS_OVERVIEW_L1_MAX_SIZE, settings.FLASHCARDS_OVERVIEW_L1_TTL_SECONDS)
+_overview_flight = SingleFlight("flashcards_overview")
+
 
 def get_zoneinfo(tz_name: str | None):
     for candidate in (tz_name, DEFAULT_FLASHCARDS_TIMEZONE, "UTC"):
@@ -181,6 +212,101 @@ def compute_set_counts(cards: list[dict[str, Any]], now: datetime) -> dict[str,
     }
 
 
+def _due_bucket(card: dict[str, Any]) -> str | None:
+    """Epoch minute from which a reviewed card is due ("0" = always due); None for new cards"""
+    if get_srs_status(card) == "new":
+        return None
+    next_review = ensure_utc_datetime(card.get("srs_next_review"))
+    if next_review is None:
+        return "0"
+    return str(math.ceil(next_review.timestamp() / 60))
+
+
+def _card_counter_contribution(card: dict[str, Any]) -> dict[str, int]:
+    status = get_srs_status(card)
+    if status not in ("new", "learning"):
+        status = "known"
+    contribution = {"card_count": 1, f"{status}_count": 1}
+    bucket = _due_bucket(card)
+    if bucket is not None:
+        contribution[f"due_at.{bucket}"] = 1
+    return contribution
+
+
+def _fold_due_at(due_at: dict[str, int], now: datetime) -> dict[str, int]:
+    """Merge the buckets that are already due into "0" and drop empty ones"""
+    now_minute = int(now.timestamp() // 60)
+    folded: dict[str, int] = defaultdict(int)
+    for bucket, count in due_at.items():
+        folded["0" if int(bucket) <= now_minute else bucket] += count
+    return {bucket: count for bucket, count in folded.items() if count}
+
+
+def build_set_counters(cards: list[dict[str, Any]], now: datetime) -> dict[str, Any]:
+    """Counters stored on a flashcard set, computed from all of its cards.
+
+    `due_at` maps the epoch minute a reviewed card becomes due to the number
+    of such cards, so the due count can be read at any time without the cards.
+    """
+    stats = compute_set_counts(cards, now)
+    due_at: dict[str, int] = defaultdict(int)
+    for card in cards:
+        bucket = _due_bucket(card)
+        if bucket is not None:
+            due_at[bucket] += 1
+    return {
+        "version": SET_COUNTERS_VERSION,
+        "card_count": stats["card_count"],
+        "new_count": stats["new_count"],
+        "learning_count": stats["learning_count"],
+        "known_count": stats["known_count"],
+        "due_at": _fold_due_at(due_at, now),
+        "latest_reviewed_at": stats["latest_reviewed_at"],
+        "rev": 0,
+    }
+
+
+def has_current_set_counters(set_doc: dict[str, Any]) -> bool:
+    return (set_doc.get("counters") or {}).get("version") == SET_COUNTERS_VERSION
+
+
+def set_counters_to_stats(counters: dict[str, Any], now: datetime) -> dict[str, Any]:
+    """The `compute_set_counts` result for a set, read from its stored counters"""
+    now_minute = int(now.timestamp() // 60)
+    due_count = sum(
+        int(count) for bucket, count in (counters.get("due_at") or {}).items() if int(bucket) <= now_minute
+    )
+    return {
+        "card_count": int(counters.get("card_count", 0) or 0),
+        "new_count": int(counters.get("new_count", 0) or 0),
+        "learning_count": int(counters.get("learning_count", 0) or 0),
+        "known_count": int(counters.get("known_count", 0) or 0),
+        "due_count": due_count,
+        "latest_reviewed_at": ensure_utc_datetime(counters.get("latest_reviewed_at")),
+    }
+
+
+def build_set_counter_delta(before: dict[str, Any] | None, after: dict[str, Any] | None) -> dict[str, Any]:
+    """Update for a set's counters when a card goes from `before` to `after`
+    (None before a create, None after a delete). Empty if nothing changes."""
+    amounts: dict[str, int] = defaultdict(int)
+    for card, sign in ((before, -1), (after, 1)):
+        if card is not None:
+            for field, amount in _card_counter_contribution(card).items():
+                amounts[field] += sign * amount
+
+    update: dict[str, Any] = {}
+    inc = {f"counters.{field}": amount for field, amount in amounts.items() if amount}
+    if inc:
+        update["$inc"] = inc
+    reviewed_at = ensure_utc_datetime((after or {}).get("last_reviewed_at"))
+    if reviewed_at and reviewed_at != ensure_utc_datetime((before or {}).get("last_reviewed_at")):
+        update["$max"] = {"counters.latest_reviewed_at": reviewed_at}
+    if update:
+        update.setdefault("$inc", {})["counters.rev"] = 1
+    return update
+
+
 def _derive_completed_at(set_doc: dict[str, Any], stats: dict[str, Any], now: datetime) -> datetime:
     for candidate in (
         stats.get("latest_reviewed_at"),
@@ -225,7 +351,7 @@ def _build_set_summary(
 
 def prepare_autopilot_state(
     raw_sets: list[dict[str, Any]],
-    cards_by_set: dict[str, list[dict[str, Any]]],
+    cards_by_set: dict[str, list[dict[str, Any]]] | None = None,
     *,
     user_doc: dict[str, Any] | None = None,
     now: datetime | None = None,
@@ -241,9 +367,13 @@ def prepare_autopilot_state(
     activation_blocked_today = False
 
     for index, set_doc in enumerate(raw_sets):
-        set_id = str(set_doc["_id"])
-        cards = cards_by_set.get(set_id, [])
-        stats = compute_set_counts(cards, now)
+        # Without cards, stats come from the counters stored on the set
+        if cards_by_set is None:
+            cards = []
+            stats = set_counters_to_stats(set_doc.get("counters") or {}, now)
+        else:
+            cards = cards_by_set.get(str(set_doc["_id"]), [])
+            stats = compute_set_counts(cards, now)
         has_cards = stats["card_count"] > 0
         unresolved = stats["new_count"] > 0 or stats["learning_count"] > 0
 
@@ -420,30 +550,80 @@ def prepare_autopilot_state(
     }
 
 
+async def _write_deck_updates(updates: list[dict[str, Any]]) -> None:
+    if updates:
+        await mongo_service.db().flashcard_sets.bulk_write(
+            [UpdateOne({"_id": update["set_id"]}, update["update"]) for update in updates],
+            ordered=False,
+        )
+
+
+async def _ensure_set_counters(user_id: int, raw_sets: list[dict[str, Any]], now: datetime) -> None:
+    """Build the counters of sets created before they existed (or of an older version).
+
+    The write only lands if the set's counters.rev is still the one read, so
+    a card change counted in between isn't overwritten; such a set is re-read
+    and rebuilt (up to SET_COUNTERS_BUILD_ATTEMPTS times, then counted in
+    memory only and left for a later load).
+    """
+    stale = [set_doc for set_doc in raw_sets if not has_current_set_counters(set_doc)]
+    sets_collection = mongo_service.db().flashcard_sets
+
+    for attempt in range(SET_COUNTERS_BUILD_ATTEMPTS):
+        if not stale:
+            return
+        cards = await mongo_service.db().flashcards.find(
+            {"user_id": user_id, "set_id": {"$in": [str(set_doc["_id"]) for set_doc in stale]}},
+            COUNTER_CARD_FIELDS,
+        ).to_list(length=None)
+        cards_by_set = build_cards_by_set(cards)
+
+        contended = []
+        for set_doc in stale:
+            stored = set_doc.get("counters") or {}
+            counters = build_set_counters(cards_by_set.get(str(set_doc["_id"]), []), now)
+            counters["rev"] = int(stored.get("rev", 0) or 0) + 1
+            result = await sets_collection.update_one(
+                {"_id": set_doc["_id"], "counters.rev": stored.get("rev")},
+                {"$set": {"counters": counters}},
+            )
+            if result.matched_count:
+                set_doc["counters"] = counters
+                continue
+
+            fresh = await sets_collection.find_one({"_id": set_doc["_id"]}, {"counters": 1})
+            if fresh is not None and has_current_set_counters(fresh):
+                set_doc["counters"] = fresh["counters"]
+            elif fresh is not None and attempt + 1 < SET_COUNTERS_BUILD_ATTEMPTS:
+                set_doc["counters"] = fresh.get("counters")
+                contended.append(set_doc)
+            else:
+                set_doc["counters"] = counters
+        stale = contended
+
+
 async def get_user_flashcards_overview(
     user_id: int,
     *,
     now: datetime | None = None,
     user_doc: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
+    """Deck queue and counts from the sets' stored counters, without loading cards"""
     if not mongo_service.is_ready():
         raise RuntimeError("Mongo DB is not initialized")
 
     now = ensure_utc_datetime(now) or datetime.now(timezone.utc)
     users_collection = mongo_service.db().users
     flashcard_sets_collection = mongo_service.db().flashcard_sets
-    flashcards_collection = mongo_service.db().flashcards
 
     user_doc = user_doc or await users_collection.find_one({"telegram_id": user_id}) or {}
     raw_sets = await flashcard_sets_collection.find({"user_id": user_id}).sort("created_at", 1).to_list(length=500)
-    cards = await flashcards_collection.find({"user_id": user_id}).to_list(length=10000)
-    cards_by_set = build_cards_by_set(cards)
+    await _ensure_set_counters(user_id, raw_sets, now)
 
-    overview = prepare_autopilot_state(raw_sets, cards_by_set, user_doc=user_doc, now=now)
-    for update in overview["updates"]:
-        await flashcard_sets_collection.update_one({"_id": update["set_id"]}, update["update"])
+    overview = prepare_autopilot_state(raw_sets, user_doc=user_doc, now=now)
+    await _write_deck_updates(overview["updates"])
 
-    overview["cards_by_set"] = cards_by_set
+    overview["cards_by_set"] = {}
     overview["user_doc"] = user_doc
     overview["now"] = now
     return overview
@@ -459,7 +639,64 @@ def _card_sort_key(card: dict[str, Any]) -> tuple[Any, ...]:
     )
 
 
-def build_today_session_cards(overview: dict[str, Any]) -> list[dict[str, Any]]:
+def build_active_deck_review_delta(
+    set_doc: dict[str, Any] | None,
+    before: dict[str, Any],
+    after: dict[str, Any],
+    *,
+    user_doc: dict[str, Any] | None,
+    now: datetime,
+) -> dict[str, Any] | None:
+    """Dashboard change for a review in the active deck that leaves it active.
+
+    `set_doc` is the deck after the review. Returns None when the review may
+    change deck states, which needs the whole queue.
+    """
+    if (
+        set_doc is None
+        or not has_current_set_counters(set_doc)
+        or set_doc.get("deck_status") != DECK_STATUS_ACTIVE
+        or set_doc.get("activated_at") is None
+    ):
+        return None
+
+    stats = set_counters_to_stats(set_doc["counters"], now)
+    if stats["card_count"] == 0 or stats["new_count"] + stats["learning_count"] == 0:
+        return None
+
+    summary = _build_set_summary(
+        set_doc,
+        stats,
+        queue_position=int(set_doc.get("queue_position", 0) or 0),
+        deck_status=DECK_STATUS_ACTIVE,
+        activated_at=ensure_utc_datetime(set_doc.get("activated_at")),
+        completed_at=None,
+        last_studied_at=ensure_utc_datetime(set_doc.get("last_studied_at")) or now,
+    )
+    daily_new_limit = get_flashcards_daily_new_limit(user_doc)
+
+    totals_delta = {"new": 0, "learning": 0, "known": 0}
+    for card, sign in ((before, -1), (after, 1)):
+        status = get_srs_status(card)
+        totals_delta[status if status in totals_delta else "known"] += sign
+    totals_delta["due"] = int(is_review_due_flashcard(after, now)) - int(is_review_due_flashcard(before, now))
+
+    return {
+        "dashboard": {
+            "active_set": serialize_set_summary(summary),
+            "today_due_count": summary["due_count"],
+            "today_total_due_count": summary["due_count"],
+            "today_active_due_count": summary["due_count"],
+            "today_new_count": min(summary["new_count"], daily_new_limit),
+            "daily_new_limit": daily_new_limit,
+        },
+        "totals_delta": {name: amount for name, amount in totals_delta.items() if amount},
+    }
+
+
+def select_today_session_cards(overview: dict[str, Any]) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+    """(set summary, card) pairs of today's session: the active deck's due
+    cards, then its new cards up to the daily limit"""
     now = overview["now"]
     cards_by_set = overview["cards_by_set"]
     active_set_id = overview["active_set"]["_id"] if overview["active_set"] else None
@@ -487,9 +724,19 @@ def build_today_session_cards(overview: dict[str, Any]) -> list[dict[str, Any]]:
     active_new_cards.sort(key=lambda item: (item[0],) + _card_sort_key(item[2]))
 
     session_cards = active_due_cards + active_new_cards[:daily_new_limit]
+    return [(set_summary, card) for _, set_summary, card in session_cards]
+
+
+def build_today_session_cards(overview: dict[str, Any]) -> list[dict[str, Any]]:
+    return build_session_card_payload(select_today_session_cards(overview))
+
+
+def build_session_card_payload(
+    session_cards: list[tuple[dict[str, Any], dict[str, Any]]],
+) -> list[dict[str, Any]]:
     payload: list[dict[str, Any]] = []
 
-    for _, set_summary, card in session_cards:
+    for set_summary, card in session_cards:
         status = get_srs_status(card)
         payload.append(
             {
@@ -503,7 +750,7 @@ def build_today_session_cards(overview: dict[str, Any]) -> list[dict[str, Any]]:
                 "example": card.get("example", ""),
                 "has_image": bool(card.get("image_url")),
                 "srs_status": status,
-                "session_type": "new" if status == "new" and card.get("set_id") == active_set_id else "due",
+                "session_type": "new" if status == "new" and set_summary["deck_status"] == DECK_STATUS_ACTIVE else "due",
                 "last_reviewed_at": ensure_utc_datetime(card.get("last_reviewed_at")),
                 "last_review_result": card.get("last_review_result"),
             }
@@ -512,28 +759,159 @@ def build_today_session_cards(overview: dict[str, Any]) -> list[dict[str, Any]]:
     return payload
 
 
-def serialize_flashcard_overview(overview: dict[str, Any]) -> dict[str, Any]:
-    def serialize_set(item: dict[str, Any] | None) -> dict[str, Any] | None:
-        if item is None:
+async def get_today_session_cards(user_id: int, *, now: datetime | None = None) -> list[dict[str, Any]]:
+    """Today's session for the mini app.
+
+    Candidates come from the (user_id, set_id, srs_next_review) index with SRS
+    fields only: the active deck's due cards and its oldest new cards up to
+    the daily limit. Card bodies are then loaded for the chosen cards alone.
+    """
+    snapshot = await get_overview_snapshot(user_id)
+    active_set = snapshot["dashboard"]["active_set"]
+    if active_set is None:
+        return []
+
+    overview = {
+        "now": ensure_utc_datetime(now) or datetime.now(timezone.utc),
+        "active_set": active_set,
+        "sets": [active_set],
+        "daily_new_limit": snapshot["dashboard"]["daily_new_limit"],
+    }
+
+    cards_collection = mongo_service.db().flashcards
+    deck_filter = {"user_id": user_id, "set_id": active_set["_id"]}
+    due_cards, new_cards = await asyncio.gather(
+        cards_collection.find(
+            {
+                **deck_filter,
+                "$or": [
+                    {"srs_next_review": {"$lte": overview["now"]}},
+                    {"srs_next_review": None, "srs_status": {"$nin": [None, "new"]}},
+                ],
+            },
+            SESSION_CARD_FIELDS,
+        ).to_list(length=None),
+        cards_collection.find(
+            {**deck_filter, "srs_next_review": None, "srs_status": {"$in": [None, "new"]}},
+            SESSION_CARD_FIELDS,
+        ).sort([("created_at", 1), ("_id", 1)]).limit(overview["daily_new_limit"]).to_list(length=None),
+    )
+    overview["cards_by_set"] = {active_set["_id"]: due_cards + new_cards}
+    session_cards = select_today_session_cards(overview)
+    if not session_cards:
+        return []
+
+    bodies = {
+        card["_id"]: card
+        for card in await cards_collection.find(
+            {"_id": {"$in": [card["_id"] for _, card in session_cards]}}, SESSION_BODY_FIELDS
+        ).to_list(length=None)
+    }
+    return build_session_card_payload(
+        [(set_summary, {**card, **bodies.get(card["_id"], {})}) for set_summary, card in session_cards]
+    )
+
+
+def _overview_version_key(user_id: int) -> str:
+    return f"flashcards:overview:ver:{user_id}"
+
+
+async def _get_overview_version(user_id: int) -> int | None:
+    if redis_service.redis is None:
+        return None
+    try:
+        return int(await redis_service.get(_overview_version_key(user_id)) or 0)
+    except Exception as e:
+        logger.warning(f"Flashcards overview version unavailable: {e}")
+        return None
+
+
+async def invalidate_overview(user_id: int) -> None:
+    """Bump the user's overview version; call after a set or card change is written"""
+    if redis_service.redis is None:
+        return
+    key = _overview_version_key(user_id)
+    try:
+        async with redis_service.pipeline() as pipe:
+            pipe.incr(key)
+            pipe.expire(key, OVERVIEW_VERSION_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate flashcards overview of {user_id}: {e}")
+
+
+async def _build_overview_snapshot(user_id: int) -> dict[str, Any]:
+    overview = await get_user_flashcards_overview(user_id)
+    return {
+        "dashboard": serialize_flashcard_overview(overview),
+        "sets": [serialize_set_summary(item) for item in overview["sets"]],
+        "computed_at": overview["now"].isoformat(),
+    }
+
+
+async def get_overview_snapshot(user_id: int) -> dict[str, Any]:
+    """JSON-ready dashboard and set list of a user, shared by the mini app endpoints.
+
+    Cached in Redis and in-process under the user's overview version.
+    Concurrent requests for the same version share one computation. The
+    result is shared too, so don't modify it.
+    """
+    version = await _get_overview_version(user_id)
+    if version is None:
+        return await _overview_flight.do(f"{user_id}:-", lambda: _build_overview_snapshot(user_id))
+
+    snapshot = _overview_l1.get((user_id, version))
+    if snapshot is not None:
+        return snapshot
+
+    cache_key = f"flashcards:overview:{user_id}:{version}"
+
+    async def cached() -> dict[str, Any] | None:
+        try:
+            return await redis_service.get_packed(cache_key)
+        except Exception as e:
+            logger.warning(f"Cached flashcards overview unreadable: {e}")
             return None
-        return {
-            "_id": item["_id"],
-            "name": item["name"],
-            "queue_position": item["queue_position"],
-            "deck_status": item["deck_status"],
-            "created_at": item["created_at"].isoformat() if item["created_at"] else None,
-            "updated_at": item["updated_at"].isoformat() if item["updated_at"] else None,
-            "activated_at": item["activated_at"].isoformat() if item["activated_at"] else None,
-            "completed_at": item["completed_at"].isoformat() if item["completed_at"] else None,
-            "last_studied_at": item["last_studied_at"].isoformat() if item["last_studied_at"] else None,
-            "card_count": item["card_count"],
-            "new_count": item["new_count"],
-            "learning_count": item["learning_count"],
-            "known_count": item["known_count"],
-            "due_count": item["due_count"],
-            "problem_count": item["problem_count"],
-        }
 
+    async def compute() -> dict[str, Any]:
+        snapshot = await cached()
+        if snapshot is None:
+            snapshot = await _build_overview_snapshot(user_id)
+            try:
+                await redis_service.set_packed(cache_key, snapshot, ex=settings.FLASHCARDS_OVERVIEW_CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Failed to cache flashcards overview: {e}")
+        return snapshot
+
+    snapshot = await _overview_flight.do(
+        f"{user_id}:{version}", compute, recheck=cached, lock_ttl_ms=OVERVIEW_LOCK_MS
+    )
+    _overview_l1.set((user_id, version), snapshot)
+    return snapshot
+
+
+def serialize_set_summary(item: dict[str, Any] | None) -> dict[str, Any] | None:
+    if item is None:
+        return None
+    return {
+        "_id": item["_id"],
+        "name": item["name"],
+        "queue_position": item["queue_position"],
+        "deck_status": item["deck_status"],
+        "created_at": item["created_at"].isoformat() if item["created_at"] else None,
+        "updated_at": item["updated_at"].isoformat() if item["updated_at"] else None,
+        "activated_at": item["activated_at"].isoformat() if item["activated_at"] else None,
+        "completed_at": item["completed_at"].isoformat() if item["completed_at"] else None,
+        "last_studied_at": item["last_studied_at"].isoformat() if item["last_studied_at"] else None,
+        "card_count": item["card_count"],
+        "new_count": item["new_count"],
+        "learning_count": item["learning_count"],
+        "known_count": item["known_count"],
+        "due_count": item["due_count"],
+        "problem_count": item["problem_count"],
+    }
+
+
+def serialize_flashcard_overview(overview: dict[str, Any]) -> dict[str, Any]:
     return {
         "new": overview["totals"]["new"],
         "learning": overview["totals"]["learning"],
@@ -549,12 +927,14 @@ def serialize_flashcard_overview(overview: dict[str, Any]) -> dict[str, Any]:
         "activation_blocked_today": overview["activation_blocked_today"],
         "today_local_date": overview["today_local_date"],
         "timezone": overview["timezone"],
-        "active_set": serialize_set(overview["active_set"]),
-        "next_set": serialize_set(overview["next_set"]),
+        "active_set": serialize_set_summary(overview["active_set"]),
+        "next_set": serialize_set_summary(overview["next_set"]),
     }
 
 
-async def review_session_card(user_id: int, card_id: str, result: str, *, now: datetime | None = None) -> None:
+async def review_session_card(user_id: int, card_id: str, result: str, *, now: datetime | None = None) -> dict[str, Any]:
+    """Apply a review and return the dashboard change as
+    {"dashboard": fields to replace, "totals_delta": amounts to add to the totals}."""
     if result not in {SRS_RESULT_KNOW, SRS_RESULT_DONT_KNOW}:
         raise ValueError("Unsupported flashcard review result")
 
@@ -563,20 +943,260 @@ async def review_session_card(user_id: int, card_id: str, result: str, *, now: d
 
     now = ensure_utc_datetime(now) or datetime.now(timezone.utc)
     cards_collection = mongo_service.db().flashcards
-    sets_collection = mongo_service.db().flashcard_sets
 
-    card = await cards_collection.find_one({"_id": ObjectId(card_id), "user_id": user_id})
+    card, user_doc = await asyncio.gather(
+        cards_collection.find_one({"_id": ObjectId(card_id), "user_id": user_id}),
+        mongo_service.db().users.find_one(
+            {"telegram_id": user_id}, {"trainer_timezone": 1, "flashcards_daily_new_limit": 1}
+        ),
+    )
     if not card:
         raise LookupError("Card not found")
 
     update_doc = build_srs_review_update(card, result, now=now)
-    await cards_collection.update_one({"_id": ObjectId(card_id)}, update_doc)
-
+    reviewed = {**card, **update_doc["$set"]}
+    set_doc = None
     if card.get("set_id"):
-        await sets_collection.update_one(
-            {"_id": ObjectId(card["set_id"]), "user_id": user_id},
-            {"$set": {"last_studied_at": now, "updated_at": now}},
+        set_update = build_set_counter_delta(card, reviewed)
+        set_update["$set"] = {"last_studied_at": now, "updated_at": now}
+        _, set_doc, _ = await asyncio.gather(
+            cards_collection.update_one({"_id": ObjectId(card_id)}, update_doc),
+            mongo_service.db().flashcard_sets.find_one_and_update(
+                {"_id": ObjectId(card["set_id"]), "user_id": user_id},
+                set_update,
+                return_document=ReturnDocument.AFTER,
+            ),
+            mongo_service.update_flashcard_daily_stats(user_id, result),
+        )
+    else:
+        await asyncio.gather(
+            cards_collection.update_one({"_id": ObjectId(card_id)}, update_doc),
+            mongo_service.update_flashcard_daily_stats(user_id, result),
         )
 
-    await mongo_service.update_flashcard_daily_stats(user_id, result)
-    await get_user_flashcards_overview(user_id, now=now)
+    await invalidate_overview(user_id)
+    delta = build_active_deck_review_delta(set_doc, card, reviewed, user_doc=user_doc, now=now)
+    if delta is not None:
+        return delta
+
+    # The deck changed state (or wasn't the active one): redo the queue from the set summaries
+    snapshot = await get_overview_snapshot(user_id)
+    return {"dashboard": snapshot["dashboard"], "totals_delta": {}}
+
+
+def fold_card_reviews(
+    card: dict[str, Any], reviews: list[tuple[str, datetime]]
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Apply several reviews of one card in order.
+
+    Returns the card after the reviews and the single update that gets it there.
+    """
+    current = dict(card)
+    set_fields: dict[str, Any] = {}
+    inc_fields: dict[str, int] = defaultdict(int)
+    for result, reviewed_at in reviews:
+        update_doc = build_srs_review_update(current, result, now=reviewed_at)
+        set_fields.update(update_doc["$set"])
+        for field, amount in update_doc["$inc"].items():
+            inc_fields[field] += amount
+            current[field] = int(current.get(field, 0) or 0) + amount
+        current.update(update_doc["$set"])
+    return current, {"$set": set_fields, "$inc": dict(inc_fields)}
+
+
+def _merge_set_updates(target: dict[str, Any], update: dict[str, Any]) -> None:
+    for field, amount in update.get("$inc", {}).items():
+        target.setdefault("$inc", {})[field] = target.get("$inc", {}).get(field, 0) + amount
+    for field, value in update.get("$max", {}).items():
+        current = target.setdefault("$max", {}).get(field)
+        if current is None or value > current:
+            target["$max"][field] = value
+
+
+async def review_session_cards(
+    user_id: int, reviews: list[dict[str, Any]], *, now: datetime | None = None
+) -> dict[str, Any]:
+    """Apply a batch of reviews in order and return the recomputed dashboard.
+
+    Each review has a client-generated `id`, a `card_id`, a `result` and a
+    `reviewed_at`. The ids are stored on the card by the same write that
+    applies the reviews, so a retried batch skips whatever already landed.
+    Cards are written concurrently, their sets with one bulk_write, and the
+    deck queue is recomputed once.
+    """
+    if not mongo_service.is_ready():
+        raise RuntimeError("Mongo DB is not initialized")
+    if any(review["result"] not in {SRS_RESULT_KNOW, SRS_RESULT_DONT_KNOW} for review in reviews):
+        raise ValueError("Unsupported flashcard review result")
+
+    now = ensure_utc_datetime(now) or datetime.now(timezone.utc)
+    applied, duplicates = await _apply_review_batch(user_id, reviews, now)
+
+    if applied or duplicates:
+        await invalidate_overview(user_id)
+    snapshot = await get_overview_snapshot(user_id)
+    return {
+        "applied": applied,
+        "duplicates": duplicates,
+        "dashboard": snapshot["dashboard"],
+        "totals_delta": {},
+    }
+
+
+async def _apply_review_batch(
+    user_id: int, reviews: list[dict[str, Any]], now: datetime
+) -> tuple[int, int]:
+    """Returns the number of applied and of already applied reviews."""
+    db = mongo_service.db()
+
+    reviews_by_card: dict[str, dict[str, tuple[str, datetime]]] = defaultdict(dict)
+    for review in reviews:
+        reviewed_at = ensure_utc_datetime(review.get("reviewed_at")) or now
+        reviewed_at = min(max(reviewed_at, now - REVIEW_MAX_AGE), now)
+        reviews_by_card[review["card_id"]].setdefault(review["id"], (review["result"], reviewed_at))
+    if not reviews_by_card:
+        return 0, 0
+
+    cards = await db.flashcards.find(
+        {"_id": {"$in": [ObjectId(card_id) for card_id in reviews_by_card]}, "user_id": user_id}
+    ).to_list(length=None)
+
+    card_writes = []
+    # Sets whose counters may already hold part of this batch (a retry); rebuilt from the cards
+    stale_sets: set[str] = set()
+    duplicates = 0
+    for card in cards:
+        card_reviews = reviews_by_card[str(card["_id"])]
+        seen = set(card.get("applied_review_ids") or [])
+        pending = {review_id: review for review_id, review in card_reviews.items() if review_id not in seen}
+        duplicates += len(card_reviews) - len(pending)
+        if card.get("set_id") and len(pending) < len(card_reviews):
+            stale_sets.add(card["set_id"])
+        if not pending:
+            continue
+
+        reviewed, update_doc = fold_card_reviews(card, list(pending.values()))
+        review_ids = list(pending)
+        update_doc["$push"] = {
+            "applied_review_ids": {"$each": review_ids, "$slice": -APPLIED_REVIEW_IDS_KEPT}
+        }
+        card_writes.append((card, pending, reviewed, update_doc))
+
+    if len(cards) < len(reviews_by_card):
+        logger.warning(f"Batched reviews of user {user_id}: {len(reviews_by_card) - len(cards)} unknown cards skipped")
+
+    # Cards first: once they are written a retry can no longer apply the reviews twice.
+    # The filter makes a write a no-op when a concurrent retry got there first.
+    write_results = await asyncio.gather(*(
+        db.flashcards.update_one({"_id": card["_id"], "applied_review_ids": {"$nin": list(pending)}}, update_doc)
+        for card, pending, _, update_doc in card_writes
+    ))
+
+    set_updates: dict[str, dict[str, Any]] = {}
+    results: dict[str, int] = defaultdict(int)
+    applied = 0
+    for (card, pending, reviewed, _), write_result in zip(card_writes, write_results):
+        set_id = card.get("set_id")
+        if not write_result.matched_count:
+            duplicates += len(pending)
+            if set_id:
+                stale_sets.add(set_id)
+            continue
+
+        applied += len(pending)
+        for result, _ in pending.values():
+            results[result] += 1
+        if set_id:
+            set_update = set_updates.setdefault(set_id, {"$set": {"updated_at": now}})
+            _merge_set_updates(set_update, build_set_counter_delta(card, reviewed))
+            last_studied_at = set_update["$set"].get("last_studied_at")
+            if last_studied_at is None or reviewed["last_reviewed_at"] > last_studied_at:
+                set_update["$set"]["last_studied_at"] = reviewed["last_reviewed_at"]
+
+    for set_id in stale_sets:
+        set_update = set_updates.get(set_id) or {"$set": {"updated_at": now}}
+        set_updates[set_id] = {
+            "$set": set_update["$set"],
+            "$unset": {"counters.version": ""},
+            "$inc": {"counters.rev": 1},
+        }
+
+    writes = []
+    if set_updates:
+        writes.append(db.flashcard_sets.bulk_write(
+            [UpdateOne({"_id": ObjectId(set_id), "user_id": user_id}, update) for set_id, update in set_updates.items()],
+            ordered=False,
+        ))
+    writes += [mongo_service.update_flashcard_daily_stats(user_id, result, count) for result, count in results.items()]
+    if writes:
+        await asyncio.gather(*writes)
+    return applied, duplicates
+
+
+async def record_card_change(
+    user_id: int,
+    set_id: str | None,
+    before: dict[str, Any] | None,
+    after: dict[str, Any] | None,
+    *,
+    set_fields: dict[str, Any] | None = None,
+) -> None:
+    """Apply a card's creation, review or deletion to its set's counters,
+    together with any other `set_fields` of the set"""
+    if not set_id:
+        return
+    update = build_set_counter_delta(before, after)
+    if set_fields:
+        update["$set"] = dict(set_fields)
+    if update:
+        await mongo_service.db().flashcard_sets.update_one({"_id": ObjectId(set_id), "user_id": user_id}, update)
+    await invalidate_overview(user_id)
+
+
+async def reconcile_set_counters(*, now: datetime | None = None, batch_size: int = 200) -> int:
+    """Recompute every set's counters from its cards and fix the ones that drifted.
+
+    A set whose counters change while it is being checked is left for the
+    next run. Returns the number of sets rewritten.
+    """
+    if not mongo_service.is_ready():
+        return 0
+
+    now = ensure_utc_datetime(now) or datetime.now(timezone.utc)
+    sets_collection = mongo_service.db().flashcard_sets
+    cards_collection = mongo_service.db().flashcards
+
+    async def reconcile(batch: list[dict[str, Any]]) -> int:
+        cards = await cards_collection.find(
+            {"set_id": {"$in": [str(set_doc["_id"]) for set_doc in batch]}},
+            COUNTER_CARD_FIELDS,
+        ).to_list(length=None)
+        cards_by_set = build_cards_by_set(cards)
+        rewritten = 0
+        for set_doc in batch:
+            stored = set_doc.get("counters") or {}
+            expected = build_set_counters(cards_by_set.get(str(set_doc["_id"]), []), now)
+            current = {**stored, "due_at": _fold_due_at(stored.get("due_at") or {}, now), "rev": 0}
+            current["latest_reviewed_at"] = ensure_utc_datetime(current.get("latest_reviewed_at"))
+            if current == expected:
+                continue
+            if has_current_set_counters(set_doc) and set_counters_to_stats(stored, now) != set_counters_to_stats(expected, now):
+                logger.warning(f"Flashcard set {set_doc['_id']} counters drifted; recomputed")
+            expected["rev"] = int(stored.get("rev", 0) or 0) + 1
+            result = await sets_collection.update_one(
+                {"_id": set_doc["_id"], "counters.rev": stored.get("rev")},
+                {"$set": {"counters": expected}},
+            )
+            rewritten += result.modified_count
+        return rewritten
+
+    rewritten = 0
+    batch: list[dict[str, Any]] = []
+    async for set_doc in sets_collection.find({}, {"counters": 1}):
+        batch.append(set_doc)
+        if len(batch) >= batch_size:
+            rewritten += await reconcile(batch)
+            batch = []
+    if batch:
+        rewritten += await reconcile(batch)
+    return rewritten
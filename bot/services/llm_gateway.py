@@ -0,0 +1,233 @@
+"""
+Central gateway for OpenAI chat completions.
+
+All LLM calls go through `llm_gateway.chat(...)`, which provides:
+  - one pooled AsyncOpenAI client (shared HTTP connection pool)
+  - per-model concurrency limits with priority lanes: a free slot always goes
+    to the most urgent waiter, and background work may only occupy part of
+    the slots, so scheduler bursts can't starve users waiting for feedback
+  - requests/tokens-per-minute token buckets per model
+  - per-call latency, queue wait and token metrics
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+from bot.config import settings
+from bot.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes (lower value = served first)
+PRIORITY_INTERACTIVE = 0  # Answer grading, translator: a user is waiting
+PRIORITY_BACKGROUND = 10  # Scheduler/pool sentence generation, subtitle explanations
+
+
+class _PriorityLimiter:
+    """Concurrency limiter that hands freed slots to the highest-priority waiter"""
+
+    def __init__(self, limit: int, background_limit: int):
+        self.limit = max(1, limit)
+        self.background_limit = max(1, min(background_limit, self.limit))
+        self.active = 0
+        self.background_active = 0
+        self._waiters: List[tuple] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    @staticmethod
+    def _is_background(priority: int) -> bool:
+        return priority >= PRIORITY_BACKGROUND
+
+    def _can_grant(self, priority: int) -> bool:
+        if self.active >= self.limit:
+            return False
+        return not self._is_background(priority) or self.background_active < self.background_limit
+
+    def _take(self, priority: int) -> None:
+        self.active += 1
+        if self._is_background(priority):
+            self.background_active += 1
+
+    async def acquire(self, priority: int) -> None:
+        if not self._waiters and self._can_grant(priority):
+            self._take(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before we got cancelled
+                self.release(priority)
+            raise
+
+    def release(self, priority: int) -> None:
+        self.active -= 1
+        if self._is_background(priority):
+            self.background_active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)  # Cancelled waiter
+                continue
+            if not self._can_grant(priority):
+                return
+            heapq.heappop(self._waiters)
+            self._take(priority)
+            future.set_result(None)
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+
+class _CallStats:
+    __slots__ = ("calls", "errors", "prompt_tokens", "completion_tokens",
+                 "latency_total", "latency_max", "queue_wait_total")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.queue_wait_total = 0.0
+
+    def as_dict(self) -> dict:
+        calls = max(1, self.calls)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_latency_ms": int(self.latency_total / calls * 1000),
+            "max_latency_ms": int(self.latency_max * 1000),
+            "avg_queue_ms": int(self.queue_wait_total / calls * 1000),
+        }
+
+
+class LLMGateway:
+    """Pooled, prioritized and rate-limited access to chat completions"""
+
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+        self._limiters: Dict[str, _PriorityLimiter] = {}
+        self._request_buckets: Dict[str, TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[tuple, _CallStats] = defaultdict(_CallStats)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
+
+    def _limiter(self, model: str) -> _PriorityLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limit = settings.llm_model_concurrency.get(model, settings.LLM_MAX_CONCURRENCY)
+            background = max(1, int(limit * settings.LLM_BACKGROUND_SHARE))
+            limiter = self._limiters[model] = _PriorityLimiter(limit, background)
+        return limiter
+
+    def _buckets(self, model: str) -> tuple[TokenBucket, TokenBucket]:
+        if model not in self._request_buckets:
+            self._request_buckets[model] = TokenBucket(settings.OPENAI_RPM_LIMIT, per=60)
+            self._token_buckets[model] = TokenBucket(settings.OPENAI_TPM_LIMIT, per=60)
+        return self._request_buckets[model], self._token_buckets[model]
+
+    @staticmethod
+    def _estimate_tokens(messages: List[dict], max_tokens: Optional[int]) -> int:
+        # ~4 characters per token is close enough for budgeting
+        chars = sum(len(str(m.get("content") or "")) for m in messages)
+        return chars // 4 + (max_tokens or 256)
+
+    async def chat(
+        self,
+        *,
+        model: str,
+        messages: List[dict],
+        priority: int = PRIORITY_INTERACTIVE,
+        purpose: str = "generic",
+        feature: str = "other",
+        **kwargs,
+    ):
+        """Run a chat completion through the gateway. Returns the OpenAI response.
+        `purpose` labels the metrics, `feature` the daily token usage report."""
+        limiter = self._limiter(model)
+        request_bucket, token_bucket = self._buckets(model)
+        stats = self._stats[(model, purpose)]
+        estimate = self._estimate_tokens(messages, kwargs.get("max_tokens"))
+
+        queued_at = time.monotonic()
+        await limiter.acquire(priority)
+        try:
+            await request_bucket.acquire(1)
+            await token_bucket.acquire(estimate)
+            started_at = time.monotonic()
+            stats.queue_wait_total += started_at - queued_at
+            try:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **kwargs,
+                )
+            except Exception:
+                stats.calls += 1
+                stats.errors += 1
+                token_bucket.adjust(-estimate)
+                raise
+        finally:
+            limiter.release(priority)
+
+        latency = time.monotonic() - started_at
+        stats.calls += 1
+        stats.latency_total += latency
+        stats.latency_max = max(stats.latency_max, latency)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            stats.prompt_tokens += usage.prompt_tokens or 0
+            stats.completion_tokens += usage.completion_tokens or 0
+            token_bucket.adjust((usage.total_tokens or 0) - estimate)
+            try:
+                from bot.services.token_budget_service import token_budget_service
+                await token_budget_service.record_global(feature, usage.total_tokens or 0)
+            except Exception as e:
+                logger.debug(f"Token usage recording failed: {e}")
+        logger.debug(
+            f"LLM {purpose} ({model}, p{priority}): {int(latency * 1000)} ms, "
+            f"tokens={getattr(usage, 'total_tokens', None)}"
+        )
+        return response
+
+    def metrics(self) -> dict:
+        """Snapshot of per-(model, purpose) call metrics and queue depth"""
+        return {
+            "calls": {f"{model}/{purpose}": s.as_dict() for (model, purpose), s in sorted(self._stats.items())},
+            "queues": {
+                model: {"active": l.active, "background_active": l.background_active, "waiting": l.waiting}
+                for model, l in self._limiters.items()
+            },
+        }
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Global instance
+llm_gateway = LLMGateway()
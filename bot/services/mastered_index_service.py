@@ -0,0 +1,112 @@
+"""
+Redis membership index of mastered sentences.
+
+`mastered_sentences` in MongoDB stays the source of truth. For each user we
+keep a Redis set of sentence hashes next to it so generation-time dedup and
+the mastered counter are O(1) no matter how long the user's history is:
+
+  mastered:{user_id}:hashes   - SET of md5 sentence hashes
+  mastered:{user_id}:built    - marker, present once the set mirrors Mongo
+
+The set is rebuilt lazily (streamed from Mongo) the first time it is needed
+or after it expired; `add_mastered_sentence` keeps it current afterwards.
+"""
+import logging
+from typing import Optional
+
+from bot.services import mongo_service
+from bot.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+_INDEX_TTL_SECONDS = 30 * 86400  # Idle users' indexes expire and get rebuilt on demand
+_REBUILD_LOCK_SECONDS = 60
+_REBUILD_BATCH_SIZE = 500
+
+
+class MasteredIndexService:
+    """Per-user set of mastered sentence hashes"""
+
+    @staticmethod
+    def _hashes_key(user_id: int) -> str:
+        return f"mastered:{user_id}:hashes"
+
+    @staticmethod
+    def _built_key(user_id: int) -> str:
+        return f"mastered:{user_id}:built"
+
+    @staticmethod
+    def _lock_key(user_id: int) -> str:
+        return f"mastered:{user_id}:rebuild_lock"
+
+    async def rebuild(self, user_id: int) -> bool:
+        """Stream the user's mastered hashes from Mongo into Redis.
+        Returns False if another worker is already rebuilding."""
+        redis = redis_service.redis
+        if not await redis.set(self._lock_key(user_id), "1", nx=True, ex=_REBUILD_LOCK_SECONDS):
+            return False
+
+        key = self._hashes_key(user_id)
+        try:
+            # Reset first: concurrent add() calls after this point land in the
+            # fresh set, earlier ones are already visible to the Mongo cursor.
+            await redis.delete(key)
+            batch = []
+            cursor = mongo_service.db().mastered_sentences.find(
+                {"user_id": user_id},
+                {"sentence_hash": 1, "_id": 0},
+            ).batch_size(_REBUILD_BATCH_SIZE)
+            async for doc in cursor:
+                if doc.get("sentence_hash"):
+                    batch.append(doc["sentence_hash"])
+                if len(batch) >= _REBUILD_BATCH_SIZE:
+                    await redis.sadd(key, *batch)
+                    batch = []
+            if batch:
+                await redis.sadd(key, *batch)
+
+            async with redis_service.pipeline() as pipe:
+                pipe.expire(key, _INDEX_TTL_SECONDS)
+                pipe.set(self._built_key(user_id), "1", ex=_INDEX_TTL_SECONDS)
+            return True
+        finally:
+            await redis.delete(self._lock_key(user_id))
+
+    async def _ensure_built(self, user_id: int) -> bool:
+        """True if the Redis index can answer for this user."""
+        if not redis_service.redis or not mongo_service.is_ready():
+            return False
+        try:
+            if await redis_service.redis.exists(self._built_key(user_id)):
+                return True
+            return await self.rebuild(user_id)
+        except Exception as e:
+            logger.warning(f"Mastered index unavailable for {user_id}: {e}")
+            return False
+
+    async def add(self, user_id: int, sentence_hash: str) -> None:
+        """Record a newly mastered sentence hash"""
+        if not redis_service.redis:
+            return
+        key = self._hashes_key(user_id)
+        async with redis_service.pipeline() as pipe:
+            pipe.sadd(key, sentence_hash)
+            pipe.expire(key, _INDEX_TTL_SECONDS)
+            pipe.expire(self._built_key(user_id), _INDEX_TTL_SECONDS)
+
+    async def is_mastered(self, user_id: int, sentence: str) -> bool:
+        """Check whether the user already translated this sentence with 100% quality"""
+        if await self._ensure_built(user_id):
+            sentence_hash = mongo_service._hash_sentence(sentence)
+            return bool(await redis_service.redis.sismember(self._hashes_key(user_id), sentence_hash))
+        return await mongo_service.is_sentence_mastered(user_id, sentence)
+
+    async def count(self, user_id: int, topic: Optional[str] = None) -> int:
+        """Number of mastered sentences. Per-topic counts go to the indexed Mongo query."""
+        if topic is None and await self._ensure_built(user_id):
+            return await redis_service.redis.scard(self._hashes_key(user_id))
+        return await mongo_service.get_mastered_count(user_id, topic)
+
+
+# Global instance
+mastered_index_service = MasteredIndexService()
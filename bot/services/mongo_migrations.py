@@ -0,0 +1,255 @@
+"""
+Declared MongoDB schema: indexes, TTL policies and validators per collection.
+
+`apply(db)` runs at startup. It compares the declaration with the version
+recorded in `schema_migrations` and does nothing when they match. Otherwise
+it creates the missing indexes, adjusts TTLs and validators for all
+collections concurrently, and records the new version.
+
+Bump SCHEMA_VERSION whenever the declaration changes. A change applied
+without a bump is still picked up through the declaration's fingerprint.
+Indexes that are no longer declared are left alone; drop them by hand.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 4
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+# (key pattern, index options)
+IndexSpec = Tuple[List[Tuple[str, int]], Dict[str, Any]]
+
+INDEXES: Dict[str, List[IndexSpec]] = {
+    "users": [
+        ([("telegram_id", ASCENDING)], {}),
+        ([("status", ASCENDING), ("activity_score", DESCENDING)], {}),
+        ([("username", ASCENDING)], {}),
+    ],
+    "friendships": [
+        ([("user_id", ASCENDING), ("status", ASCENDING)], {}),
+        ([("friend_id", ASCENDING), ("status", ASCENDING)], {}),
+    ],
+    "daily_stats": [
+        ([("user_id", ASCENDING), ("date", ASCENDING)], {"unique": True}),
+    ],
+    "training_sessions": [
+        ([("user_id", ASCENDING), ("created_at", ASCENDING)], {}),
+    ],
+    # Sentences translated with 100% quality
+    "mastered_sentences": [
+        ([("user_id", ASCENDING), ("sentence_hash", ASCENDING)], {"unique": True}),
+        ([("user_id", ASCENDING), ("topic", ASCENDING)], {}),
+    ],
+    # Motivation system
+    "user_streaks": [
+        ([("user_id", ASCENDING)], {"unique": True}),
+    ],
+    "saved_words": [
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ],
+    "translations": [
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ],
+    "flashcard_sets": [
+        ([("user_id", ASCENDING), ("created_at", ASCENDING)], {}),
+    ],
+    "flashcards": [
+        ([("set_id", ASCENDING), ("created_at", ASCENDING)], {}),
+        ([("user_id", ASCENDING)], {}),
+        # Due and new cards of a deck (today's session) and per-set counter builds
+        ([("user_id", ASCENDING), ("set_id", ASCENDING), ("srs_next_review", ASCENDING)], {}),
+    ],
+    # Prepared subtitle trainer videos and the words users save from them
+    "subtitle_video_sessions": [
+        ([("videoId", ASCENDING)], {"unique": True}),
+        ([("status", ASCENDING), ("publishedAt", DESCENDING)], {}),
+        ([("status", ASCENDING), ("fetchedAt", DESCENDING)], {}),
+    ],
+    "subtitle_video_catalogs": [
+        ([("channel", ASCENDING), ("lockedAt", DESCENDING)], {}),
+    ],
+    "subtitle_words": [
+        ([("user_id", ASCENDING), ("videoId", ASCENDING), ("normalizedForm", ASCENDING)], {}),
+    ],
+    # Broadcast jobs: results per recipient are only needed while a job can resume
+    "broadcasts": [
+        ([("status", ASCENDING)], {}),
+    ],
+    "broadcast_recipients": [
+        ([("broadcast_id", ASCENDING), ("telegram_id", ASCENDING)], {"unique": True}),
+        ([("updated_at", ASCENDING)], {"expireAfterSeconds": 30 * 86400}),
+    ],
+    # Pre-generated trainer sentence pool (FIFO per pool)
+    "trainer_sentence_pool": [
+        ([("pool_id", ASCENDING), ("created_at", ASCENDING)], {}),
+    ],
+}
+
+# Validators only warn (moderate level), so a stray document is logged by
+# mongod instead of failing a user's request.
+VALIDATORS: Dict[str, Dict[str, Any]] = {
+    "users": {"$jsonSchema": {
+        "bsonType": "object",
+        "required": ["telegram_id", "status"],
+        "properties": {
+            "telegram_id": {"bsonType": ["int", "long"]},
+            "status": {"enum": ["pending", "approved", "rejected"]},
+        },
+    }},
+    "friendships": {"$jsonSchema": {
+        "bsonType": "object",
+        "required": ["user_id", "friend_id", "status"],
+        "properties": {
+            "status": {"enum": ["pending", "accepted"]},
+        },
+    }},
+    "flashcards": {"$jsonSchema": {
+        "bsonType": "object",
+        "required": ["user_id", "set_id"],
+    }},
+}
+
+# Queries on the hot paths, checked by `check_hot_queries`: (name, collection, filter, sort)
+HOT_QUERIES: List[Tuple[str, str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("user by telegram_id", "users", {"telegram_id": 0}, []),
+    ("user by username", "users", {"username": ""}, []),
+    ("approved users", "users", {"status": "approved"}, []),
+    ("top users", "users", {"status": "approved"}, [("activity_score", DESCENDING)]),
+    ("outgoing friendships", "friendships", {"user_id": 0, "status": "accepted"}, []),
+    ("incoming friendships", "friendships", {"friend_id": 0, "status": "pending"}, []),
+    ("today's stats", "daily_stats", {"user_id": 0, "date": datetime(2000, 1, 1, tzinfo=timezone.utc)}, []),
+    ("training sessions of user", "training_sessions", {"user_id": 0}, []),
+    ("mastered sentence", "mastered_sentences", {"user_id": 0, "sentence_hash": ""}, []),
+    ("saved words", "saved_words", {"user_id": 0}, [("created_at", DESCENDING)]),
+    ("flashcard sets", "flashcard_sets", {"user_id": 0}, [("created_at", ASCENDING)]),
+    ("flashcards of user", "flashcards", {"user_id": 0}, []),
+    ("due cards of set", "flashcards",
+     {"user_id": 0, "set_id": "", "srs_next_review": {"$lte": datetime(2000, 1, 1, tzinfo=timezone.utc)}}, []),
+    ("new cards of set", "flashcards", {"user_id": 0, "set_id": "", "srs_next_review": None}, [("created_at", ASCENDING)]),
+    ("subtitle word", "subtitle_words", {"user_id": 0, "videoId": "", "normalizedForm": ""}, []),
+    ("broadcast recipients", "broadcast_recipients", {"broadcast_id": "", "telegram_id": {"$in": [0]}}, []),
+    ("sentence pool", "trainer_sentence_pool", {"pool_id": ""}, [("created_at", ASCENDING)]),
+]
+
+
+def fingerprint() -> str:
+    """Hash of the declaration, to notice changes made without a version bump"""
+    declared = {"indexes": INDEXES, "validators": VALIDATORS}
+    return hashlib.sha256(json.dumps(declared, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _key_of(keys) -> Tuple[Tuple[str, int], ...]:
+    return tuple((field, int(direction)) for field, direction in keys)
+
+
+async def _apply_indexes(db, name: str, specs: List[IndexSpec]) -> List[str]:
+    col = db[name]
+    existing = {_key_of(info["key"]): info for info in (await col.index_information()).values()}
+    missing: List[IndexModel] = []
+    changes: List[str] = []
+    for keys, options in specs:
+        info = existing.get(_key_of(keys))
+        if info is None:
+            missing.append(IndexModel(keys, **options))
+            continue
+        ttl = options.get("expireAfterSeconds")
+        if ttl is not None and info.get("expireAfterSeconds") not in (None, ttl):
+            await db.command("collMod", name, index={"keyPattern": dict(keys), "expireAfterSeconds": ttl})
+            changes.append(f"{name}: TTL of {dict(keys)} set to {ttl}s")
+        elif bool(info.get("unique")) != bool(options.get("unique")) or (ttl is None) != (info.get("expireAfterSeconds") is None):
+            logger.warning(f"Index {dict(keys)} on {name} differs from the declaration; drop it to recreate")
+    if missing:
+        created = await col.create_indexes(missing)
+        changes += [f"{name}: created index {index}" for index in created]
+    return changes
+
+
+async def _apply_validator(db, name: str, validator: Dict[str, Any], current: Dict[str, Any] | None) -> List[str]:
+    if current is not None and current.get("validator") == validator:
+        return []
+    try:
+        if current is None:
+            await db.create_collection(name, validator=validator, validationLevel="moderate", validationAction="warn")
+            return [f"{name}: created with validator"]
+    except CollectionInvalid:
+        pass  # Created meanwhile (e.g. by its index build)
+    await db.command("collMod", name, validator=validator, validationLevel="moderate", validationAction="warn")
+    return [f"{name}: validator updated"]
+
+
+async def apply(db) -> bool:
+    """Bring indexes and validators up to the declared schema. Returns True if anything was applied."""
+    digest = fingerprint()
+    applied = await db[MIGRATIONS_COLLECTION].find_one(
+        {"_id": SCHEMA_VERSION, "fingerprint": digest}
+    )
+    if applied:
+        return False
+
+    options = {
+        info["name"]: info.get("options", {})
+        async for info in await db.list_collections(filter={"name": {"$in": list(VALIDATORS)}})
+    }
+    results = await asyncio.gather(
+        *(_apply_indexes(db, name, specs) for name, specs in INDEXES.items()),
+        *(_apply_validator(db, name, validator, options.get(name)) for name, validator in VALIDATORS.items()),
+    )
+    changes = [change for result in results for change in result]
+
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": SCHEMA_VERSION},
+        {"$set": {
+            "fingerprint": digest,
+            "changes": changes,
+            "applied_at": datetime.now(timezone.utc),
+        }},
+        upsert=True,
+    )
+    logger.info(f"MongoDB schema version {SCHEMA_VERSION} applied ({len(changes)} changes)")
+    for change in changes:
+        logger.info(f"  {change}")
+    return True
+
+
+async def get_applied_version(db) -> dict | None:
+    """The most recently applied schema_migrations record"""
+    return await db[MIGRATIONS_COLLECTION].find_one(sort=[("_id", DESCENDING)])
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    if isinstance(plan, dict):
+        stages = [plan["stage"]] if isinstance(plan.get("stage"), str) else []
+        for value in plan.values():
+            stages += _plan_stages(value)
+        return stages
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    return []
+
+
+async def check_hot_queries(db) -> List[dict]:
+    """Explain every hot query. Each result has the winning plan's stages and
+    `collscan` set when the plan scans a whole collection."""
+    async def explain(name, collection, query, sort):
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = (await cursor.explain()).get("queryPlanner", {}).get("winningPlan", {})
+        except Exception as e:
+            return {"name": name, "collection": collection, "stages": [], "collscan": False, "error": str(e)}
+        stages = _plan_stages(plan)
+        return {"name": name, "collection": collection, "stages": stages, "collscan": "COLLSCAN" in stages}
+
+    return list(await asyncio.gather(*(explain(*query) for query in HOT_QUERIES)))
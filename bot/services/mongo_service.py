@@ -10,6 +10,9 @@ from datetime import datetime, timezone, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from bot.config import settings
+from bot.services import mongo_migrations
+from bot.services.write_buffer_service import write_buffer_service
+from bot.utils.cache import TTLLRUCache
 
 _client: Optional[AsyncIOMotorClient] = None
 _db: Optional[AsyncIOMotorDatabase] = None
@@ -25,24 +28,8 @@ async def init() -> bool:
     default_db = _client.get_default_database()
     db_name = default_db.name if default_db is not None else "sprache_motivator"
     _db = _client[db_name]
-    # Create indexes (idempotent)
-    await _db.daily_stats.create_index([("user_id", 1), ("date", 1)], unique=True)
-    await _db.training_sessions.create_index([("user_id", 1), ("created_at", 1)])
-    # Index for mastered sentences (sentences translated with 100% quality)
-    await _db.mastered_sentences.create_index([("user_id", 1), ("sentence_hash", 1)], unique=True)
-    await _db.mastered_sentences.create_index([("user_id", 1), ("topic", 1)])
-    # Index for user streaks (motivation system)
-    await _db.user_streaks.create_index([("user_id", 1)], unique=True)
-    # Index for flashcard sets
-    await _db.flashcard_sets.create_index([("user_id", 1), ("created_at", 1)])
-    # Index for flashcards
-    await _db.flashcards.create_index([("set_id", 1), ("created_at", 1)])
-    await _db.flashcards.create_index([("user_id", 1)])
-    # Indexes for prepared subtitle trainer videos
-    await _db.subtitle_video_sessions.create_index([("videoId", 1)], unique=True)
-    await _db.subtitle_video_sessions.create_index([("status", 1), ("publishedAt", -1)])
-    await _db.subtitle_video_sessions.create_index([("status", 1), ("fetchedAt", -1)])
-    await _db.subtitle_video_catalogs.create_index([("channel", 1), ("lockedAt", -1)])
+    # Indexes, TTLs and validators (skipped when the recorded schema version is current)
+    await mongo_migrations.apply(_db)
     return True
 
 
@@ -113,57 +100,51 @@ async def update_daily_stats(
         # Default expected task count for new day when user hasn't configured goals.
         set_on_insert_doc["expected_tasks"] = 0
 
-    update_doc = {
-        "$inc": inc_doc,
-        "$set": {
+    max_doc = {"expected_tasks": max(0, expected_total)} if expected_total is not None else None
+
+    await write_buffer_service.add(
+        "daily_stats",
+        {"user_id": user_id, "date": today},
+        inc=inc_doc,
+        max_=max_doc,
+        set_={
             "updated_at": now,
             "last_answer_quality": quality_value,
             "last_answer_at": now,
         },
-        "$setOnInsert": set_on_insert_doc,
-    }
-
-    if expected_total is not None:
-        update_doc.setdefault("$max", {})["expected_tasks"] = max(0, expected_total)
-
-    await db().daily_stats.update_one(
-        {"user_id": user_id, "date": today},
-        update_doc,
-        upsert=True,
+        set_on_insert=set_on_insert_doc,
     )
 
 
-async def update_flashcard_daily_stats(user_id: int, result: str) -> None:
-    """Increment today's flashcard counters for social statistics."""
+async def update_flashcard_daily_stats(user_id: int, result: str, count: int = 1) -> None:
+    """Increment today's flashcard counters for social statistics (by `count` reviews)."""
     if not is_ready():
         return
 
-    if result not in {"know", "dontknow"}:
+    if result not in {"know", "dontknow"} or count <= 0:
         return
 
     today = _today_midnight_utc()
     now = datetime.now(timezone.utc)
 
-    inc_doc = {"flashcard_reviews": 1}
+    inc_doc = {"flashcard_reviews": count}
     if result == "know":
-        inc_doc["flashcard_know"] = 1
+        inc_doc["flashcard_know"] = count
     else:
-        inc_doc["flashcard_retry"] = 1
+        inc_doc["flashcard_retry"] = count
 
-    await db().daily_stats.update_one(
+    await write_buffer_service.add(
+        "daily_stats",
         {"user_id": user_id, "date": today},
-        {
-            "$inc": inc_doc,
-            "$set": {
-                "updated_at": now,
-                "last_flashcard_review_at": now,
-            },
-            "$setOnInsert": {
-                "created_at": now,
-                "expected_tasks": 0,
-            },
+        inc=inc_doc,
+        set_={
+            "updated_at": now,
+            "last_flashcard_review_at": now,
+        },
+        set_on_insert={
+            "created_at": now,
+            "expected_tasks": 0,
         },
-        upsert=True,
     )
 
 
@@ -171,6 +152,7 @@ async def get_today_stats(user_id: int) -> Optional[dict]:
     if not is_ready():
         return None
     today = _today_midnight_utc()
+    await write_buffer_service.flush("daily_stats", {"user_id": user_id, "date": today})
     doc = await db().daily_stats.find_one({"user_id": user_id, "date": today})
     if not doc:
         return None
@@ -194,6 +176,7 @@ async def get_today_stats_bulk(user_ids: List[int]) -> Dict[int, dict]:
     if not is_ready() or not user_ids:
         return {}
     today = _today_midnight_utc()
+    await write_buffer_service.flush("daily_stats")
     cursor = db().daily_stats.find({
         "user_id": {"$in": user_ids},
         "date": today,
@@ -217,14 +200,25 @@ async def get_today_stats_bulk(user_ids: List[int]) -> Dict[int, dict]:
     return results
 
 
+def _week_start_utc() -> datetime:
+    today = datetime.now(timezone.utc)
+    week_start = today - timedelta(days=today.weekday())
+    return week_start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+
+
+def _week_totals(a: dict) -> Tuple[int, int, int]:
+    completed = int(a.get("completed", 0))
+    total = int(a.get("total", 0))
+    avg_quality = int((a.get("quality_sum", 0) / max(1, completed)))
+    return completed, total, avg_quality
+
+
 async def get_week_stats(user_id: int) -> Optional[Tuple[int, int, int]]:
     if not is_ready():
         return None
-    today = datetime.now(timezone.utc)
-    week_start = today - timedelta(days=today.weekday())
-    week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+    await write_buffer_service.flush("daily_stats", {"user_id": user_id})
     pipeline = [
-        {"$match": {"user_id": user_id, "date": {"$gte": week_start}}},
+        {"$match": {"user_id": user_id, "date": {"$gte": _week_start_utc()}}},
         {"$group": {
             "_id": None,
             "completed": {"$sum": "$completed_tasks"},
@@ -235,11 +229,27 @@ async def get_week_stats(user_id: int) -> Optional[Tuple[int, int, int]]:
     agg = await db().daily_stats.aggregate(pipeline).to_list(length=1)
     if not agg:
         return None
-    a = agg[0]
-    completed = int(a.get("completed", 0))
-    total = int(a.get("total", 0))
-    avg_quality = int((a.get("quality_sum", 0) / max(1, completed)))
-    return completed, total, avg_quality
+    return _week_totals(agg[0])
+
+
+async def get_week_stats_bulk(user_ids: List[int]) -> Dict[int, Tuple[int, int, int]]:
+    """Week-to-date (completed, total, avg_quality) for many users in one aggregation."""
+    if not is_ready() or not user_ids:
+        return {}
+    await write_buffer_service.flush("daily_stats")
+    pipeline = [
+        {"$match": {"user_id": {"$in": user_ids}, "date": {"$gte": _week_start_utc()}}},
+        {"$group": {
+            "_id": "$user_id",
+            "completed": {"$sum": "$completed_tasks"},
+            "total": {"$sum": "$total_tasks"},
+            "quality_sum": {"$sum": "$quality_sum"}
+        }}
+    ]
+    results: Dict[int, Tuple[int, int, int]] = {}
+    async for a in db().daily_stats.aggregate(pipeline):
+        results[int(a["_id"])] = _week_totals(a)
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -402,6 +412,28 @@ async def get_friends(user_id: int) -> List[int]:
     return friend_ids
 
 
+async def get_friends_bulk(user_ids: List[int]) -> Dict[int, List[int]]:
+    """Accepted friend IDs for many users in one query: {user_id: [friend_id, ...]}."""
+    if not is_ready() or not user_ids:
+        return {}
+    wanted = set(user_ids)
+    cursor = db().friendships.find({
+        "status": "accepted",
+        "$or": [
+            {"user_id": {"$in": user_ids}},
+            {"friend_id": {"$in": user_ids}},
+        ],
+    })
+    friends: Dict[int, List[int]] = {}
+    async for doc in cursor:
+        a, b = int(doc.get("user_id")), int(doc.get("friend_id"))
+        if a in wanted:
+            friends.setdefault(a, []).append(b)
+        if b in wanted:
+            friends.setdefault(b, []).append(a)
+    return friends
+
+
 async def get_friends_stats(user_id: int) -> Dict[int, dict]:
     """Get today's stats for all friends of a user."""
     if not is_ready():
@@ -451,11 +483,18 @@ async def add_mastered_sentence(
             "difficulty": difficulty,
             "mastered_at": now,
         })
-        return True
     except Exception:
         # Duplicate key error means already mastered
         return False
 
+    # Keep the Redis membership index in sync (lazy import avoids a cycle)
+    try:
+        from bot.services.mastered_index_service import mastered_index_service
+        await mastered_index_service.add(user_id, sentence_hash)
+    except Exception:
+        pass
+    return True
+
 
 async def is_sentence_mastered(user_id: int, sentence: str) -> bool:
     """Check if user has already mastered this sentence (100% quality)."""
@@ -499,10 +538,26 @@ async def get_mastered_count(user_id: int, topic: Optional[str] = None) -> int:
     return await db().mastered_sentences.count_documents(query)
 
 
+async def get_mastered_counts_bulk(user_ids: List[int]) -> Dict[int, int]:
+    """Mastered sentence counts for many users in one $group aggregation."""
+    if not is_ready() or not user_ids:
+        return {}
+    pipeline = [
+        {"$match": {"user_id": {"$in": user_ids}}},
+        {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+    ]
+    return {int(a["_id"]): int(a["count"]) async for a in db().mastered_sentences.aggregate(pipeline)}
+
+
 # ---------------------------------------------------------------------------
 # Streak Management (Motivation System)
 # ---------------------------------------------------------------------------
 
+# user_id -> (day, streak) for users whose streak was already counted that day,
+# so further answers on the same day skip the read
+_streak_counted = TTLLRUCache(max_size=50000, ttl_seconds=86400)
+
+
 async def update_streak(user_id: int) -> Tuple[int, bool, Optional[int]]:
     """
     Update user's learning streak when they complete at least one task.
@@ -516,6 +571,10 @@ async def update_streak(user_id: int) -> Tuple[int, bool, Optional[int]]:
     today = now.replace(hour=0, minute=0, second=0, microsecond=0)
     yesterday = today - timedelta(days=1)
     
+    counted = _streak_counted.get(user_id)
+    if counted and counted[0] == today:
+        return counted[1], False, None
+    
     # Get current streak data
     streak_doc = await db().user_streaks.find_one({"user_id": user_id})
     
@@ -531,6 +590,7 @@ async def update_streak(user_id: int) -> Tuple[int, bool, Optional[int]]:
             "milestones_achieved": [],
             "created_at": now,
         })
+        _streak_counted.set(user_id, (today, 1))
         return 1, False, None
     
     last_activity = streak_doc.get("last_activity_date")
@@ -542,6 +602,7 @@ async def update_streak(user_id: int) -> Tuple[int, bool, Optional[int]]:
     
     # Already updated today
     if last_activity and last_activity >= today:
+        _streak_counted.set(user_id, (today, current_streak))
         return current_streak, False, None
     
     # Check if streak continues or breaks
@@ -575,16 +636,12 @@ async def update_streak(user_id: int) -> Tuple[int, bool, Optional[int]]:
             }
         }
     )
+    _streak_counted.set(user_id, (today, new_streak))
     
     return new_streak, is_new_milestone, new_milestone
 
 
-async def get_streak(user_id: int) -> Dict:
-    """Get user's streak information."""
-    if not is_ready():
-        return {"current": 0, "longest": 0, "milestones": []}
-    
-    streak_doc = await db().user_streaks.find_one({"user_id": user_id})
+def _streak_from_doc(streak_doc: Optional[dict]) -> Dict:
     if not streak_doc:
         return {"current": 0, "longest": 0, "milestones": []}
     
@@ -610,6 +667,26 @@ async def get_streak(user_id: int) -> Dict:
     }
 
 
+async def get_streak(user_id: int) -> Dict:
+    """Get user's streak information."""
+    if not is_ready():
+        return _streak_from_doc(None)
+    
+    streak_doc = await db().user_streaks.find_one({"user_id": user_id})
+    return _streak_from_doc(streak_doc)
+
+
+async def get_streaks_bulk(user_ids: List[int]) -> Dict[int, Dict]:
+    """Streak information for many users in one query. Users without a streak
+    document get the same empty streak as `get_streak`."""
+    if not is_ready() or not user_ids:
+        return {}
+    docs = {}
+    async for doc in db().user_streaks.find({"user_id": {"$in": user_ids}}):
+        docs[int(doc["user_id"])] = doc
+    return {user_id: _streak_from_doc(docs.get(user_id)) for user_id in user_ids}
+
+
 async def check_comeback_needed(user_id: int) -> bool:
     """Check if user hasn't practiced for 2+ days (comeback message needed)."""
     if not is_ready():
@@ -0,0 +1,226 @@
+"""
+Outbound Telegram message queue.
+
+Bulk senders (scheduled trainer tasks, daily/weekly reports, flashcards
+reminders, broadcasts) enqueue their sends here instead of calling the Bot
+API directly. A bounded pool of workers drains a priority queue under
+  - a global token bucket (Telegram allows ~30 messages/s per bot)
+  - a minimum interval between messages to the same chat
+  - flood control: a RetryAfter pauses every worker for `retry_after`
+    seconds and the message is retried
+
+Replies sent straight from handlers don't queue. A request middleware
+charges them to the same global bucket (and honours their RetryAfter), so
+queued bulk traffic slows down to leave room for users talking to the bot.
+"""
+import asyncio
+import contextvars
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot.config import settings
+from bot.utils.cache import TTLLRUCache
+from bot.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower value = sent first)
+PRIORITY_INTERACTIVE = 0  # A user is waiting for this message
+PRIORITY_SCHEDULED = 5  # Scheduled trainer tasks
+PRIORITY_BULK = 10  # Reports, reminders, broadcasts
+
+_PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_SCHEDULED: "scheduled",
+    PRIORITY_BULK: "bulk",
+}
+
+# Set while a queue worker performs a request, so the middleware doesn't charge it twice
+_from_queue: contextvars.ContextVar[bool] = contextvars.ContextVar("outbound_from_queue", default=False)
+
+
+class _Job:
+    __slots__ = ("priority", "chat_id", "call", "future", "enqueued_at", "attempts")
+
+    def __init__(self, priority: int, chat_id: int, call: Callable[[Bot], Awaitable[Any]]):
+        self.priority = priority
+        self.chat_id = chat_id
+        self.call = call
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class _ChargeDirectSends(BaseRequestMiddleware):
+    """Counts handler replies against the queue's global rate"""
+
+    def __init__(self, service: "OutboundService"):
+        self.service = service
+
+    async def __call__(self, make_request, bot, method):
+        if not _from_queue.get() and getattr(method, "chat_id", None) is not None:
+            self.service._global.adjust(1)
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            self.service._pause(e.retry_after)
+            raise
+
+
+class OutboundService:
+    """Prioritized, rate-limited queue for messages the bot sends on its own"""
+
+    def __init__(self):
+        self.bot: Optional[Bot] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._global = TokenBucket(settings.OUTBOUND_GLOBAL_RATE)
+        # Earliest time the next message may go to a chat
+        self._chat_next_at = TTLLRUCache(max_size=50000, ttl_seconds=max(1.0, settings.OUTBOUND_PER_CHAT_INTERVAL))
+        self._paused_until = 0.0
+        self._queued: Dict[int, int] = {p: 0 for p in _PRIORITY_NAMES}
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def start(self, bot: Bot):
+        """Attach to the bot and start the worker pool"""
+        if self._workers:
+            return
+        self.bot = bot
+        self._queue = asyncio.PriorityQueue()
+        bot.session.middleware(_ChargeDirectSends(self))
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"outbound-{i}")
+            for i in range(max(1, settings.OUTBOUND_WORKERS))
+        ]
+        logger.info(f"Outbound queue started with {len(self._workers)} workers")
+
+    async def stop(self):
+        """Stop the workers; messages still queued are dropped"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, job = self._queue.get_nowait()
+                job.future.cancel()
+
+    def submit(self, chat_id: int, call: Callable[[Bot], Awaitable[Any]],
+               priority: int = PRIORITY_BULK) -> asyncio.Future:
+        """Queue `call(bot)` for `chat_id`. The returned future resolves to its result."""
+        if self._queue is None:
+            raise RuntimeError("Outbound queue is not started")
+        job = _Job(priority, chat_id, call)
+        self._queued[priority] = self._queued.get(priority, 0) + 1
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return job.future
+
+    def submit_message(self, chat_id: int, text: str, *, priority: int = PRIORITY_BULK, **kwargs) -> asyncio.Future:
+        """Queue a text message without waiting for it"""
+        return self.submit(chat_id, lambda bot: bot.send_message(chat_id, text, **kwargs), priority)
+
+    async def send_message(self, chat_id: int, text: str, *, priority: int = PRIORITY_BULK, **kwargs):
+        """Queue a text message and wait until it has been sent"""
+        return await self.submit_message(chat_id, text, priority=priority, **kwargs)
+
+    def _pause(self, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            logger.warning(f"Telegram flood control: pausing outbound queue for {seconds}s")
+
+    async def _wait_turn(self, chat_id: int) -> None:
+        interval = settings.OUTBOUND_PER_CHAT_INTERVAL
+        while True:
+            now = time.monotonic()
+            delay = max(self._paused_until - now, self._chat_next_at.get(chat_id, 0.0) - now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if not self._global.try_acquire():
+                await asyncio.sleep(max(self._global.delay_for(), 0.01))
+                continue
+            if interval > 0:
+                self._chat_next_at.set(chat_id, now + interval)
+            return
+
+    async def _worker(self):
+        while True:
+            priority, _, job = await self._queue.get()
+            self._queued[priority] -= 1
+            try:
+                if not job.future.done():  # Skip sends the caller gave up on
+                    await self._deliver(job)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Outbound worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, job: _Job) -> None:
+        while True:
+            await self._wait_turn(job.chat_id)
+            token = _from_queue.set(True)
+            try:
+                result = await job.call(self.bot)
+            except TelegramRetryAfter as e:
+                self._pause(e.retry_after)
+                job.attempts += 1
+                if job.attempts <= settings.OUTBOUND_MAX_RETRIES:
+                    self.retried += 1
+                    continue
+                self._finish(job, error=e)
+                return
+            except Exception as e:
+                self._finish(job, error=e)
+                return
+            finally:
+                _from_queue.reset(token)
+            self._finish(job, result=result)
+            return
+
+    def _finish(self, job: _Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        latency = time.monotonic() - job.enqueued_at
+        self._latency_total += latency
+        self._latency_max = max(self._latency_max, latency)
+        if error is None:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        else:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(error)
+                # Bulk callers often fire and forget; don't warn about unretrieved errors
+                job.future.exception()
+
+    def metrics(self) -> dict:
+        """Queue depth per priority class, delivery counters and latency"""
+        done = max(1, self.sent + self.failed)
+        return {
+            "queued": {_PRIORITY_NAMES.get(p, str(p)): n for p, n in sorted(self._queued.items())},
+            "workers": len(self._workers),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "avg_latency_ms": int(self._latency_total / done * 1000),
+            "max_latency_ms": int(self._latency_max * 1000),
+            "paused_for_s": max(0, int(self._paused_until - time.monotonic())),
+        }
+
+
+# Global instance
+outbound_service = OutboundService()
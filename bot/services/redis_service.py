@@ -1,13 +1,42 @@
 import redis.asyncio as redis
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 import json
 import hashlib
+import logging
 from bot.config import settings
+from bot.utils.cache import TTLLRUCache, normalize_text
+from bot.utils.codec import CodecError, decode_value, encode_value
+
+logger = logging.getLogger(__name__)
+
+
+class RedisBatch:
+    """Pipeline handle yielded by `RedisService.pipeline()`. Commands are
+    queued on it like on a client; `results` is filled when the block exits."""
+
+    def __init__(self, pipe):
+        self._pipe = pipe
+        self.results: List[Any] = []
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
 
 
 class RedisService:
+    # Source languages that may label the same EN/DE text: the translator uses
+    # "auto" for Latin-script input, the trainer uses explicit codes.
+    _AUTO_SOURCE_EQUIVALENTS = ("auto", "en", "de")
+
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
+        # Same server without response decoding, for values stored with the binary codec
+        self.binary: Optional[redis.Redis] = None
+        # In-process L1 in front of the Redis translation cache
+        self.translation_l1 = TTLLRUCache(
+            settings.TRANSLATION_L1_MAX_SIZE,
+            settings.TRANSLATION_L1_TTL_SECONDS,
+        )
     
     async def connect(self):
         """Connect to Redis"""
@@ -16,43 +45,54 @@ class RedisService:
             encoding="utf-8",
             decode_responses=True
         )
+        self.binary = await redis.from_url(settings.redis_url)
     
     async def disconnect(self):
         """Disconnect from Redis"""
         if self.redis:
             await self.redis.close()
+        if self.binary:
+            await self.binary.close()
     
     def _generate_cache_key(self, source_text: str, source_lang: str, target_lang: str) -> str:
         """Generate a hash-based cache key to handle long texts"""
-        # Create a full hash of the source text for consistent, unique keys
+        # Create a full hash of the normalized source text for consistent, unique keys
         # Using full SHA256 hash (64 chars) to prevent collisions
-        text_hash = hashlib.sha256(source_text.encode('utf-8')).hexdigest()
+        text_hash = hashlib.sha256(normalize_text(source_text).encode('utf-8')).hexdigest()
         return f"translation:{source_lang}:{target_lang}:{text_hash}"
     
+    def _candidate_cache_keys(self, source_text: str, source_lang: str, target_lang: str) -> List[str]:
+        """Keys that may hold a translation for this text, preferred first:
+        the requested source, its auto/en/de equivalents, then the legacy raw-text key."""
+        sources = [source_lang]
+        if source_lang in self._AUTO_SOURCE_EQUIVALENTS:
+            sources += [s for s in self._AUTO_SOURCE_EQUIVALENTS if s != source_lang]
+        keys = [self._generate_cache_key(source_text, s, target_lang) for s in sources]
+        legacy_hash = hashlib.sha256(source_text.encode('utf-8')).hexdigest()
+        legacy_key = f"translation:{source_lang}:{target_lang}:{legacy_hash}"
+        if legacy_key not in keys:
+            keys.append(legacy_key)
+        return keys
+    
     async def get_cached_translation(self, source_text: str, source_lang: str, target_lang: str) -> Optional[str]:
-        """Get cached translation"""
-        key = self._generate_cache_key(source_text, source_lang, target_lang)
-        return await self.redis.get(key)
+        """Get cached translation (process L1 first, then one Redis MGET over equivalent keys)"""
+        keys = self._candidate_cache_keys(source_text, source_lang, target_lang)
+        cached = self.translation_l1.get(keys[0])
+        if cached is not None:
+            return cached
+        
+        for value in await self.redis.mget(keys):
+            if value is not None:
+                self.translation_l1.set(keys[0], value)
+                return value
+        return None
     
     async def cache_translation(self, source_text: str, source_lang: str, target_lang: str, translation: str):
         """Cache translation"""
         key = self._generate_cache_key(source_text, source_lang, target_lang)
+        self.translation_l1.set(key, translation)
         await self.redis.setex(key, settings.CACHE_TTL_SECONDS, translation)
     
-    async def get_user_tokens_today(self, user_id: int) -> int:
-        """Get user's token usage for today"""
-        key = f"tokens:user:{user_id}"
-        tokens = await self.redis.get(key)
-        return int(tokens) if tokens else 0
-    
-    async def increment_user_tokens(self, user_id: int, tokens: int) -> int:
-        """Increment user's token usage"""
-        key = f"tokens:user:{user_id}"
-        new_total = await self.redis.incrby(key, tokens)
-        # Set expiry to end of day (simplified: 24 hours)
-        await self.redis.expire(key, 86400)
-        return new_total
-    
     async def set_user_state(self, user_id: int, state: str, data: dict = None):
         """Set user state for conversations"""
         import time
@@ -86,9 +126,95 @@ class RedisService:
         else:
             await self.redis.set(key, value)
     
-    async def delete(self, key: str):
-        """Delete a key"""
-        await self.redis.delete(key)
+    async def delete(self, *keys: str):
+        """Delete one or more keys"""
+        if keys:
+            await self.redis.delete(*keys)
+    
+    # ------------------------------------------------------------------
+    # Batch primitives: one round trip for several keys or commands
+    # ------------------------------------------------------------------
+    
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[RedisBatch]:
+        """Queue commands and send them in one round trip when the block exits
+        (wrapped in MULTI/EXEC if `transaction`). Nothing is sent if the block raises."""
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            batch = RedisBatch(pipe)
+            yield batch
+            batch.results = await pipe.execute()
+    
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Values for several keys (None for missing ones), in order"""
+        if not keys:
+            return []
+        return await self.redis.mget(keys)
+    
+    async def mset(self, mapping: Dict[str, Any], ex: int = None, ttls: Dict[str, int] = None):
+        """Set several keys in one round trip. `ex` applies to every key unless
+        `ttls` gives a key its own expiry."""
+        if not mapping:
+            return
+        ttls = ttls or {}
+        if not ex and not ttls:
+            await self.redis.mset(mapping)
+            return
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ttls.get(key, ex) or None)
+    
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        return await self.redis.hget(key, field)
+    
+    async def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        return await self.redis.hmget(key, fields)
+    
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return await self.redis.hgetall(key)
+    
+    async def hset(self, key: str, mapping: Dict[str, Any], ex: int = None):
+        """Set hash fields, optionally (re)setting the key's expiry in the same round trip"""
+        if not mapping:
+            return
+        async with self.pipeline() as pipe:
+            pipe.hset(key, mapping=mapping)
+            if ex:
+                pipe.expire(key, ex)
+    
+    async def hincrby(self, key: str, field: str, amount: int = 1, ex: int = None) -> int:
+        """Increment a hash field, optionally setting the key's expiry. Returns the new value."""
+        async with self.pipeline() as pipe:
+            pipe.hincrby(key, field, amount)
+            if ex:
+                pipe.expire(key, ex)
+        return int(pipe.results[0])
+    
+    # ------------------------------------------------------------------
+    # Packed values: large structures in the compact binary codec
+    # (bot.utils.codec); legacy JSON strings are still readable
+    # ------------------------------------------------------------------
+    
+    async def get_packed(self, key: str) -> Any:
+        """Decoded value of a key written by `set_packed` (or legacy JSON), None if missing"""
+        return decode_value(await self.binary.get(key))
+    
+    async def set_packed(self, key: str, value: Any, ex: int = None):
+        """Store a JSON-compatible value in the binary codec"""
+        raw = encode_value(value, settings.REDIS_COMPRESS_MIN_BYTES)
+        await self.binary.set(key, raw, ex=ex or None)
+    
+    async def mget_packed(self, keys: List[str]) -> List[Any]:
+        """Decoded values for several keys, in order. Missing or unreadable ones are None."""
+        if not keys:
+            return []
+        values = []
+        for key, raw in zip(keys, await self.binary.mget(keys)):
+            try:
+                values.append(decode_value(raw))
+            except (CodecError, ValueError) as e:
+                logger.warning(f"Unreadable cached value at {key}: {e}")
+                values.append(None)
+        return values
 
 
 redis_service = RedisService()
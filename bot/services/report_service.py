@@ -0,0 +1,72 @@
+"""
+Bulk data loading for the daily and weekly reports.
+
+Instead of several queries per recipient (and more per friend), everything a
+report run needs is fetched up front with a handful of `$in` queries and
+`$group` aggregations; the scheduler then renders each message from memory.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from bot.services import mongo_service
+from bot.services.database_service import UserService, UserModel
+
+logger = logging.getLogger(__name__)
+
+
+class DailyReportData:
+    """Everything needed to render the daily reports of one run"""
+
+    def __init__(self):
+        self.today_stats: Dict[int, dict] = {}
+        self.streaks: Dict[int, dict] = {}
+        self.mastered_counts: Dict[int, int] = {}
+        self.friends: Dict[int, List[int]] = {}
+        self.profiles: Dict[int, UserModel] = {}
+
+    def streak(self, user_id: int) -> dict:
+        return self.streaks.get(user_id) or {"current": 0, "longest": 0, "milestones": []}
+
+    def friends_stats(self, user_id: int) -> Dict[int, dict]:
+        """Today's stats of the user's friends who have any (as get_friends_stats)"""
+        return {
+            friend_id: self.today_stats[friend_id]
+            for friend_id in self.friends.get(user_id, [])
+            if friend_id in self.today_stats
+        }
+
+
+class ReportService:
+    """Prefetches report data for many users at once"""
+
+    async def load_daily(self, session, users: List[UserModel]) -> DailyReportData:
+        data = DailyReportData()
+        user_ids = [user.telegram_id for user in users]
+        if not user_ids:
+            return data
+
+        data.friends = await mongo_service.get_friends_bulk(user_ids)
+        friend_ids = {fid for fids in data.friends.values() for fid in fids}
+        everyone = list(set(user_ids) | friend_ids)
+
+        data.today_stats = await mongo_service.get_today_stats_bulk(everyone)
+        data.streaks = await mongo_service.get_streaks_bulk(everyone)
+        data.mastered_counts = await mongo_service.get_mastered_counts_bulk(user_ids)
+
+        data.profiles = {user.telegram_id: user for user in users}
+        missing = [fid for fid in friend_ids if fid not in data.profiles]
+        if missing:
+            data.profiles.update(await UserService.get_users_by_ids(session, missing))
+
+        logger.info(
+            f"Daily report data loaded: {len(user_ids)} users, {len(friend_ids)} friends"
+        )
+        return data
+
+    async def load_weekly(self, users: List[UserModel]) -> Dict[int, Tuple[int, int, int]]:
+        """{telegram_id: (completed, total, avg_quality)} for the current week"""
+        return await mongo_service.get_week_stats_bulk([user.telegram_id for user in users])
+
+
+# Global instance
+report_service = ReportService()
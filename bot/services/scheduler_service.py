@@ -1,20 +1,34 @@
 """
 Scheduler service for managing individual user training schedules
+
+Trainer tasks and flashcards reminders are driven by Redis sorted sets
+(member = telegram_id, score = unix time the user is next due):
+
+  trainer:schedule              next trainer task per user
+  flashcards:reminder_schedule  next flashcards reminder slot per user
+
+A one-minute tick pops only the entries that are due, so its cost follows
+the number of due users rather than the size of the user base. The sets
+are rebuilt from MongoDB at startup and once a day, and trainer settings
+handlers reschedule a user right after a change.
 """
 import asyncio
 import random
+import time as time_module
 from datetime import datetime, time, timedelta, timezone
-from typing import List
+from typing import List, Optional
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from aiogram import Bot
 
-from bot.models.database import async_session_maker
+from bot.models.database import async_session_maker, UserStatus
 from bot.services.database_service import UserService
 from bot.handlers import trainer
 from bot.services import mongo_service
+from bot.services.report_service import report_service, DailyReportData
+from bot.services.outbound_service import outbound_service, PRIORITY_BULK
 from bot.config import settings
 from bot.utils.keyboards import get_flashcards_menu_keyboard
 import bot.services.flashcards_service as flashcards_service
@@ -25,6 +39,77 @@ logger = logging.getLogger(__name__)
 FLASHCARDS_REMINDER_HOURS = (12, 18)
 FLASHCARDS_REMINDER_MINUTE_WINDOW = 10
 
+TRAINER_SCHEDULE_KEY = "trainer:schedule"
+FLASHCARDS_REMINDER_SCHEDULE_KEY = "flashcards:reminder_schedule"
+DUE_BATCH_SIZE = 200
+# A claimed member's score moves this far ahead until it is rescheduled, so a
+# batch lost to an error or a restart comes due again instead of vanishing
+DUE_LEASE_SECONDS = 600
+# Retry delay for a user whose due task could not be sent
+TASK_RETRY_SECONDS = 300
+TRAINER_DAY_TTL_SECONDS = 2 * 86400
+
+# Lease up to ARGV[2] members of a schedule due by ARGV[1] by moving their
+# score to ARGV[3]. KEYS[1] schedule zset. Returns the leased members.
+_LEASE_DUE_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(members) do
+    redis.call('ZADD', KEYS[1], ARGV[3], member)
+end
+return members
+"""
+
+# Claim the next trainer task slot of the day, or explain why not.
+# KEYS[1] trainer_day hash, KEYS[2..3] the day's legacy tasks_today /
+# last_task_time strings (read while the hash doesn't exist yet); ARGV: now_min,
+# start_min, end_min, daily_limit, min_interval_min, now_hhmm, ttl.
+# Returns {slot, previous_last_time} where slot < 0 means: -1 outside window,
+# -2 limit reached, -3 too early.
+_CLAIM_TASK_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+if now < tonumber(ARGV[2]) or now > tonumber(ARGV[3]) then
+    return {-1, ''}
+end
+local sent, last
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    sent = tonumber(redis.call('HGET', KEYS[1], 'sent') or '0')
+    last = redis.call('HGET', KEYS[1], 'last_time')
+else
+    sent = tonumber(redis.call('GET', KEYS[2]) or '0')
+    last = redis.call('GET', KEYS[3])
+end
+if sent >= tonumber(ARGV[4]) then
+    return {-2, ''}
+end
+if last then
+    local h, m = string.match(last, '(%d+):(%d+)')
+    if now - (tonumber(h) * 60 + tonumber(m)) < tonumber(ARGV[5]) then
+        return {-3, last}
+    end
+end
+redis.call('HSET', KEYS[1], 'sent', sent + 1, 'last_time', ARGV[6])
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+return {sent + 1, last or ''}
+"""
+
+# Give a claimed slot back if the task could not be delivered.
+# KEYS[1] trainer_day hash; ARGV: stamped last_time, previous last_time ('' = none)
+_RELEASE_TASK_SLOT_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'last_time') ~= ARGV[1] then
+    return 0
+end
+local sent = tonumber(redis.call('HGET', KEYS[1], 'sent') or '0')
+if sent > 0 then
+    redis.call('HSET', KEYS[1], 'sent', sent - 1)
+end
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[1], 'last_time')
+else
+    redis.call('HSET', KEYS[1], 'last_time', ARGV[2])
+end
+return 1
+"""
+
 
 class SchedulerService:
     """Service for managing training schedules"""
@@ -32,6 +117,9 @@ class SchedulerService:
     def __init__(self):
         self.scheduler = AsyncIOScheduler(timezone='Europe/Kiev')
         self.bot = None
+        self._claim_script = None
+        self._release_script = None
+        self._lease_script = None
     
     def set_bot(self, bot: Bot):
         """Set bot instance"""
@@ -39,11 +127,29 @@ class SchedulerService:
     
     async def start(self):
         """Start scheduler"""
-        # Check every 5 minutes on aligned clock boundaries.
+        # Pop due users every minute on aligned clock boundaries.
         self.scheduler.add_job(
-            self._check_and_send_tasks,
-            CronTrigger(minute='*/5', timezone='Europe/Kiev'),
+            self._dispatch_due,
+            CronTrigger(minute='*', timezone='Europe/Kiev'),
             id='check_tasks',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Reconcile the schedules with MongoDB once a day
+        self.scheduler.add_job(
+            self.rebuild_schedules,
+            CronTrigger(hour=4, minute=30, timezone='Europe/Kiev'),
+            id='rebuild_schedules',
+            replace_existing=True
+        )
+        
+        # Recompute flashcard set counters that drifted, after the schedule rebuild
+        self.scheduler.add_job(
+            self._reconcile_flashcard_counters,
+            CronTrigger(hour=4, minute=45, timezone='Europe/Kiev'),
+            id='reconcile_flashcard_counters',
             replace_existing=True
         )
         
@@ -63,78 +169,176 @@ class SchedulerService:
             replace_existing=True
         )
         
+        try:
+            await self.rebuild_schedules()
+        except Exception as e:
+            logger.error(f"Failed to build user schedules: {e}")
+        
         self.scheduler.start()
         logger.info("Scheduler started with individual user scheduling")
     
-    async def _check_and_send_tasks(self):
-        """Check which users need tasks now and send them"""
-        if not self.bot:
-            return
+    async def rebuild_schedules(self):
+        """Recompute every approved user's next trainer task and reminder slot"""
+        from bot.services.redis_service import redis_service
         
         async with async_session_maker() as session:
             users = await UserService.get_approved_users(session)
-            now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
-            kyiv_time = now_kyiv.time()
-            kyiv_date = now_kyiv.date()
-            
-            for user in users:
-                try:
-                    if user.daily_trainer_enabled and await self._should_send_task(user, kyiv_time, kyiv_date):
-                        await trainer.send_training_task(self.bot, user.telegram_id)
-                        await asyncio.sleep(0.1)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Failed to send task to user {user.telegram_id}: {e}")
-                try:
-                    await self._maybe_send_flashcards_reminder(session, user)
-                except Exception as e:
-                    logger.error(f"Failed to send flashcards reminder to user {user.telegram_id}: {e}")
-    
-    async def _should_send_task(self, user, current_time: time, current_date) -> bool:
-        """
-        Determine if user should receive a task now based on their settings
-        Returns True if task should be sent
-        """
-        # Parse user's time window
-        start_time = time.fromisoformat(user.trainer_start_time or "09:00")
-        end_time = time.fromisoformat(user.trainer_end_time or "21:00")
         
-        # Check if current time is within user's window
-        if not (start_time <= current_time <= end_time):
-            return False
-        
-        # Get user's task count for today from Redis
+        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
+        trainer_users = [u for u in users if u.daily_trainer_enabled]
+        counters = await self._get_task_counters([u.id for u in trainer_users], now_kyiv.date())
+        
+        trainer_due = {}
+        for user in trainer_users:
+            tasks_sent, last_task_time_str = counters[user.id]
+            next_dt = self._compute_next_task_time(user, now_kyiv, tasks_sent, last_task_time_str)
+            trainer_due[str(user.telegram_id)] = next_dt.timestamp()
+        
+        reminder_due = {}
+        for user in users:
+            next_dt = self._next_reminder_due(user)
+            if next_dt is not None:
+                reminder_due[str(user.telegram_id)] = next_dt.timestamp()
+        
+        async with redis_service.pipeline(transaction=True) as pipe:
+            pipe.delete(TRAINER_SCHEDULE_KEY, FLASHCARDS_REMINDER_SCHEDULE_KEY)
+            if trainer_due:
+                pipe.zadd(TRAINER_SCHEDULE_KEY, trainer_due)
+            if reminder_due:
+                pipe.zadd(FLASHCARDS_REMINDER_SCHEDULE_KEY, reminder_due)
+        logger.info(f"Schedules rebuilt: {len(trainer_due)} trainer users, {len(reminder_due)} reminder users")
+    
+    async def reschedule_user(self, user):
+        """Update a user's schedule entries after their settings changed"""
         from bot.services.redis_service import redis_service
-        tasks_today_key = f"tasks_today:{user.id}:{current_date}"
-        tasks_sent = await redis_service.get(tasks_today_key)
-        tasks_sent = int(tasks_sent) if tasks_sent else 0
         
-        messages_per_day = user.trainer_messages_per_day or 3
+        member = str(user.telegram_id)
+        if user.status == UserStatus.APPROVED and user.daily_trainer_enabled:
+            next_dt = await self._next_task_due(user)
+            await redis_service.redis.zadd(TRAINER_SCHEDULE_KEY, {member: next_dt.timestamp()})
+        else:
+            await redis_service.redis.zrem(TRAINER_SCHEDULE_KEY, member)
         
-        if tasks_sent >= messages_per_day:
-            return False  # Already sent all tasks for today
+        next_reminder = self._next_reminder_due(user)
+        if next_reminder is not None:
+            await redis_service.redis.zadd(FLASHCARDS_REMINDER_SCHEDULE_KEY, {member: next_reminder.timestamp()})
+        else:
+            await redis_service.redis.zrem(FLASHCARDS_REMINDER_SCHEDULE_KEY, member)
+    
+    async def _lease_due(self, key: str, now_ts: float) -> List[int]:
+        """Claim up to DUE_BATCH_SIZE due members of a schedule for DUE_LEASE_SECONDS.
+        The script runs atomically, so two replicas never process the same user.
+        Handlers reschedule (or remove) every member they finish."""
+        from bot.services.redis_service import redis_service
         
-        # Get last task time
-        last_task_time_key = f"last_task_time:{user.id}:{current_date}"
-        last_task_time_str = await redis_service.get(last_task_time_key)
+        if self._lease_script is None:
+            self._lease_script = redis_service.redis.register_script(_LEASE_DUE_SCRIPT)
+        members = await self._lease_script(keys=[key], args=[now_ts, DUE_BATCH_SIZE, now_ts + DUE_LEASE_SECONDS])
+        return [int(member) for member in members]
+    
+    async def _dispatch_due(self):
+        """Send trainer tasks and flashcards reminders to users that are due"""
+        if not self.bot:
+            return
         
-        # Calculate minimum interval between tasks
-        window_minutes = self._time_diff_minutes(start_time, end_time)
-        min_interval_minutes = window_minutes // messages_per_day
+        try:
+            await self._dispatch_trainer_tasks()
+        except Exception as e:
+            logger.error(f"Trainer task dispatch failed: {e}")
+        try:
+            await self._dispatch_flashcards_reminders()
+        except Exception as e:
+            logger.error(f"Flashcards reminder dispatch failed: {e}")
+    
+    async def _dispatch_trainer_tasks(self):
+        while True:
+            now_ts = time_module.time()
+            due_ids = await self._lease_due(TRAINER_SCHEDULE_KEY, now_ts)
+            if not due_ids:
+                return
+            
+            async with async_session_maker() as session:
+                users = await UserService.get_users_by_ids(session, due_ids)
+            
+            # Sends are paced by the outbound queue, so a batch runs concurrently
+            await asyncio.gather(*(
+                self._handle_due_trainer_user(telegram_id, users.get(telegram_id), now_ts)
+                for telegram_id in due_ids
+            ))
+            
+            if len(due_ids) < DUE_BATCH_SIZE:
+                return
+    
+    async def _drop_from_schedule(self, key: str, telegram_id: int):
+        from bot.services.redis_service import redis_service
         
-        # If this is the first task or enough time has passed
-        if not last_task_time_str:
-            # First task: can send it (counter will be updated after successful send)
-            return True
+        try:
+            await redis_service.redis.zrem(key, str(telegram_id))
+        except Exception as e:
+            logger.error(f"Failed to drop {telegram_id} from {key}: {e}")
+    
+    async def _handle_due_trainer_user(self, telegram_id: int, user, now_ts: float):
+        from bot.services.redis_service import redis_service
         
-        # Check if enough time has passed since last task
-        last_task_time = time.fromisoformat(last_task_time_str)
-        minutes_since_last = self._time_diff_minutes(last_task_time, current_time)
+        # Users that left the trainer drop out of the schedule
+        if not user or user.status != UserStatus.APPROVED or not user.daily_trainer_enabled:
+            await self._drop_from_schedule(TRAINER_SCHEDULE_KEY, telegram_id)
+            return
+        try:
+            # Claims today's next slot atomically; does nothing if none is free
+            await trainer.send_training_task(self.bot, user.telegram_id, user=user)
+        except Exception as e:
+            logger.error(f"Failed to send task to user {user.telegram_id}: {e}")
         
-        if minutes_since_last >= min_interval_minutes:
-            # Enough time has passed, can send task (counter will be updated after successful send)
-            return True
+        try:
+            next_ts = (await self._next_task_due(user)).timestamp()
+        except Exception as e:
+            logger.error(f"Failed to compute next task time for {user.telegram_id}: {e}")
+            next_ts = now_ts
+        if next_ts <= now_ts:
+            # Still due after this tick (e.g. the send failed): retry later, not every minute
+            next_ts = now_ts + TASK_RETRY_SECONDS
+        try:
+            await redis_service.redis.zadd(TRAINER_SCHEDULE_KEY, {str(user.telegram_id): next_ts})
+        except Exception as e:
+            logger.error(f"Failed to reschedule user {user.telegram_id}: {e}")
+    
+    async def _dispatch_flashcards_reminders(self):
+        while True:
+            due_ids = await self._lease_due(FLASHCARDS_REMINDER_SCHEDULE_KEY, time_module.time())
+            if not due_ids:
+                return
+            
+            async with async_session_maker() as session:
+                users = await UserService.get_users_by_ids(session, due_ids)
+                await asyncio.gather(*(
+                    self._handle_due_reminder_user(session, telegram_id, users.get(telegram_id))
+                    for telegram_id in due_ids
+                ))
+            
+            if len(due_ids) < DUE_BATCH_SIZE:
+                return
+    
+    async def _handle_due_reminder_user(self, session, telegram_id: int, user):
+        from bot.services.redis_service import redis_service
         
-        return False
+        if not user or user.status != UserStatus.APPROVED:
+            await self._drop_from_schedule(FLASHCARDS_REMINDER_SCHEDULE_KEY, telegram_id)
+            return
+        try:
+            await self._maybe_send_flashcards_reminder(session, user)
+        except Exception as e:
+            logger.error(f"Failed to send flashcards reminder to user {user.telegram_id}: {e}")
+        next_dt = self._next_reminder_due(user, skip_current=True)
+        if next_dt is None:
+            await self._drop_from_schedule(FLASHCARDS_REMINDER_SCHEDULE_KEY, telegram_id)
+            return
+        try:
+            await redis_service.redis.zadd(
+                FLASHCARDS_REMINDER_SCHEDULE_KEY, {str(user.telegram_id): next_dt.timestamp()}
+            )
+        except Exception as e:
+            logger.error(f"Failed to reschedule reminder for {user.telegram_id}: {e}")
     
     def _time_diff_minutes(self, start: time, end: time) -> int:
         """Calculate difference between two times in minutes"""
@@ -153,11 +357,6 @@ class SchedulerService:
                 zone = timezone.utc
         return datetime.now(zone)
 
-    def _is_within_user_window(self, user, current_time: time) -> bool:
-        start_time = time.fromisoformat(user.trainer_start_time or "09:00")
-        end_time = time.fromisoformat(user.trainer_end_time or "21:00")
-        return start_time <= current_time <= end_time
-
     def _get_flashcards_reminder_slot_key(self, now_local: datetime) -> str | None:
         if now_local.minute >= FLASHCARDS_REMINDER_MINUTE_WINDOW:
             return None
@@ -165,6 +364,26 @@ class SchedulerService:
             return None
         return f"{now_local.date().isoformat()}@{now_local.hour:02d}"
 
+    def _next_reminder_due(self, user, skip_current: bool = False) -> Optional[datetime]:
+        """Start of the user's next flashcards reminder slot (or now, if a slot
+        is open and not yet used). None if the user gets no reminders.
+        `skip_current` moves past a slot that has just been handled."""
+        if user.status != UserStatus.APPROVED or not getattr(user, "flashcards_reminder_enabled", True):
+            return None
+
+        now_local = self._get_user_now(user)
+        zone = now_local.tzinfo
+        for day in (now_local.date(), now_local.date() + timedelta(days=1)):
+            for hour in FLASHCARDS_REMINDER_HOURS:
+                slot_start = datetime.combine(day, time(hour=hour), tzinfo=zone)
+                slot_end = slot_start + timedelta(minutes=FLASHCARDS_REMINDER_MINUTE_WINDOW)
+                if slot_end <= now_local or (skip_current and slot_start <= now_local):
+                    continue
+                if getattr(user, "flashcards_last_reminder_local_date", None) == f"{day.isoformat()}@{hour:02d}":
+                    continue
+                return max(slot_start, now_local)
+        return None
+
     def _build_flashcards_reminder_text(self, lang: str, overview: dict) -> str:
         active_set = overview.get("active_set")
         next_set = overview.get("next_set")
@@ -244,7 +463,7 @@ class SchedulerService:
 
         overview = await flashcards_service.get_user_flashcards_overview(
             user.telegram_id,
-            user_doc=user._doc,
+            user_doc=user.to_doc(),
         )
         if overview["today_due_count"] <= 0 and overview["today_new_count"] <= 0:
             return
@@ -252,41 +471,114 @@ class SchedulerService:
         lang = user.interface_language.value
         text = self._build_flashcards_reminder_text_active_only(lang, overview)
         reply_markup = get_flashcards_menu_keyboard(lang, settings.WEBAPP_URL) if settings.WEBAPP_URL else None
-        await self.bot.send_message(user.telegram_id, text, reply_markup=reply_markup)
+        await outbound_service.send_message(
+            user.telegram_id, text, priority=PRIORITY_BULK, reply_markup=reply_markup
+        )
         await UserService.update_user(
             session,
             user,
             flashcards_last_reminder_local_date=slot_key,
         )
-        await asyncio.sleep(0.1)
     
     async def get_daily_progress(self, user) -> tuple[int, int]:
         """
         Get user's daily progress
         Returns (tasks_sent_today, total_tasks_per_day)
         """
-        from bot.services.redis_service import redis_service
-        
         now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
-        current_date = now_kyiv.date()
-        
-        tasks_today_key = f"tasks_today:{user.id}:{current_date}"
-        tasks_sent = await redis_service.get(tasks_today_key)
-        tasks_sent = int(tasks_sent) if tasks_sent else 0
+        counters = await self._get_task_counters([user.id], now_kyiv.date())
+        tasks_sent, _ = counters[user.id]
         
         messages_per_day = user.trainer_messages_per_day or 3
         
         return tasks_sent, messages_per_day
     
-    async def calculate_next_task_time(self, user) -> tuple[datetime | None, str]:
-        """
-        Calculate when the next task will be sent to the user
-        Returns (next_task_datetime, formatted_countdown_string)
-        If no more tasks today, returns (None, message_about_tomorrow)
-        """
+    @staticmethod
+    def _trainer_day_key(user_id: int, current_date) -> str:
+        """Per-user, per-day (Kyiv) hash: sent = tasks sent, last_time = HH:MM of the last one"""
+        return f"trainer_day:{user_id}:{current_date}"
+    
+    @staticmethod
+    def _legacy_day_keys(user_id: int, current_date) -> List[str]:
+        """Counters of the day written before trainer_day hashes existed; they
+        expire on their own, after which these fallbacks can go"""
+        return [f"tasks_today:{user_id}:{current_date}", f"last_task_time:{user_id}:{current_date}"]
+    
+    def _scripts(self):
         from bot.services.redis_service import redis_service
         
+        if self._claim_script is None:
+            self._claim_script = redis_service.redis.register_script(_CLAIM_TASK_SLOT_SCRIPT)
+            self._release_script = redis_service.redis.register_script(_RELEASE_TASK_SLOT_SCRIPT)
+        return self._claim_script, self._release_script
+    
+    async def claim_task_slot(self, user) -> Optional[dict]:
+        """Atomically check the user's window, daily limit and interval and, if a
+        task may go out now, take the slot before any expensive work starts.
+        Returns the claim (pass it to release_task_slot on failure) or None."""
         now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
+        start_time = time.fromisoformat(user.trainer_start_time or "09:00")
+        end_time = time.fromisoformat(user.trainer_end_time or "21:00")
+        messages_per_day = user.trainer_messages_per_day or 3
+        window_minutes = self._time_diff_minutes(start_time, end_time)
+        
+        key = self._trainer_day_key(user.id, now_kyiv.date())
+        stamp = now_kyiv.strftime("%H:%M")
+        claim_script, _ = self._scripts()
+        slot, previous = await claim_script(
+            keys=[key, *self._legacy_day_keys(user.id, now_kyiv.date())],
+            args=[
+                now_kyiv.hour * 60 + now_kyiv.minute,
+                start_time.hour * 60 + start_time.minute,
+                end_time.hour * 60 + end_time.minute,
+                messages_per_day,
+                window_minutes // messages_per_day,
+                stamp,
+                TRAINER_DAY_TTL_SECONDS,
+            ],
+        )
+        if int(slot) < 0:
+            return None
+        return {"key": key, "slot": int(slot), "total": messages_per_day, "stamp": stamp, "previous": previous}
+    
+    async def release_task_slot(self, claim: dict) -> None:
+        """Undo a claim whose task was not delivered (unless a newer claim replaced it)"""
+        _, release_script = self._scripts()
+        await release_script(keys=[claim["key"]], args=[claim["stamp"], claim["previous"] or ""])
+    
+    async def reset_daily_counters(self, user) -> None:
+        """Forget today's sent tasks, e.g. after the user changed their schedule"""
+        from bot.services.redis_service import redis_service
+        
+        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
+        await redis_service.delete(
+            self._trainer_day_key(user.id, now_kyiv.date()),
+            *self._legacy_day_keys(user.id, now_kyiv.date()),
+        )
+    
+    async def _get_task_counters(self, user_ids: List[int], current_date) -> dict:
+        """Tasks sent today and last task time for several users in one round trip.
+        Returns {user_id: (tasks_sent, last_task_time_str | None)}"""
+        from bot.services.redis_service import redis_service
+        
+        if not user_ids:
+            return {}
+        async with redis_service.pipeline() as pipe:
+            for user_id in user_ids:
+                pipe.hmget(self._trainer_day_key(user_id, current_date), ["sent", "last_time"])
+                pipe.mget(self._legacy_day_keys(user_id, current_date))
+        results = iter(pipe.results)
+        counters = {}
+        for user_id, (sent, last_time), legacy in zip(user_ids, results, results):
+            if sent is None and last_time is None:
+                sent, last_time = legacy
+            counters[user_id] = (int(sent) if sent else 0, last_time)
+        return counters
+    
+    def _compute_next_task_time(self, user, now_kyiv: datetime, tasks_sent: int,
+                                last_task_time_str: Optional[str]) -> datetime:
+        """When the user's next task is due (now_kyiv if it is due already)"""
+        kyiv = now_kyiv.tzinfo
         current_time = now_kyiv.time()
         current_date = now_kyiv.date()
         
@@ -294,64 +586,63 @@ class SchedulerService:
         start_time = time.fromisoformat(user.trainer_start_time or "09:00")
         end_time = time.fromisoformat(user.trainer_end_time or "21:00")
         messages_per_day = user.trainer_messages_per_day or 3
+        tomorrow_start = datetime.combine(current_date + timedelta(days=1), start_time, tzinfo=kyiv)
         
-        # Get tasks sent today (cap by daily limit just in case)
-        tasks_today_key = f"tasks_today:{user.id}:{current_date}"
-        tasks_sent = await redis_service.get(tasks_today_key)
-        tasks_sent = int(tasks_sent) if tasks_sent else 0
-        if tasks_sent > messages_per_day:
-            tasks_sent = messages_per_day
-        
-        # Check if all tasks for today are complete
-        if tasks_sent >= messages_per_day:
+        # Check if all tasks for today are complete (cap by daily limit just in case)
+        if min(tasks_sent, messages_per_day) >= messages_per_day:
             # Next task is tomorrow at start time
-            tomorrow = now_kyiv + timedelta(days=1)
-            next_task_dt = datetime.combine(tomorrow.date(), start_time, tzinfo=ZoneInfo('Europe/Kyiv'))
-            time_diff = next_task_dt - now_kyiv
-            hours = int(time_diff.total_seconds() // 3600)
-            minutes = int((time_diff.total_seconds() % 3600) // 60)
-            return next_task_dt, f"{hours}ч {minutes}мин"
+            return tomorrow_start
         
         # Calculate minimum interval between tasks
         window_minutes = self._time_diff_minutes(start_time, end_time)
         # Если окно слишком узкое или сообщений очень много, минимальный интервал не меньше 5 минут
         min_interval_minutes = max(5, window_minutes // messages_per_day if messages_per_day > 0 else window_minutes)
         
-        # Get last task time
-        last_task_time_key = f"last_task_time:{user.id}:{current_date}"
-        last_task_time_str = await redis_service.get(last_task_time_key)
-        
         # If we haven't started today yet
         if not last_task_time_str:
             if current_time < start_time:
                 # Next task is at start time
-                next_task_dt = datetime.combine(current_date, start_time, tzinfo=ZoneInfo('Europe/Kyiv'))
-            else:
-                # We're in the window but haven't sent first task yet - send soon
-                next_task_dt = now_kyiv + timedelta(minutes=5)
-        else:
-            # Calculate when next task should be sent based on last task time
-            last_task_time = time.fromisoformat(last_task_time_str)
-            last_task_minutes = last_task_time.hour * 60 + last_task_time.minute
-            next_task_minutes = last_task_minutes + min_interval_minutes
-            
-            if next_task_minutes >= 24 * 60:
-                # Next task is tomorrow
-                tomorrow = now_kyiv + timedelta(days=1)
-                next_task_dt = datetime.combine(tomorrow.date(), start_time, tzinfo=ZoneInfo('Europe/Kyiv'))
-            else:
-                next_task_hour = next_task_minutes // 60
-                next_task_minute = next_task_minutes % 60
-                next_task_time = time(hour=next_task_hour, minute=next_task_minute)
-                next_task_dt = datetime.combine(current_date, next_task_time, tzinfo=ZoneInfo('Europe/Kyiv'))
-                
-                # If next task time is beyond end time or already passed, schedule for tomorrow
-                if next_task_time > end_time or next_task_dt <= now_kyiv:
-                    tomorrow = now_kyiv + timedelta(days=1)
-                    next_task_dt = datetime.combine(tomorrow.date(), start_time, tzinfo=ZoneInfo('Europe/Kyiv'))
+                return datetime.combine(current_date, start_time, tzinfo=kyiv)
+            if current_time > end_time:
+                return tomorrow_start
+            # We're in the window but haven't sent first task yet - due now
+            return now_kyiv
+        
+        # Calculate when next task should be sent based on last task time
+        last_task_time = time.fromisoformat(last_task_time_str)
+        last_task_minutes = last_task_time.hour * 60 + last_task_time.minute
+        next_task_minutes = last_task_minutes + min_interval_minutes
+        
+        if next_task_minutes >= 24 * 60:
+            # Next task is tomorrow
+            return tomorrow_start
+        
+        next_task_time = time(hour=next_task_minutes // 60, minute=next_task_minutes % 60)
+        if next_task_time > end_time:
+            # Beyond today's window, schedule for tomorrow
+            return tomorrow_start
+        next_task_dt = datetime.combine(current_date, next_task_time, tzinfo=kyiv)
+        if next_task_dt <= now_kyiv:
+            # Interval already elapsed: due now while the window is still open
+            return now_kyiv if current_time <= end_time else tomorrow_start
+        return next_task_dt
+    
+    async def _next_task_due(self, user) -> datetime:
+        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
+        counters = await self._get_task_counters([user.id], now_kyiv.date())
+        tasks_sent, last_task_time_str = counters[user.id]
+        return self._compute_next_task_time(user, now_kyiv, tasks_sent, last_task_time_str)
+    
+    async def calculate_next_task_time(self, user) -> tuple[datetime | None, str]:
+        """
+        Calculate when the next task will be sent to the user
+        Returns (next_task_datetime, formatted_countdown_string)
+        """
+        now_kyiv = datetime.now(ZoneInfo('Europe/Kyiv'))
+        next_task_dt = await self._next_task_due(user)
         
-        # Calculate time difference
-        time_diff = next_task_dt - now_kyiv
+        # Due tasks go out on the next scheduler tick
+        time_diff = max(next_task_dt - now_kyiv, timedelta(minutes=1))
         hours = int(time_diff.total_seconds() // 3600)
         minutes = int((time_diff.total_seconds() % 3600) // 60)
         
@@ -363,91 +654,105 @@ class SchedulerService:
         
         return next_task_dt, countdown
     
+    async def _reconcile_flashcard_counters(self):
+        """Fix flashcard set counters that drifted from their cards"""
+        try:
+            fixed = await flashcards_service.reconcile_set_counters()
+            logger.info(f"Flashcard set counters reconciled: {fixed} sets rewritten")
+        except Exception as e:
+            logger.error(f"Failed to reconcile flashcard set counters: {e}")
+    
     async def _send_daily_reports(self):
         """Send daily statistics to all active users"""
         if not self.bot:
             return
         
-        from bot.locales.texts import get_text
-        
         logger.info("Sending daily reports...")
         
         async with async_session_maker() as session:
             users = await UserService.get_users_with_trainer_enabled(session)
-            
-            for user in users:
-                try:
-                    stats = await mongo_service.get_today_stats(user.telegram_id)
-                    lang = user.interface_language.value
-                    planned_daily = user.trainer_messages_per_day or 3
-                    completed = stats.get('completed', 0) if stats else 0
-                    avg_quality = stats.get('quality', 0) if stats else 0
-                    stored_planned = stats.get('expected') if stats else None
-                    planned = max(planned_daily, stored_planned or 0)
-                    missed = max(planned - completed, 0)
-                    penalty = missed * 10
-                    final_score = max(0, min(100, avg_quality - penalty))
-                    motivation = self._get_motivation_message(final_score, lang)
-                    
-                    message = get_text(
-                        lang,
-                        "daily_report",
-                        planned=planned,
-                        completed=completed,
-                        missed=missed,
-                        quality=avg_quality,
-                        penalty=penalty,
-                        final=final_score,
-                        motivation=motivation,
-                    )
-                    
-                    # Add streak information
-                    streak_info = await mongo_service.get_streak(user.telegram_id)
-                    if streak_info.get("current", 0) > 0:
-                        message += "\n\n" + get_text(lang, "streak_message", days=streak_info["current"])
-                    elif streak_info.get("broken"):
-                        message += "\n\n" + get_text(lang, "streak_lost")
-                    
-                    # Add mastered sentences count
-                    mastered_count = await mongo_service.get_mastered_count(user.telegram_id)
-                    if mastered_count > 0:
-                        message += "\n" + get_text(lang, "mastered_sentences_count", count=mastered_count)
-                    
-                    # Add friends' statistics if user has friends
-                    friends_stats = await mongo_service.get_friends_stats(user.telegram_id)
-                    if friends_stats:
-                        friends_section = "\n\n" + get_text(lang, "friends_stats_title")
-                        for friend_id, friend_stat in friends_stats.items():
-                            friend = await UserService.get_or_create_user(session, friend_id)
-                            friend_name = friend.first_name or friend.username or f"User {friend_id}"
-                            friend_username = friend.username or str(friend_id)
-                            completed = friend_stat.get("completed", 0)
-                            quality = friend_stat.get("quality", 0)
-                            know = friend_stat.get("flashcard_know", 0)
-                            retry = friend_stat.get("flashcard_retry", 0)
-                            streak_info = await mongo_service.get_streak(friend_id)
-                            streak = streak_info.get("current", 0)
-                            quality_line = ""
-                            if completed > 0:
-                                quality_line = get_text(lang, "friends_stats_quality_inline", quality=quality)
-
-                            friends_section += get_text(
-                                lang,
-                                "friends_stats_user_active",
-                                name=friend_name,
-                                username=friend_username,
-                                completed=completed,
-                                know=know,
-                                retry=retry,
-                                quality_line=quality_line,
-                                streak=streak,
-                            )
-                        message += friends_section
-                    
-                    await self.bot.send_message(user.telegram_id, message)
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    logger.error(f"Failed to send daily report to {user.telegram_id}: {e}")
+            data = await report_service.load_daily(session, users)
+        
+        pending = {}
+        for user in users:
+            try:
+                message = self._render_daily_report(user, data)
+                pending[user.telegram_id] = outbound_service.submit_message(user.telegram_id, message)
+            except Exception as e:
+                logger.error(f"Failed to send daily report to {user.telegram_id}: {e}")
+        await self._await_bulk_sends(pending, "daily report")
+    
+    def _render_daily_report(self, user, data: DailyReportData) -> str:
+        """Build a user's daily report from prefetched data"""
+        from bot.locales.texts import get_text
+        
+        stats = data.today_stats.get(user.telegram_id)
+        lang = user.interface_language.value
+        planned_daily = user.trainer_messages_per_day or 3
+        completed = stats.get('completed', 0) if stats else 0
+        avg_quality = stats.get('quality', 0) if stats else 0
+        stored_planned = stats.get('expected') if stats else None
+        planned = max(planned_daily, stored_planned or 0)
+        missed = max(planned - completed, 0)
+        penalty = missed * 10
+        final_score = max(0, min(100, avg_quality - penalty))
+        motivation = self._get_motivation_message(final_score, lang)
+        
+        message = get_text(
+            lang,
+            "daily_report",
+            planned=planned,
+            completed=completed,
+            missed=missed,
+            quality=avg_quality,
+            penalty=penalty,
+            final=final_score,
+            motivation=motivation,
+        )
+        
+        # Add streak information
+        streak_info = data.streak(user.telegram_id)
+        if streak_info.get("current", 0) > 0:
+            message += "\n\n" + get_text(lang, "streak_message", days=streak_info["current"])
+        elif streak_info.get("broken"):
+            message += "\n\n" + get_text(lang, "streak_lost")
+        
+        # Add mastered sentences count
+        mastered_count = data.mastered_counts.get(user.telegram_id, 0)
+        if mastered_count > 0:
+            message += "\n" + get_text(lang, "mastered_sentences_count", count=mastered_count)
+        
+        # Add friends' statistics if user has friends
+        friends_stats = data.friends_stats(user.telegram_id)
+        if friends_stats:
+            friends_section = "\n\n" + get_text(lang, "friends_stats_title")
+            for friend_id, friend_stat in friends_stats.items():
+                friend = data.profiles.get(friend_id)
+                friend_name = (friend and (friend.first_name or friend.username)) or f"User {friend_id}"
+                friend_username = (friend and friend.username) or str(friend_id)
+                completed = friend_stat.get("completed", 0)
+                quality = friend_stat.get("quality", 0)
+                know = friend_stat.get("flashcard_know", 0)
+                retry = friend_stat.get("flashcard_retry", 0)
+                streak = data.streak(friend_id).get("current", 0)
+                quality_line = ""
+                if completed > 0:
+                    quality_line = get_text(lang, "friends_stats_quality_inline", quality=quality)
+                
+                friends_section += get_text(
+                    lang,
+                    "friends_stats_user_active",
+                    name=friend_name,
+                    username=friend_username,
+                    completed=completed,
+                    know=know,
+                    retry=retry,
+                    quality_line=quality_line,
+                    streak=streak,
+                )
+            message += friends_section
+        
+        return message
     
     async def _send_weekly_reports(self):
         """Send weekly statistics to all active users"""
@@ -460,30 +765,41 @@ class SchedulerService:
         
         async with async_session_maker() as session:
             users = await UserService.get_users_with_trainer_enabled(session)
-            
-            for user in users:
-                try:
-                    # Get week's stats from MongoDB
-                    week_stats = await mongo_service.get_week_stats(user.telegram_id)
-                    
-                    if not week_stats or week_stats[0] == 0:
-                        continue  # Skip if no tasks completed
-                    
-                    completed, total, avg_quality = week_stats
-                    
-                    lang = user.interface_language.value
-                    achievement = self._get_achievement_message(avg_quality, completed, lang)
-                    
-                    message = get_text(lang, "weekly_report",
-                                      completed=completed,
-                                      total=total,
-                                      quality=avg_quality,
-                                      achievement=achievement)
-                    
-                    await self.bot.send_message(user.telegram_id, message)
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    logger.error(f"Failed to send weekly report to {user.telegram_id}: {e}")
+        week_stats_by_user = await report_service.load_weekly(users)
+        
+        pending = {}
+        for user in users:
+            try:
+                week_stats = week_stats_by_user.get(user.telegram_id)
+                
+                if not week_stats or week_stats[0] == 0:
+                    continue  # Skip if no tasks completed
+                
+                completed, total, avg_quality = week_stats
+                
+                lang = user.interface_language.value
+                achievement = self._get_achievement_message(avg_quality, completed, lang)
+                
+                message = get_text(lang, "weekly_report",
+                                  completed=completed,
+                                  total=total,
+                                  quality=avg_quality,
+                                  achievement=achievement)
+                
+                pending[user.telegram_id] = outbound_service.submit_message(user.telegram_id, message)
+            except Exception as e:
+                logger.error(f"Failed to send weekly report to {user.telegram_id}: {e}")
+        await self._await_bulk_sends(pending, "weekly report")
+    
+    async def _await_bulk_sends(self, pending: dict, label: str):
+        """Wait for queued messages ({telegram_id: future}) and log failures"""
+        results = await asyncio.gather(*pending.values(), return_exceptions=True)
+        failed = 0
+        for telegram_id, result in zip(pending, results):
+            if isinstance(result, BaseException):
+                failed += 1
+                logger.error(f"Failed to send {label} to {telegram_id}: {result}")
+        logger.info(f"Sent {len(pending) - failed}/{len(pending)} {label}s")
     
     def _get_motivation_message(self, quality: int, lang: str) -> str:
         """Get motivational message based on quality"""
@@ -0,0 +1,302 @@
+"""
+Pre-generated trainer sentence pool.
+
+Ready-made (sentence, expected_translation, hint) tasks are kept per
+(difficulty, topic, interface_language, learning_language):
+
+  - MongoDB `trainer_sentence_pool` holds the durable copy (survives restarts)
+  - a Redis list per pool mirrors it so handing out a task is a single LPOP
+
+A background worker tops up every pool that fell below the low watermark back
+to the high watermark, so the scheduler burst pops ready tasks instead of
+waiting on two sequential LLM round trips per user.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import ObjectId
+
+from bot.config import settings
+from bot.models.database import TrainerTopic, UserStatus
+from bot.services import mongo_service
+from bot.services.mastered_index_service import mastered_index_service
+from bot.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+_REDIS_POOL_PREFIX = "sentence_pool"
+_REDIS_ACTIVE_POOLS_KEY = "sentence_pool:active"
+_MAX_POP_ATTEMPTS = 3
+
+
+class SentencePoolService:
+    """Pool of ready trainer tasks with background refill"""
+
+    def __init__(self):
+        self._worker_task: Optional[asyncio.Task] = None
+        self._refill_event: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def pool_id(difficulty: str, topic, interface_lang: str, learning_lang: str) -> str:
+        """Build the pool identifier for a task configuration"""
+        if isinstance(topic, TrainerTopic):
+            topic_value = topic.value
+        else:
+            topic_value = topic or TrainerTopic.RANDOM.value
+        return f"{difficulty}:{topic_value}:{interface_lang}:{learning_lang}"
+
+    @staticmethod
+    def _redis_key(pool_id: str) -> str:
+        return f"{_REDIS_POOL_PREFIX}:{pool_id}"
+
+    @staticmethod
+    def _collection():
+        return mongo_service.db().trainer_sentence_pool
+
+    @staticmethod
+    def _entry_from_doc(doc: dict) -> dict:
+        return {
+            "id": str(doc["_id"]),
+            "sentence": doc["sentence"],
+            "expected_translation": doc["expected_translation"],
+            "hint": doc.get("hint", ""),
+        }
+
+    # ------------------------------------------------------------------
+    # Handing out tasks
+    # ------------------------------------------------------------------
+
+    async def pop_task(
+        self,
+        difficulty: str,
+        topic,
+        interface_lang: str,
+        learning_lang: str,
+        user_id: Optional[int] = None,
+    ) -> Optional[dict]:
+        """Take a ready task from the pool.
+
+        Returns {"sentence", "expected_translation", "hint"} or None when the pool is
+        empty/unavailable, in which case the caller generates the task live.
+        Sentences the user has already mastered are left in the pool for others.
+        """
+        if not settings.SENTENCE_POOL_ENABLED or not mongo_service.is_ready():
+            return None
+
+        pool_id = self.pool_id(difficulty, topic, interface_lang, learning_lang)
+        try:
+            if redis_service.redis:
+                # Remember the pool so the worker keeps it warm
+                await redis_service.redis.sadd(_REDIS_ACTIVE_POOLS_KEY, pool_id)
+
+            task = None
+            skipped: list[str] = []
+            for _ in range(_MAX_POP_ATTEMPTS):
+                entry, raw = await self._next_entry(pool_id, skipped)
+                if entry is None:
+                    break
+
+                if user_id and await mastered_index_service.is_mastered(user_id, entry["sentence"]):
+                    skipped.append(entry["id"])
+                    if raw is not None:
+                        await redis_service.redis.rpush(self._redis_key(pool_id), raw)
+                    continue
+
+                # Claim the durable copy; a zero count means another consumer won it
+                result = await self._collection().delete_one({"_id": ObjectId(entry["id"])})
+                if result.deleted_count:
+                    task = entry
+                    break
+
+            await self._maybe_request_refill(pool_id)
+            return task
+        except Exception as e:
+            logger.warning(f"Sentence pool pop failed for {pool_id}: {e}")
+            return None
+
+    async def _next_entry(self, pool_id: str, skipped: list[str]) -> tuple[Optional[dict], Optional[str]]:
+        """Return the next candidate entry and its raw Redis payload (if any)."""
+        if redis_service.redis:
+            raw = await redis_service.redis.lpop(self._redis_key(pool_id))
+            if raw:
+                return json.loads(raw), raw
+
+        # Redis mirror is empty or was lost: read the durable copy directly
+        query: dict = {"pool_id": pool_id}
+        if skipped:
+            query["_id"] = {"$nin": [ObjectId(x) for x in skipped]}
+        doc = await self._collection().find_one(query, sort=[("created_at", 1)])
+        if not doc:
+            return None, None
+        return self._entry_from_doc(doc), None
+
+    async def _maybe_request_refill(self, pool_id: str) -> None:
+        if not redis_service.redis or self._refill_event is None:
+            return
+        remaining = await redis_service.redis.llen(self._redis_key(pool_id))
+        if remaining < settings.SENTENCE_POOL_LOW_WATERMARK:
+            self._refill_event.set()
+
+    # ------------------------------------------------------------------
+    # Refilling
+    # ------------------------------------------------------------------
+
+    async def _seed_active_pools(self) -> None:
+        """Register pools for every trainer user with a fixed topic."""
+        if not redis_service.redis:
+            return
+        pipeline = [
+            {"$match": {"status": UserStatus.APPROVED.value, "daily_trainer_enabled": True}},
+            {"$group": {"_id": {
+                "difficulty": "$difficulty_level",
+                "topic": "$trainer_topic",
+                "interface": "$interface_language",
+                "learning": "$learning_language",
+            }}},
+        ]
+        pool_ids = []
+        async for row in mongo_service.db().users.aggregate(pipeline):
+            key = row["_id"]
+            topic = key.get("topic") or TrainerTopic.RANDOM.value
+            if topic == TrainerTopic.RANDOM.value:
+                # Random users resolve a concrete topic per task; those pools
+                # get registered on first demand.
+                continue
+            pool_ids.append(self.pool_id(
+                key.get("difficulty") or "A2",
+                topic,
+                key.get("interface") or "ru",
+                key.get("learning") or "en",
+            ))
+        if pool_ids:
+            await redis_service.redis.sadd(_REDIS_ACTIVE_POOLS_KEY, *pool_ids)
+
+    async def _sync_redis_mirror(self, pool_id: str) -> int:
+        """Make the Redis list match the durable pool. Returns pool size."""
+        collection = self._collection()
+        size = await collection.count_documents({"pool_id": pool_id})
+        if not redis_service.redis:
+            return size
+
+        key = self._redis_key(pool_id)
+        if await redis_service.redis.llen(key) == size:
+            return size
+
+        docs = await collection.find({"pool_id": pool_id}).sort("created_at", 1).to_list(length=size)
+        # Swap the list contents atomically so concurrent pops never see it empty
+        async with redis_service.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if docs:
+                pipe.rpush(key, *[json.dumps(self._entry_from_doc(d)) for d in docs])
+        return len(docs)
+
+    async def _generate_entry(self, pool_id: str) -> Optional[dict]:
+        from bot.services.translation_service import translation_service
+
+        difficulty, topic_value, interface_lang, learning_lang = pool_id.split(":")
+        try:
+            topic = TrainerTopic(topic_value)
+        except ValueError:
+            topic = TrainerTopic.RANDOM
+
+        task = await translation_service.generate_task(
+            difficulty,
+            learning_lang,
+            interface_lang,
+            topic,
+        )
+        if not task["sentence"] or not task["translation"]:
+            return None
+
+        doc = {
+            "pool_id": pool_id,
+            "difficulty": difficulty,
+            "topic": topic_value,
+            "interface_language": interface_lang,
+            "learning_language": learning_lang,
+            "sentence": task["sentence"],
+            "expected_translation": task["translation"],
+            "hint": task["hint"],
+            "created_at": datetime.now(timezone.utc),
+        }
+        res = await self._collection().insert_one(doc)
+        doc["_id"] = res.inserted_id
+        return self._entry_from_doc(doc)
+
+    async def refill_pool(self, pool_id: str) -> int:
+        """Top up one pool to the high watermark if it is below the low one.
+        Returns the number of generated entries."""
+        size = await self._sync_redis_mirror(pool_id)
+        if size >= settings.SENTENCE_POOL_LOW_WATERMARK:
+            return 0
+
+        generated = 0
+        for _ in range(settings.SENTENCE_POOL_HIGH_WATERMARK - size):
+            try:
+                entry = await self._generate_entry(pool_id)
+            except Exception as e:
+                logger.warning(f"Sentence pool generation failed for {pool_id}: {e}")
+                break
+            if entry is None:
+                continue
+            if redis_service.redis:
+                await redis_service.redis.rpush(self._redis_key(pool_id), json.dumps(entry))
+            generated += 1
+        return generated
+
+    async def refill_all(self) -> None:
+        """Refill every pool that has seen demand."""
+        if not mongo_service.is_ready() or not redis_service.redis:
+            return
+        pool_ids = await redis_service.redis.smembers(_REDIS_ACTIVE_POOLS_KEY)
+        for pool_id in sorted(pool_ids):
+            generated = await self.refill_pool(pool_id)
+            if generated:
+                logger.info(f"Sentence pool {pool_id}: generated {generated} tasks")
+
+    async def _run(self) -> None:
+        try:
+            await self._seed_active_pools()
+        except Exception as e:
+            logger.warning(f"Sentence pool seeding failed: {e}")
+
+        while True:
+            try:
+                await self.refill_all()
+            except Exception as e:
+                logger.error(f"Sentence pool refill failed: {e}")
+            try:
+                await asyncio.wait_for(
+                    self._refill_event.wait(),
+                    timeout=settings.SENTENCE_POOL_REFILL_INTERVAL_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._refill_event.clear()
+
+    def start(self) -> None:
+        """Start the background refill worker"""
+        if not settings.SENTENCE_POOL_ENABLED:
+            return
+        if self._worker_task and not self._worker_task.done():
+            return
+        self._refill_event = asyncio.Event()
+        self._worker_task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("Sentence pool refill worker started")
+
+    async def stop(self) -> None:
+        """Stop the background refill worker"""
+        if self._worker_task:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+
+
+# Global instance
+sentence_pool_service = SentencePoolService()
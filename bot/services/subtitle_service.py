@@ -15,6 +15,7 @@ Translates with Google Translate (gtx endpoint), optionally explains with OpenAI
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
@@ -30,6 +31,7 @@ import aiohttp
 from bot.config import settings
 from bot.services import mongo_service
 from bot.services.redis_service import redis_service
+from bot.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +53,7 @@ _session_cache: dict[str, tuple[dict, float]] = {}
 _CACHE_TTL = 600  # 10 minutes (in-memory L1)
 _REDIS_SUBTITLE_TTL = 604800  # 7 days  (Redis L2, shared across users)
 _REDIS_CHANNEL_TTL = 1800  # 30 minutes (Redis L2)
+_REDIS_EXPLAIN_TTL = 604800  # 7 days (word explanations, shared across users)
 _channel_videos_cache: tuple[list[dict], float] | None = None
 _CHANNEL_CACHE_TTL = 1800  # 30 minutes (in-memory L1)
 _WARM_DELAY = 20  # seconds between slow background fetches
@@ -59,6 +62,7 @@ _fixed_library_cache: list[dict] | None = None
 _warmer_running = False
 _warm_task: asyncio.Task | None = None
 _bootstrap_task: asyncio.Task | None = None
+_explain_flight = SingleFlight("subtitle_explain")
 _COOKIE_PATH = os.environ.get("YOUTUBE_COOKIE_PATH", "/app/cookies/youtube_cookies.txt")
 
 # Per-video locks: prevents thundering herd (60 users click same video →
@@ -522,9 +526,9 @@ async def _store_prepared_session(result: dict, video_meta: dict | None = None)
 
     try:
         if redis_service.redis:
-            await redis_service.set(
+            await redis_service.set_packed(
                 f"subtitle:session:{video_id}",
-                json.dumps(result),
+                result,
                 ex=_REDIS_SUBTITLE_TTL,
             )
     except Exception as exc:
@@ -590,12 +594,10 @@ async def _load_session_from_fast_cache(video_id: str) -> dict | None:
 
     try:
         if redis_service.redis:
-            cached_json = await redis_service.get(f"subtitle:session:{video_id}")
-            if cached_json:
-                result = json.loads(cached_json)
-                if result.get("cues"):
-                    _session_cache[video_id] = (result, time.time())
-                    return result
+            result = await redis_service.get_packed(f"subtitle:session:{video_id}")
+            if result and result.get("cues"):
+                _session_cache[video_id] = (result, time.time())
+                return result
     except Exception as exc:
         logger.debug("Redis subtitle cache read failed: %s", exc)
 
@@ -604,9 +606,9 @@ async def _load_session_from_fast_cache(video_id: str) -> dict | None:
         _session_cache[video_id] = (result, time.time())
         try:
             if redis_service.redis:
-                await redis_service.set(
+                await redis_service.set_packed(
                     f"subtitle:session:{video_id}",
-                    json.dumps(result),
+                    result,
                     ex=_REDIS_SUBTITLE_TTL,
                 )
         except Exception as exc:
@@ -623,11 +625,9 @@ def _cache_fixed_library(videos: list[dict]) -> None:
 async def _load_fixed_library_from_redis() -> list[dict] | None:
     try:
         if redis_service.redis:
-            cached_json = await redis_service.get(_REDIS_FIXED_LIBRARY_KEY)
-            if cached_json:
-                videos = json.loads(cached_json)
-                if len(videos) >= _FIXED_LIBRARY_SIZE:
-                    return videos[:_FIXED_LIBRARY_SIZE]
+            videos = await redis_service.get_packed(_REDIS_FIXED_LIBRARY_KEY)
+            if videos and len(videos) >= _FIXED_LIBRARY_SIZE:
+                return videos[:_FIXED_LIBRARY_SIZE]
     except Exception as exc:
         logger.debug("Redis fixed video library read failed: %s", exc)
     return None
@@ -636,9 +636,9 @@ async def _load_fixed_library_from_redis() -> list[dict] | None:
 async def _store_fixed_library_in_redis(videos: list[dict]) -> None:
     try:
         if redis_service.redis:
-            await redis_service.set(
+            await redis_service.set_packed(
                 _REDIS_FIXED_LIBRARY_KEY,
-                json.dumps(videos[:_FIXED_LIBRARY_SIZE]),
+                videos[:_FIXED_LIBRARY_SIZE],
                 ex=_REDIS_FIXED_LIBRARY_TTL,
             )
     except Exception as exc:
@@ -763,13 +763,12 @@ async def _get_ready_video_ids(video_ids: list[str]) -> set[str]:
         try:
             if redis_service.redis:
                 keys = [f"subtitle:session:{video_id}" for video_id in missing]
-                values = await redis_service.redis.mget(keys)
+                values = await redis_service.mget_packed(keys)
                 still_missing: list[str] = []
-                for video_id, cached_json in zip(missing, values):
-                    if not cached_json:
+                for video_id, result in zip(missing, values):
+                    if not result:
                         still_missing.append(video_id)
                         continue
-                    result = json.loads(cached_json)
                     if result.get("cues"):
                         _session_cache[video_id] = (result, time.time())
                         ready.add(video_id)
@@ -827,13 +826,11 @@ async def list_channel_videos(limit: int = _FIXED_LIBRARY_SIZE) -> list[dict]:
     # L2: Redis (shared across restarts and workers)
     try:
         if redis_service.redis:
-            cached_json = await redis_service.get("subtitle:channel_videos")
-            if cached_json:
-                videos = json.loads(cached_json)
-                if len(videos) >= limit:
-                    _channel_videos_cache = (videos, time.time())
-                    logger.info("Channel videos loaded from Redis cache")
-                    return videos[:limit]
+            videos = await redis_service.get_packed("subtitle:channel_videos")
+            if videos and len(videos) >= limit:
+                _channel_videos_cache = (videos, time.time())
+                logger.info("Channel videos loaded from Redis cache")
+                return videos[:limit]
     except Exception as exc:
         logger.debug("Redis channel cache read failed: %s", exc)
 
@@ -843,7 +840,7 @@ async def list_channel_videos(limit: int = _FIXED_LIBRARY_SIZE) -> list[dict]:
     _channel_videos_cache = (videos, time.time())
     try:
         if redis_service.redis:
-            await redis_service.set("subtitle:channel_videos", json.dumps(videos), ex=_REDIS_CHANNEL_TTL)
+            await redis_service.set_packed("subtitle:channel_videos", videos, ex=_REDIS_CHANNEL_TTL)
     except Exception as exc:
         logger.debug("Redis channel cache write failed: %s", exc)
 
@@ -1159,9 +1156,41 @@ async def _openai_explain(
     video_lang: str,
     target_lang: str,
 ) -> str:
-    from openai import AsyncOpenAI
+    cache_key = "subtitle:explain:" + hashlib.sha256(
+        "\x1f".join([word, translation, context, video_lang, target_lang]).encode("utf-8")
+    ).hexdigest()
+
+    async def _cached() -> Optional[str]:
+        try:
+            if redis_service.redis:
+                return await redis_service.get(cache_key)
+        except Exception:
+            pass
+        return None
 
-    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    cached = await _cached()
+    if cached:
+        return cached
+
+    # Several viewers tapping the same word at once share one completion
+    return await _explain_flight.do(
+        cache_key,
+        lambda: _openai_explain_uncached(cache_key, word, translation, context, video_lang, target_lang),
+        recheck=_cached,
+        lock_ttl_ms=settings.OPENAI_SINGLE_FLIGHT_LOCK_MS,
+    )
+
+
+async def _openai_explain_uncached(
+    cache_key: str,
+    word: str,
+    translation: str,
+    context: str,
+    video_lang: str,
+    target_lang: str,
+) -> str:
+    from bot.services.llm_gateway import llm_gateway, PRIORITY_BACKGROUND
+    from bot.services.token_budget_service import FEATURE_SUBTITLES
 
     lang_names = {"de": "German", "en": "English", "fr": "French",
                   "es": "Spanish", "it": "Italian"}
@@ -1183,8 +1212,11 @@ async def _openai_explain(
         f"Context: {context}"
     )
 
-    resp = await client.chat.completions.create(
+    resp = await llm_gateway.chat(
         model="gpt-4o-mini",
+        priority=PRIORITY_BACKGROUND,
+        purpose="subtitle_explain",
+        feature=FEATURE_SUBTITLES,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user",   "content": user_prompt},
@@ -1192,4 +1224,10 @@ async def _openai_explain(
         max_tokens=200,
         temperature=0.4,
     )
-    return resp.choices[0].message.content.strip()
+    explanation = resp.choices[0].message.content.strip()
+    try:
+        if redis_service.redis:
+            await redis_service.set(cache_key, explanation, ex=_REDIS_EXPLAIN_TTL)
+    except Exception as exc:
+        logger.debug("Explanation cache write failed: %s", exc)
+    return explanation
@@ -0,0 +1,155 @@
+"""
+Daily OpenAI token budgets with atomic reserve/commit accounting.
+
+Per user and calendar day (in the user's timezone) a Redis hash holds
+
+  tokens:{user_id}:{YYYY-MM-DD}
+      total              tokens actually used
+      reserved           tokens held by requests in flight
+      feature:<name>     usage per feature (translator, trainer, subtitles)
+
+`reserve` checks the limit and holds an estimate in one Lua call, so
+concurrent requests can't all pass the check; `commit` swaps the
+reservation for the real usage in one more. Keys expire at the end of the
+local day (plus a grace day for reporting) instead of sliding 24 h.
+
+Usage across all users is also tracked per UTC day for admin reporting:
+
+  tokens:global:{YYYY-MM-DD}   total / feature:<name>
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from bot.config import settings
+from bot.services.redis_service import redis_service
+import bot.services.flashcards_service as flashcards_service
+
+logger = logging.getLogger(__name__)
+
+FEATURE_TRANSLATOR = "translator"
+FEATURE_TRAINER = "trainer"
+FEATURE_SUBTITLES = "subtitles"
+FEATURE_OTHER = "other"
+
+_GRACE_SECONDS = 86400  # Keep finished days around for reporting
+
+# KEYS[1] user day hash; ARGV: amount, limit, expire_at
+_RESERVE_SCRIPT = """
+local total = tonumber(redis.call('HGET', KEYS[1], 'total') or '0')
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved') or '0')
+local limit = tonumber(ARGV[2])
+if limit > 0 and total + reserved >= limit then
+    return -1
+end
+redis.call('HINCRBY', KEYS[1], 'reserved', ARGV[1])
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return total
+"""
+
+# KEYS[1] user day hash; ARGV: reserved, actual, feature, expire_at
+_COMMIT_SCRIPT = """
+local reserved = redis.call('HINCRBY', KEYS[1], 'reserved', -tonumber(ARGV[1]))
+if reserved < 0 then
+    redis.call('HSET', KEYS[1], 'reserved', 0)
+end
+local total = redis.call('HINCRBY', KEYS[1], 'total', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'feature:' .. ARGV[3], ARGV[2])
+redis.call('EXPIREAT', KEYS[1], ARGV[4])
+return total
+"""
+
+
+class TokenBudgetExceeded(Exception):
+    def __init__(self):
+        # Message kept for handlers that match on it
+        super().__init__("Daily token limit reached")
+
+
+class TokenBudgetService:
+    """Per-user daily token budgets and per-feature usage counters"""
+
+    def __init__(self):
+        self._reserve = None
+        self._commit = None
+
+    def _scripts(self):
+        if self._reserve is None:
+            self._reserve = redis_service.redis.register_script(_RESERVE_SCRIPT)
+            self._commit = redis_service.redis.register_script(_COMMIT_SCRIPT)
+        return self._reserve, self._commit
+
+    @staticmethod
+    def _user_day(user_id: int, tz_name: Optional[str]) -> tuple[str, int]:
+        """Redis key and expiry timestamp for the user's current local day"""
+        zone = flashcards_service.get_zoneinfo(tz_name)
+        local_now = datetime.now(timezone.utc).astimezone(zone)
+        local_midnight = datetime.combine(local_now.date() + timedelta(days=1), datetime.min.time(), tzinfo=zone)
+        expire_at = int(local_midnight.timestamp()) + _GRACE_SECONDS
+        return f"tokens:{user_id}:{local_now.date().isoformat()}", expire_at
+
+    @staticmethod
+    def _global_day(day: Optional[str] = None) -> tuple[str, int]:
+        today = datetime.now(timezone.utc).date()
+        day = day or today.isoformat()
+        expire_at = int(datetime.combine(today + timedelta(days=8), datetime.min.time(), tzinfo=timezone.utc).timestamp())
+        return f"tokens:global:{day}", expire_at
+
+    async def reserve(self, user_id: int, estimate: int, tz_name: Optional[str] = None) -> int:
+        """Hold `estimate` tokens for a request. Raises TokenBudgetExceeded
+        if the user's daily limit is already used up. Returns the reserved amount."""
+        reserve_script, _ = self._scripts()
+        key, expire_at = self._user_day(user_id, tz_name)
+        result = await reserve_script(
+            keys=[key],
+            args=[int(estimate), settings.MAX_TOKENS_PER_USER_DAILY, expire_at],
+        )
+        if int(result) < 0:
+            raise TokenBudgetExceeded()
+        return int(estimate)
+
+    async def commit(self, user_id: int, reserved: int, actual: int, feature: str,
+                     tz_name: Optional[str] = None) -> int:
+        """Replace a reservation with the real usage. Returns today's total."""
+        _, commit_script = self._scripts()
+        key, expire_at = self._user_day(user_id, tz_name)
+        return int(await commit_script(
+            keys=[key],
+            args=[int(reserved), int(actual), feature, expire_at],
+        ))
+
+    async def release(self, user_id: int, reserved: int, feature: str, tz_name: Optional[str] = None) -> None:
+        """Drop a reservation for a request that failed"""
+        await self.commit(user_id, reserved, 0, feature, tz_name)
+
+    async def record_global(self, feature: str, tokens: int) -> None:
+        """Add usage to the all-users daily counters"""
+        if not tokens or not redis_service.redis:
+            return
+        key, expire_at = self._global_day()
+        async with redis_service.pipeline() as pipe:
+            pipe.hincrby(key, "total", int(tokens))
+            pipe.hincrby(key, f"feature:{feature}", int(tokens))
+            pipe.expireat(key, expire_at)
+
+    @staticmethod
+    def _parse_usage(raw: Dict[str, str]) -> Dict[str, int]:
+        usage = {"total": int(raw.get("total", 0))}
+        for field, value in raw.items():
+            if field.startswith("feature:"):
+                usage[field[len("feature:"):]] = int(value)
+        return usage
+
+    async def get_user_usage(self, user_id: int, tz_name: Optional[str] = None) -> Dict[str, int]:
+        """Today's usage for a user: {"total": n, "<feature>": n, ...}"""
+        key, _ = self._user_day(user_id, tz_name)
+        return self._parse_usage(await redis_service.hgetall(key))
+
+    async def get_global_usage(self, day: Optional[str] = None) -> Dict[str, int]:
+        """Usage across all users for a UTC day (default today)"""
+        key, _ = self._global_day(day)
+        return self._parse_usage(await redis_service.hgetall(key))
+
+
+# Global instance
+token_budget_service = TokenBudgetService()
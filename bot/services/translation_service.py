@@ -1,10 +1,18 @@
-from openai import AsyncOpenAI
 from typing import Optional, Tuple, List, Dict
+import asyncio
 import re
 import json
+import hashlib
 import aiohttp
+import logging
 from bot.config import settings
 from bot.services.redis_service import redis_service
+from bot.services.llm_gateway import llm_gateway, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from bot.services.token_budget_service import token_budget_service, FEATURE_TRANSLATOR, FEATURE_TRAINER
+from bot.utils.cache import TTLLRUCache, normalize_text
+from bot.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 
 class TranslationService:
@@ -25,8 +33,29 @@ class TranslationService:
         'внутренняя ошибка', 'невозможно обработать'
     ]
     
+    # Map language codes to full names for clarity
+    LANG_NAMES = {
+        "uk": "Ukrainian",
+        "ru": "Russian", 
+        "en": "English",
+        "de": "German"
+    }
+    
+    # Sentence style variations for more engaging content
+    STYLE_VARIATIONS = [
+        "from a first-person perspective, as if someone is sharing their experience",
+        "as a dialogue line that someone might say in a real conversation",
+        "describing a relatable everyday situation with a touch of humor",
+        "expressing an opinion or feeling about something",
+        "telling a mini-story or interesting fact",
+        "as a question someone might ask in daily life",
+        "with a slight emotional undertone (happiness, curiosity, surprise)",
+        "describing a sensory experience (what someone sees, hears, or feels)",
+        "as advice or a life tip someone might share",
+        "about a common problem or funny mishap",
+    ]
+    
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.german_articles = {
             "der": "masculine",
             "die": "feminine", 
@@ -40,16 +69,28 @@ class TranslationService:
             "ru": "ru-RU",
             "uk": "uk-UA",
         }
+        # Coalesce identical in-flight OpenAI requests
+        self._translate_flight = SingleFlight("translate")
+        self._check_flight = SingleFlight("check_translation")
+        # Long-lived LanguageTool HTTP session (created lazily inside the event loop)
+        self._lt_session: Optional[aiohttp.ClientSession] = None
+        # LT matches keyed by (language, normalized text)
+        self._lt_cache = TTLLRUCache(settings.LANGUAGETOOL_CACHE_SIZE, 86400)
     
     async def translate(
         self, 
         text: str, 
         source_lang: str, 
         target_lang: str,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        feature: str = FEATURE_TRANSLATOR,
+        timezone: Optional[str] = None
     ) -> Tuple[str, int]:
         """
-        Translate text using OpenAI API with caching
+        Translate text using OpenAI API with caching.
+        With user_id the call is charged to the user's daily budget
+        (calendar day in `timezone`) under `feature`.
         Returns: (translation, tokens_used)
         """
         # Check cache first
@@ -57,12 +98,69 @@ class TranslationService:
         if cached:
             return cached, 0
         
-        # Check token limit
+        # Hold an estimate against the daily limit (raises when it's used up)
+        reserved = 0
         if user_id:
-            tokens_used_today = await redis_service.get_user_tokens_today(user_id)
-            if tokens_used_today >= settings.MAX_TOKENS_PER_USER_DAILY:
-                raise Exception("Daily token limit reached")
+            reserved = await token_budget_service.reserve(
+                user_id, self._estimate_translation_tokens(text), timezone
+            )
+        
+        started = False
+        
+        async def _call() -> Tuple[str, int]:
+            # Runs detached from the caller, so it settles the reservation itself
+            nonlocal started
+            started = True
+            try:
+                translation, tokens_used = await self._translate_uncached(
+                    text, source_lang, target_lang, priority, feature
+                )
+                if reserved:
+                    await token_budget_service.commit(user_id, reserved, tokens_used, feature, timezone)
+            except BaseException:
+                if reserved:
+                    await self._release_reservation(user_id, reserved, feature, timezone)
+                raise
+            return translation, tokens_used
         
+        async def _recheck():
+            cached = await redis_service.get_cached_translation(text, source_lang, target_lang)
+            return (cached, 0) if cached else None
+        
+        # Identical concurrent requests (same cache key) share one API call;
+        # its tokens are charged to the caller that made it
+        try:
+            return await self._translate_flight.do(
+                redis_service._generate_cache_key(text, source_lang, target_lang),
+                _call,
+                recheck=_recheck,
+                lock_ttl_ms=settings.OPENAI_SINGLE_FLIGHT_LOCK_MS,
+            )
+        finally:
+            if reserved and not started:
+                # Served by another caller's request
+                await self._release_reservation(user_id, reserved, feature, timezone)
+    
+    @staticmethod
+    async def _release_reservation(user_id: int, reserved: int, feature: str, timezone: Optional[str]):
+        try:
+            await token_budget_service.release(user_id, reserved, feature, timezone)
+        except Exception as e:
+            logger.warning(f"Failed to release token reservation for {user_id}: {e}")
+    
+    @staticmethod
+    def _estimate_translation_tokens(text: str) -> int:
+        # Prompt overhead + source text (~4 chars/token) + translation of similar length
+        return 60 + len(text) // 4 + min(500, len(text) // 3 + 20)
+    
+    async def _translate_uncached(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        feature: str = FEATURE_TRANSLATOR
+    ) -> Tuple[str, int]:
         # Prepare prompt based on target language
         if target_lang == "de":
             prompt = f"Translate the following text to German. If it's a noun, include the appropriate article (der/die/das). Provide only the translation without explanations.\n\nText: {text}"
@@ -73,12 +171,15 @@ class TranslationService:
             prompt = f"Translate the following text from {source_lang} to {target_lang}. Provide only the translation without explanations.\n\nText: {text}"
         
         # Call OpenAI API
-        response = await self.client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a professional translator."},
                 {"role": "user", "content": prompt}
             ],
+            priority=priority,
+            purpose="translate",
+            feature=feature,
             temperature=0.3,
             max_tokens=500
         )
@@ -89,28 +190,12 @@ class TranslationService:
         # Cache the translation
         await redis_service.cache_translation(text, source_lang, target_lang, translation)
         
-        # Update user token count
-        if user_id:
-            await redis_service.increment_user_tokens(user_id, tokens_used)
-        
         return translation, tokens_used
     
-    async def generate_sentence(self, difficulty: str, target_lang: str, interface_lang: str, topic=None, user_id: int = None) -> str:
-        """Generate a sentence for daily trainer.
-        If user_id is provided, avoids generating sentences the user has already mastered (100% quality).
-        """
-        from bot.models.database import TrainerTopic, TOPIC_METADATA
-        from bot.services import mongo_service
+    def _sentence_prompt_context(self, difficulty: str, interface_lang: str, topic=None) -> Dict[str, str]:
+        """Shared prompt pieces for trainer sentence generation."""
+        from bot.models.database import TrainerTopic
         import random
-        import hashlib
-        
-        # Map language codes to full names for clarity
-        lang_names = {
-            "uk": "Ukrainian",
-            "ru": "Russian", 
-            "en": "English",
-            "de": "German"
-        }
         
         difficulty_descriptions = {
             "A2": "elementary level (A2)",
@@ -161,64 +246,55 @@ class TranslationService:
             TrainerTopic.FUTURE_WORK: "work of the future (automation, remote work, work-life balance)",
         }
         
-        interface_lang_name = lang_names.get(interface_lang, interface_lang)
-        
-        # Get mastered sentence hashes if user_id provided
-        mastered_hashes = set()
-        if user_id and mongo_service.is_ready():
-            topic_value = topic.value if topic and topic != TrainerTopic.RANDOM else None
-            mastered_hashes = set(await mongo_service.get_mastered_sentences_hashes(user_id, topic_value))
-        
-        def _hash_sentence(sentence: str) -> str:
-            """Create a normalized hash of a sentence for comparison."""
-            normalized = ' '.join(sentence.lower().strip().split())
-            return hashlib.md5(normalized.encode('utf-8')).hexdigest()
-        
         # Handle topic selection
-        topic_instruction = ""
         if topic and topic != TrainerTopic.RANDOM:
             topic_desc = topic_descriptions.get(topic, "general topic")
-            topic_instruction = f" about the topic: {topic_desc}"
-        elif not topic or topic == TrainerTopic.RANDOM:
+        else:
             # Select random topic
             available_topics = [t for t in TrainerTopic if t != TrainerTopic.RANDOM]
             random_topic = random.choice(available_topics)
             topic_desc = topic_descriptions.get(random_topic, "general topic")
-            topic_instruction = f" about the topic: {topic_desc}"
         
-        # Sentence style variations for more engaging content
-        style_variations = [
-            "from a first-person perspective, as if someone is sharing their experience",
-            "as a dialogue line that someone might say in a real conversation",
-            "describing a relatable everyday situation with a touch of humor",
-            "expressing an opinion or feeling about something",
-            "telling a mini-story or interesting fact",
-            "as a question someone might ask in daily life",
-            "with a slight emotional undertone (happiness, curiosity, surprise)",
-            "describing a sensory experience (what someone sees, hears, or feels)",
-            "as advice or a life tip someone might share",
-            "about a common problem or funny mishap",
-        ]
+        return {
+            "interface_lang_name": self.LANG_NAMES.get(interface_lang, interface_lang),
+            "difficulty_desc": difficulty_descriptions.get(difficulty, 'A2'),
+            "length_limit": sentence_length_limits.get(difficulty, "6-12 words"),
+            "topic_instruction": f" about the topic: {topic_desc}",
+        }
+
+    async def _is_mastered(self, user_id: Optional[int], sentence: str) -> bool:
+        """O(1) check against the user's mastered-sentence index."""
+        if not user_id:
+            return False
+        from bot.services.mastered_index_service import mastered_index_service
+        return await mastered_index_service.is_mastered(user_id, sentence)
+    
+    async def generate_sentence(self, difficulty: str, target_lang: str, interface_lang: str, topic=None, user_id: int = None,
+                                priority: int = PRIORITY_BACKGROUND, max_attempts: int = 5) -> str:
+        """Generate a sentence for daily trainer.
+        If user_id is provided, avoids generating sentences the user has already mastered (100% quality),
+        making up to `max_attempts` completions.
+        """
+        import random
         
-        # Try up to 5 times to generate a non-mastered sentence
-        max_attempts = 5
-        length_limit = sentence_length_limits.get(difficulty, "6-12 words")
+        ctx = self._sentence_prompt_context(difficulty, interface_lang, topic)
+        interface_lang_name = ctx["interface_lang_name"]
         
         for attempt in range(max_attempts):
-            selected_style = random.choice(style_variations)
+            selected_style = random.choice(self.STYLE_VARIATIONS)
             
             # Add uniqueness instruction on retries
             uniqueness_hint = ""
             if attempt > 0:
                 uniqueness_hint = f"\n- This is attempt {attempt + 1}, so create something completely different from typical sentences"
             
-            prompt = f"""Generate a lively, natural sentence in {interface_lang_name} at {difficulty_descriptions.get(difficulty, 'A2')} difficulty level{topic_instruction}.
+            prompt = f"""Generate a lively, natural sentence in {interface_lang_name} at {ctx['difficulty_desc']} difficulty level{ctx['topic_instruction']}.
 
 Style: {selected_style}
 
 Requirements:
 - CRITICAL: The sentence MUST be grammatically perfect in {interface_lang_name}. Double-check verb conjugations, cases, and word endings.
-- IMPORTANT: Keep the sentence SHORT - exactly {length_limit}. No longer!
+- IMPORTANT: Keep the sentence SHORT - exactly {ctx['length_limit']}. No longer!
 - Make it feel like something a real person would actually say
 - Include concrete details, names, or specific situations when appropriate
 - Avoid generic or textbook-style sentences
@@ -228,8 +304,11 @@ Requirements:
 
 Provide only the sentence without any explanations."""
             
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.chat(
                 model="gpt-4o",
+                priority=priority,
+                purpose="generate_sentence",
+                feature=FEATURE_TRAINER,
                 messages=[
                     {"role": "system", "content": f"You are a native {interface_lang_name} speaker and creative language teacher. You create engaging, memorable practice sentences with PERFECT grammar. Your sentences feel alive - they tell mini-stories, express real emotions, and describe situations that learners can relate to. NEVER make grammar mistakes - always verify verb forms, noun cases, and word endings are correct in {interface_lang_name}."},
                     {"role": "user", "content": prompt}
@@ -241,8 +320,7 @@ Provide only the sentence without any explanations."""
             sentence = response.choices[0].message.content.strip()
             
             # Check if this sentence is already mastered
-            sentence_hash = _hash_sentence(sentence)
-            if sentence_hash not in mastered_hashes:
+            if not await self._is_mastered(user_id, sentence):
                 return sentence
             
             # If mastered, try again with higher temperature
@@ -250,22 +328,238 @@ Provide only the sentence without any explanations."""
         # After max attempts, return the last generated sentence anyway
         # (very unlikely to hit this with GPT's randomness)
         return sentence
+
+    @staticmethod
+    def _parse_generated_task(raw: str) -> Optional[Dict[str, str]]:
+        """Validate the JSON returned by the combined generation prompt.
+        Returns {"sentence", "translation", "hint"} or None if the schema doesn't match."""
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        
+        sentence = data.get("sentence")
+        translation = data.get("translation")
+        hint = data.get("hint") or ""
+        if not isinstance(sentence, str) or not isinstance(translation, str) or not isinstance(hint, str):
+            return None
+        sentence, translation, hint = sentence.strip(), translation.strip(), hint.strip()
+        if not sentence or not translation:
+            return None
+        # A trainer sentence is a single short line; anything longer is a broken completion
+        if len(sentence) > 300 or len(translation) > 300 or "\n" in sentence:
+            return None
+        return {"sentence": sentence, "translation": translation, "hint": hint[:200]}
+
+    async def generate_task(self, difficulty: str, target_lang: str, interface_lang: str, topic=None, user_id: int = None,
+                            priority: int = PRIORITY_BACKGROUND) -> Dict[str, str]:
+        """Generate a trainer task (sentence, reference translation, short hint) in one completion.
+        Falls back to one generate_sentence + translate if no structured answer was usable;
+        gateway errors are raised rather than retried through the fallback.
+        Returns: {"sentence", "translation", "hint"}
+        """
+        import random
+        
+        ctx = self._sentence_prompt_context(difficulty, interface_lang, topic)
+        interface_lang_name = ctx["interface_lang_name"]
+        target_lang_name = self.LANG_NAMES.get(target_lang, target_lang)
+        
+        article_rule = ""
+        if target_lang == "de":
+            article_rule = "\n- In the German translation use correct articles (der/die/das), cases and capitalization of nouns."
+        
+        max_attempts = 3
+        mastered_task = None
+        for attempt in range(max_attempts):
+            selected_style = random.choice(self.STYLE_VARIATIONS)
+            uniqueness_hint = ""
+            if attempt > 0:
+                uniqueness_hint = f"\n- This is attempt {attempt + 1}, so create something completely different from typical sentences"
+            
+            prompt = f"""Create a translation exercise.
+
+1. "sentence": a lively, natural sentence in {interface_lang_name} at {ctx['difficulty_desc']} difficulty level{ctx['topic_instruction']}.
+   Style: {selected_style}
+   - CRITICAL: grammatically perfect in {interface_lang_name}
+   - IMPORTANT: exactly {ctx['length_limit']}, ONE simple idea, no compound sentences
+   - Feels like something a real person would say, with concrete details; avoid textbook phrasing{uniqueness_hint}
+2. "translation": the natural reference translation of that sentence into {target_lang_name}.{article_rule}
+3. "hint": one short tip in {interface_lang_name} (max 12 words) about the key word or grammar point of the translation, without giving the full answer.
+
+Return STRICT JSON only: {{"sentence":"...","translation":"...","hint":"..."}}"""
+            
+            try:
+                response = await llm_gateway.chat(
+                    model="gpt-4o",
+                    priority=priority,
+                    purpose="generate_task",
+                    feature=FEATURE_TRAINER,
+                    messages=[
+                        {"role": "system", "content": f"You are a native {interface_lang_name} speaker, a professional {target_lang_name} translator and a creative language teacher. NEVER make grammar mistakes. Respond with strict JSON only."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.8,
+                    max_tokens=300,
+                    response_format={"type": "json_object"},
+                )
+            except Exception as e:
+                # More calls won't help a failing or rate-limited API
+                logger.warning(f"Combined task generation failed: {e}")
+                raise
+            
+            task = self._parse_generated_task(response.choices[0].message.content)
+            if task is None:
+                continue
+            if await self._is_mastered(user_id, task["sentence"]):
+                mastered_task = task
+                continue
+            
+            # Seed the translation cache so later lookups of this sentence are free
+            await redis_service.cache_translation(task["sentence"], interface_lang, target_lang, task["translation"])
+            return task
+        
+        if mastered_task is not None:
+            # Like generate_sentence, settle for an already mastered sentence rather than call again
+            await redis_service.cache_translation(
+                mastered_task["sentence"], interface_lang, target_lang, mastered_task["translation"]
+            )
+            return mastered_task
+        
+        # Fallback: the original two-step path, with a single sentence attempt
+        sentence = await self.generate_sentence(
+            difficulty, target_lang, interface_lang, topic, user_id=user_id, priority=priority, max_attempts=1
+        )
+        translation, _ = await self.translate(
+            sentence,
+            interface_lang,
+            target_lang,
+            None,  # Don't count tokens for system-generated tasks
+            priority=priority,
+            feature=FEATURE_TRAINER
+        )
+        return {"sentence": sentence, "translation": translation, "hint": ""}
     
+    # Punctuation variants that shouldn't make two answers differ
+    _ANSWER_CHAR_MAP = str.maketrans({
+        "’": "'", "‘": "'", "`": "'", "´": "'",
+        "“": '"', "”": '"', "„": '"', "«": '"', "»": '"',
+        "–": "-", "—": "-", "\u00a0": " ",
+    })
+
+    @classmethod
+    def _normalize_answer(cls, text: str, lang: str) -> str:
+        """Comparison form of an answer: unified quotes/dashes, single spaces,
+        no space before punctuation, no terminal punctuation. Case matters
+        (the grading counts capitalization errors) except for the first letter."""
+        text = normalize_text(text, casefold=False).translate(cls._ANSWER_CHAR_MAP)
+        text = re.sub(r"\s+([,.!?;:])", r"\1", text)
+        text = text.strip(" .!?…;:\"'")
+        return text[:1].lower() + text[1:]
+
+    @staticmethod
+    def _graded_cache_key(original: str, user_translation: str, expected_lang: str, interface_lang: str) -> str:
+        # Only whitespace/Unicode is normalized: case and punctuation affect the grade
+        raw = "\x1f".join([
+            normalize_text(original, casefold=False),
+            normalize_text(user_translation, casefold=False),
+        ])
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return f"graded:{expected_lang}:{interface_lang}:{digest}"
+
+    async def _get_graded_verdict(self, key: str) -> Optional[Tuple[bool, str, str, int]]:
+        try:
+            raw = await redis_service.get(key)
+            if raw:
+                is_correct, correct_translation, explanation, quality = json.loads(raw)
+                return bool(is_correct), correct_translation, explanation, int(quality)
+        except Exception:
+            pass
+        return None
+
+    @staticmethod
+    def _default_explanation(interface_lang: str, is_correct: bool) -> str:
+        if interface_lang == "uk":
+            return (
+                "Переклад відповідає оригіналу без граматичних помилок." if is_correct
+                else "У відповіді виявлено помилки. Перевірте артиклі, відмінки, орфографію та порядок слів."
+            )
+        # Russian
+        return (
+            "Перевод соответствует оригиналу без грамматических ошибок." if is_correct
+            else "В ответе обнаружены ошибки. Проверьте артикли, падежи, орфографию и порядок слов."
+        )
+
     async def check_translation(
         self,
         original: str,
         user_translation: str,
         expected_lang: str,
-        interface_lang: str
+        interface_lang: str,
+        expected_translation: Optional[str] = None
     ) -> Tuple[bool, str, str, int]:
         """
         Strictly evaluate a translation attempt.
+        Answers matching `expected_translation` (up to punctuation, spacing and
+        the first letter's case) or a previously graded identical answer are returned without an
+        API call; only unseen answers reach the model.
         Returns: (is_correct, correct_translation, explanation, quality_percentage)
         """
+        # Exact reference answer: nothing for the model to add
+        if expected_translation and (
+            self._normalize_answer(user_translation, expected_lang)
+            == self._normalize_answer(expected_translation, expected_lang)
+        ):
+            return True, expected_translation, self._default_explanation(interface_lang, True), 100
+
+        # Same answer to the same sentence was graded before
+        graded_key = self._graded_cache_key(original, user_translation, expected_lang, interface_lang)
+        cached = await self._get_graded_verdict(graded_key)
+        if cached:
+            return cached
+
+        async def _grade() -> Tuple[bool, str, str, int]:
+            verdict, reliable = await self._check_translation_uncached(
+                original, user_translation, expected_lang, interface_lang
+            )
+            # A fallback verdict (unparsed reply, LanguageTool timeout, no correction) is not reused
+            if reliable:
+                try:
+                    await redis_service.set(graded_key, json.dumps(verdict), ex=settings.GRADED_VERDICT_TTL_SECONDS)
+                except Exception:
+                    pass
+            return verdict
+
+        # The same answer submitted twice (double send, retries) is graded once
+        return await self._check_flight.do(
+            graded_key,
+            _grade,
+            recheck=lambda: self._get_graded_verdict(graded_key),
+            lock_ttl_ms=settings.OPENAI_SINGLE_FLIGHT_LOCK_MS,
+        )
+    
+    async def _check_translation_uncached(
+        self,
+        original: str,
+        user_translation: str,
+        expected_lang: str,
+        interface_lang: str
+    ) -> Tuple[Tuple[bool, str, str, int], bool]:
+        """Grade with the model (and LanguageTool). Returns the verdict and whether
+        it is reliable enough to cache: the reply parsed as JSON, LanguageTool
+        answered (if enabled) and a correct translation is known."""
         # Language names for prompt clarity
         lang_names = {"uk": "Ukrainian", "ru": "Russian", "en": "English", "de": "German"}
         interface_lang_name = lang_names.get(interface_lang, interface_lang)
         expected_lang_name = lang_names.get(expected_lang, expected_lang)
+        u = user_translation.strip()
+
+        # Start the LanguageTool check now so it runs alongside the LLM evaluation
+        lt_task: Optional[asyncio.Task] = None
+        if settings.LANGUAGETOOL_ENABLED and settings.LANGUAGETOOL_URL:
+            lt_lang = self.lt_lang_map.get(expected_lang.lower(), expected_lang)
+            lt_task = asyncio.create_task(self._languagetool_check_cached(u, lt_lang))
 
         # Strict JSON-only evaluation prompt
         eval_prompt = f"""
@@ -293,15 +587,22 @@ Rules:
 - Explanations in errors must be in {interface_lang_name} and name concrete issues (article/case/verb/word order/orthography), with correct forms.
 """.strip()
 
-        response = await self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a strict language teacher for precise grammar checking. Respond with strict JSON only."},
-                {"role": "user", "content": eval_prompt},
-            ],
-            temperature=0.1,
-            max_tokens=400,
-        )
+        try:
+            response = await llm_gateway.chat(
+                model="gpt-4o",
+                purpose="check_translation",
+                feature=FEATURE_TRAINER,
+                messages=[
+                    {"role": "system", "content": "You are a strict language teacher for precise grammar checking. Respond with strict JSON only."},
+                    {"role": "user", "content": eval_prompt},
+                ],
+                temperature=0.1,
+                max_tokens=400,
+            )
+        except BaseException:
+            if lt_task is not None:
+                lt_task.cancel()
+            raise
 
         raw = (response.choices[0].message.content or "").strip()
 
@@ -389,13 +690,12 @@ Rules:
         # Ensure we always provide a correct translation string
         if not correct_translation:
             try:
-                correct_translation, _ = await self.translate(original, interface_lang, expected_lang, None)
+                correct_translation, _ = await self.translate(original, interface_lang, expected_lang, None, feature=FEATURE_TRAINER)
             except Exception:
                 correct_translation = ""
 
         # Language-specific rule-based penalties and corrections
         penalties = 0
-        u = user_translation.strip()
         u_lower = u.lower()
         
         def penalize(reason: str, amount: int = 10):
@@ -448,10 +748,11 @@ Rules:
 
         # LanguageTool grammar check (deterministic). Non-fatal if unavailable.
         lt_matches: List[Dict] = []
-        if settings.LANGUAGETOOL_ENABLED and settings.LANGUAGETOOL_URL:
+        lt_completed = lt_task is None
+        if lt_task is not None:
             try:
-                lt_lang = self.lt_lang_map.get(expected_lang.lower(), expected_lang)
-                lt_matches = await self._languagetool_check(text=u, language=lt_lang)
+                lt_matches = await lt_task
+                lt_completed = lt_matches is not None
                 if lt_matches:
                     # Penalize per match, capped
                     penalty_per_issue = 6
@@ -478,22 +779,48 @@ Rules:
         explanation = "\n".join(errors_list).strip()
         if not explanation:
             # Provide minimal educational note even when perfect
-            if interface_lang == "uk":
-                explanation = (
-                    "Переклад відповідає оригіналу без граматичних помилок." if is_correct
-                    else "У відповіді виявлено помилки. Перевірте артиклі, відмінки, орфографію та порядок слів."
-                )
-            else:  # Russian
-                explanation = (
-                    "Перевод соответствует оригиналу без грамматических ошибок." if is_correct
-                    else "В ответе обнаружены ошибки. Проверьте артикли, падежи, орфографию и порядок слов."
-                )
+            explanation = self._default_explanation(interface_lang, is_correct)
 
-        return is_correct, correct_translation, explanation, quality_percentage
+        reliable = json_parsed and lt_completed and bool(correct_translation)
+        return (is_correct, correct_translation, explanation, quality_percentage), reliable
+
+    async def _get_lt_session(self) -> aiohttp.ClientSession:
+        if self._lt_session is None or self._lt_session.closed:
+            self._lt_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.LANGUAGETOOL_TIMEOUT_SECONDS),
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60),
+            )
+        return self._lt_session
+
+    async def close(self):
+        """Close pooled HTTP sessions"""
+        if self._lt_session and not self._lt_session.closed:
+            await self._lt_session.close()
+        self._lt_session = None
+
+    async def _languagetool_check_cached(self, text: str, language: str) -> Optional[List[Dict]]:
+        """LanguageTool matches with a per-call deadline and an in-process cache.
+        Returns None when LT is slow or unavailable (not cached)."""
+        # Whitespace/Unicode only: case matters to LanguageTool
+        text = normalize_text(text, casefold=False)
+        cache_key = (language, text)
+        cached = self._lt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            matches = await asyncio.wait_for(
+                self._languagetool_check(text=text, language=language),
+                timeout=settings.LANGUAGETOOL_TIMEOUT_SECONDS,
+            )
+        except Exception as e:
+            logger.debug(f"LanguageTool check skipped: {e!r}")
+            return None
+        self._lt_cache.set(cache_key, matches)
+        return matches
 
     async def _languagetool_check(self, text: str, language: str) -> List[Dict]:
         """Call LanguageTool HTTP server /v2/check and return matches list.
-        Non-raising: returns [] on any error.
+        Raises on transport/HTTP errors; callers treat LT as optional.
         """
         base = settings.LANGUAGETOOL_URL.rstrip("/")
         url = f"{base}/v2/check"
@@ -502,25 +829,23 @@ Rules:
             "language": language,
             "enabledOnly": "false",
         }
-        timeout = aiohttp.ClientTimeout(total=6)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(url, data=data) as resp:
-                if resp.status != 200:
-                    return []
-                payload = await resp.json(content_type=None)
-                matches = payload.get("matches") or []
-                # Normalize a bit
-                norm: List[Dict] = []
-                for m in matches:
-                    if isinstance(m, dict):
-                        norm.append({
-                            "message": m.get("message"),
-                            "shortMessage": m.get("shortMessage"),
-                            "offset": m.get("offset"),
-                            "length": m.get("length"),
-                            "rule": m.get("rule") or {},
-                        })
-                return norm
+        session = await self._get_lt_session()
+        async with session.post(url, data=data) as resp:
+            resp.raise_for_status()
+            payload = await resp.json(content_type=None)
+            matches = payload.get("matches") or []
+            # Normalize a bit
+            norm: List[Dict] = []
+            for m in matches:
+                if isinstance(m, dict):
+                    norm.append({
+                        "message": m.get("message"),
+                        "shortMessage": m.get("shortMessage"),
+                        "offset": m.get("offset"),
+                        "length": m.get("length"),
+                        "rule": m.get("rule") or {},
+                    })
+            return norm
 
 
 translation_service = TranslationService()
@@ -0,0 +1,212 @@
+"""
+Write-behind buffer for commutative counter updates in MongoDB.
+
+Hot paths (trainer answers, flashcard reviews, activity points) queue their
+`$inc`/`$max` updates here instead of awaiting a write each. Updates to the
+same document are merged: `$inc` amounts add up, `$max` keeps the largest
+value, `$set` keeps the latest value and `$setOnInsert` the first one. The
+merged updates are flushed as one unordered `bulk_write` per collection
+every WRITE_BUFFER_FLUSH_INTERVAL_MS, or sooner when WRITE_BUFFER_MAX_PENDING
+documents are waiting.
+
+Readers of buffered collections call `flush()` with the filter they are
+about to query, so this process always reads its own writes. `stop()`
+flushes everything that is left. Before `start()`, and after `stop()`,
+updates are written directly.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_FLUSH_ATTEMPTS = 3  # A failed update is requeued this many times, then dropped
+
+
+def _freeze(filter_doc: Dict[str, Any]) -> Tuple[Tuple[str, Hashable], ...]:
+    return tuple(sorted(filter_doc.items()))
+
+
+class _PendingWrite:
+    __slots__ = ("filter", "inc", "max", "set", "set_on_insert", "upsert", "attempts")
+
+    def __init__(self, filter_doc: Dict[str, Any], upsert: bool):
+        self.filter = filter_doc
+        self.inc: Dict[str, Any] = {}
+        self.max: Dict[str, Any] = {}
+        self.set: Dict[str, Any] = {}
+        self.set_on_insert: Dict[str, Any] = {}
+        self.upsert = upsert
+        self.attempts = 0
+
+    def merge(self, inc=None, max_=None, set_=None, set_on_insert=None, older: bool = False):
+        """Fold another update into this one. `older` updates don't override `$set` values."""
+        for field, amount in (inc or {}).items():
+            self.inc[field] = self.inc.get(field, 0) + amount
+        for field, value in (max_ or {}).items():
+            if field not in self.max or value > self.max[field]:
+                self.max[field] = value
+        for field, value in (set_ or {}).items():
+            if not older or field not in self.set:
+                self.set[field] = value
+        for field, value in (set_on_insert or {}).items():
+            if older or field not in self.set_on_insert:
+                self.set_on_insert[field] = value
+
+    def matches(self, filter_doc: Optional[Dict[str, Any]]) -> bool:
+        return not filter_doc or all(self.filter.get(k) == v for k, v in filter_doc.items())
+
+    def to_update(self) -> Dict[str, Dict[str, Any]]:
+        # A field can only appear under one operator; the insert default yields
+        # to a merged $inc/$max/$set of the same field
+        set_on_insert = {
+            field: value for field, value in self.set_on_insert.items()
+            if field not in self.inc and field not in self.max and field not in self.set
+        }
+        update = {}
+        for operator, values in (("$inc", self.inc), ("$max", self.max),
+                                 ("$set", self.set), ("$setOnInsert", set_on_insert)):
+            if values:
+                update[operator] = values
+        return update
+
+
+class WriteBufferService:
+    """Merges and batches counter updates, flushing them in the background"""
+
+    def __init__(self):
+        self._pending: Dict[str, Dict[tuple, _PendingWrite]] = {}
+        self._size = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+        self.queued = 0
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the background flusher"""
+        if self._task:
+            return
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="write-buffer")
+        logger.info("Write-behind buffer started")
+
+    async def stop(self):
+        """Stop the flusher and write everything still buffered"""
+        if not self._task:
+            return
+        # Let a flush in progress finish instead of cancelling it halfway
+        self._stopping = True
+        self._wake.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+        logger.info(f"Write-behind buffer stopped: {self.written} writes, {self.failed} dropped")
+
+    async def add(self, collection: str, filter_doc: Dict[str, Any], *, inc: Dict[str, Any] = None,
+                  max_: Dict[str, Any] = None, set_: Dict[str, Any] = None,
+                  set_on_insert: Dict[str, Any] = None, upsert: bool = True):
+        """Queue an update of the document matching `filter_doc` (an exact-match filter)"""
+        if not self._task:
+            op = _PendingWrite(filter_doc, upsert)
+            op.merge(inc, max_, set_, set_on_insert)
+            from bot.services import mongo_service
+            await mongo_service.db()[collection].update_one(filter_doc, op.to_update(), upsert=upsert)
+            return
+
+        pending = self._pending.setdefault(collection, {})
+        key = _freeze(filter_doc)
+        op = pending.get(key)
+        if op is None:
+            op = pending[key] = _PendingWrite(filter_doc, upsert)
+            self._size += 1
+        op.merge(inc, max_, set_, set_on_insert)
+        self.queued += 1
+        if self._size >= settings.WRITE_BUFFER_MAX_PENDING:
+            self._wake.set()
+
+    async def flush(self, collection: str = None, filter_doc: Dict[str, Any] = None):
+        """Write buffered updates now: all of them, those of one collection, or
+        those whose filter contains `filter_doc`. Waits for a flush already in progress."""
+        if self._lock is None:
+            return
+        async with self._lock:
+            batch = self._take(collection, filter_doc)
+            if batch:
+                await asyncio.gather(*(self._write(name, ops) for name, ops in batch.items()))
+
+    def pending_count(self) -> int:
+        return self._size
+
+    def _take(self, collection: Optional[str], filter_doc: Optional[Dict[str, Any]]) -> Dict[str, List[_PendingWrite]]:
+        names = [collection] if collection else list(self._pending)
+        batch: Dict[str, List[_PendingWrite]] = {}
+        for name in names:
+            pending = self._pending.get(name)
+            if not pending:
+                continue
+            keys = [key for key, op in pending.items() if op.matches(filter_doc)]
+            if keys:
+                batch[name] = [pending.pop(key) for key in keys]
+                self._size -= len(keys)
+        return batch
+
+    async def _write(self, collection: str, ops: List[_PendingWrite]):
+        from bot.services import mongo_service
+        requests = [UpdateOne(op.filter, op.to_update(), upsert=op.upsert) for op in ops]
+        try:
+            await mongo_service.db()[collection].bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Buffered {collection} writes: {len(failed)} of {len(ops)} failed")
+            self.written += len(ops) - len(failed)
+            self._requeue(collection, [ops[i] for i in sorted(failed)])
+            return
+        except Exception as e:
+            logger.error(f"Buffered {collection} writes failed: {e}")
+            self._requeue(collection, ops)
+            return
+        self.written += len(ops)
+
+    def _requeue(self, collection: str, ops: List[_PendingWrite]):
+        pending = self._pending.setdefault(collection, {})
+        for op in ops:
+            op.attempts += 1
+            if op.attempts >= MAX_FLUSH_ATTEMPTS:
+                self.failed += 1
+                logger.error(f"Dropping buffered {collection} update for {op.filter}: {op.to_update()}")
+                continue
+            key = _freeze(op.filter)
+            newer = pending.get(key)
+            if newer is None:
+                pending[key] = op
+                self._size += 1
+            else:
+                newer.merge(op.inc, op.max, op.set, op.set_on_insert, older=True)
+                newer.attempts = max(newer.attempts, op.attempts)
+
+    async def _run(self):
+        interval = max(0.05, settings.WRITE_BUFFER_FLUSH_INTERVAL_MS / 1000)
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush error: {e}")
+
+
+# Global instance
+write_buffer_service = WriteBufferService()
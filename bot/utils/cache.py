@@ -0,0 +1,71 @@
+"""
+In-process caching helpers.
+"""
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def normalize_text(text: str, *, casefold: bool = True) -> str:
+    """Canonical form of a text for cache keys: NFC, trimmed,
+    single spaces, case-folded. "Hallo Welt" == " hallo  welt "."""
+    text = " ".join(unicodedata.normalize("NFC", text or "").split())
+    return text.casefold() if casefold else text
+
+
+class TTLLRUCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss counters.
+
+    Meant to be used from the single asyncio event loop (no locking).
+    A max_size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if not self.max_size:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,98 @@
+"""
+Compact binary encoding for large values cached in Redis.
+
+Encoded values start with a 4-byte header: the magic b"SM", a format
+version and a flags byte naming the serializer and the compression. The
+payload is msgpack (JSON when msgpack isn't installed), compressed with
+zstd (zlib without zstandard) once it exceeds a size threshold.
+
+Anything without the header is read as a legacy JSON string, so keys
+written before the switch stay readable until they expire.
+"""
+import json
+import zlib
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - JSON payloads without msgpack
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zlib compression without zstandard
+    zstandard = None
+
+MAGIC = b"SM"
+VERSION = 1
+HEADER_SIZE = 4
+
+# Flags: low nibble = serializer, high nibble = compression
+SERIALIZER_JSON = 0x00
+SERIALIZER_MSGPACK = 0x01
+COMPRESSION_NONE = 0x00
+COMPRESSION_ZLIB = 0x10
+COMPRESSION_ZSTD = 0x20
+
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+class CodecError(ValueError):
+    """Raised for values with a header this build can't read"""
+
+
+def encode_value(value: Any, compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES) -> bytes:
+    """Serialize `value` with a header; compress payloads of `compress_min_bytes` or more
+    (a negative threshold disables compression)"""
+    if msgpack is not None:
+        payload = msgpack.packb(value, use_bin_type=True)
+        flags = SERIALIZER_MSGPACK
+    else:
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        flags = SERIALIZER_JSON
+
+    if 0 <= compress_min_bytes <= len(payload):
+        if zstandard is not None:
+            payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+            flags |= COMPRESSION_ZSTD
+        else:
+            payload = zlib.compress(payload, ZLIB_LEVEL)
+            flags |= COMPRESSION_ZLIB
+
+    return MAGIC + bytes((VERSION, flags)) + payload
+
+
+def decode_value(raw: Optional[bytes | str]) -> Any:
+    """Inverse of `encode_value`; values without a header are parsed as legacy JSON"""
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        return json.loads(raw)
+    if not raw.startswith(MAGIC) or len(raw) < HEADER_SIZE:
+        return json.loads(raw.decode("utf-8"))
+
+    version, flags = raw[2], raw[3]
+    if version != VERSION:
+        raise CodecError(f"Unsupported value version {version}")
+    payload = raw[HEADER_SIZE:]
+
+    compression = flags & 0xF0
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise CodecError("zstd-compressed value but zstandard is not installed")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif compression == COMPRESSION_ZLIB:
+        payload = zlib.decompress(payload)
+    elif compression != COMPRESSION_NONE:
+        raise CodecError(f"Unknown compression flag {compression:#x}")
+
+    serializer = flags & 0x0F
+    if serializer == SERIALIZER_MSGPACK:
+        if msgpack is None:
+            raise CodecError("msgpack value but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if serializer == SERIALIZER_JSON:
+        return json.loads(payload.decode("utf-8"))
+    raise CodecError(f"Unknown serializer flag {serializer:#x}")
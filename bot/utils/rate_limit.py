@@ -0,0 +1,68 @@
+"""
+Async rate limiting primitives.
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per `per` seconds.
+
+    `acquire` waits until enough tokens are available. `adjust` corrects a
+    reservation once the real cost is known; the balance may go negative,
+    which simply delays later callers.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, per: float = 1.0, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.per = float(per)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate / self.per)
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """Take tokens if available right now"""
+        if not self.enabled:
+            return True
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return True
+        return False
+
+    def delay_for(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` tokens will be available"""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self._tokens
+        return max(0.0, missing * self.per / self.rate)
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait for and take `amount` tokens. Returns seconds waited."""
+        waited = 0.0
+        while not self.try_acquire(amount):
+            delay = max(self.delay_for(amount), 0.01)
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        if not self.enabled:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
@@ -0,0 +1,117 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+Concurrent callers with the same key await one shared task instead of
+each issuing the same expensive request (e.g. an OpenAI completion). The
+task runs on its own: a caller that is cancelled stops waiting, but the
+others still get the result.
+Optionally a short Redis lock extends this across processes: a caller that
+finds the lock taken polls `recheck` (usually the shared cache the leader
+will fill) until the result shows up or the lock goes away.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Per-process registry of in-flight calls keyed by string"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0  # Callers served by someone else's call
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+        lock_ttl_ms: int = 0,
+    ) -> T:
+        """Run `fn` once per key; concurrent callers share its result.
+
+        With `recheck` and `lock_ttl_ms` set, replicas coordinate via a Redis
+        `SET NX PX` lock and followers pick the result up through `recheck`.
+        """
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.coalesced += 1
+            return await asyncio.shield(existing)
+
+        # Cancelling the first caller must not cancel the call the others wait on
+        task = asyncio.create_task(
+            self._run_locked(key, fn, recheck, lock_ttl_ms),
+            name=f"singleflight:{self.namespace}",
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark exceptions as retrieved when nobody was waiting any more
+        if not task.cancelled():
+            task.exception()
+
+    async def _run_locked(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        recheck: Optional[Callable[[], Awaitable[Optional[T]]]],
+        lock_ttl_ms: int,
+    ) -> T:
+        from bot.services.redis_service import redis_service
+
+        redis = redis_service.redis
+        if not lock_ttl_ms or recheck is None or redis is None:
+            return await fn()
+
+        lock_key = f"singleflight:{self.namespace}:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis.set(lock_key, token, nx=True, px=lock_ttl_ms)
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable ({self.namespace}): {e}")
+            return await fn()
+
+        if not acquired:
+            # Another replica is on it: wait for its result, bounded by the lock TTL
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + lock_ttl_ms / 1000
+            while loop.time() < deadline:
+                await asyncio.sleep(0.1)
+                result = await recheck()
+                if result is not None:
+                    self.coalesced += 1
+                    return result
+                if not await redis.exists(lock_key):
+                    break
+            result = await recheck()
+            if result is not None:
+                self.coalesced += 1
+                return result
+            return await fn()
+
+        try:
+            return await fn()
+        finally:
+            try:
+                await redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception:
+                pass
@@ -214,14 +214,13 @@ def build_srs_review_update(card: dict, result: str) -> dict:
 
 async def get_dashboard_payload(user_id: int) -> dict:
     """Return aggregate flashcard stats for the mini app dashboard."""
-    overview = await flashcards_service.get_user_flashcards_overview(user_id)
-    return flashcards_service.serialize_flashcard_overview(overview)
+    snapshot = await flashcards_service.get_overview_snapshot(user_id)
+    return snapshot["dashboard"]
 
 
 async def get_due_session_cards(user_id: int) -> list[dict]:
     """Return due/new cards from all sets for a mini app study session."""
-    overview = await flashcards_service.get_user_flashcards_overview(user_id)
-    cards = flashcards_service.build_today_session_cards(overview)
+    cards = await flashcards_service.get_today_session_cards(user_id)
     for card in cards:
         card["last_reviewed_at"] = serialize_mongo_value(card.get("last_reviewed_at"))
     return cards
@@ -450,11 +449,12 @@ async def review_global_session_card(request: web.Request) -> web.Response:
         if not card_id or result not in {"know", "dontknow"}:
             raise web.HTTPBadRequest(text="card_id and valid result are required")
         try:
-            await flashcards_service.review_session_card(user_id, card_id, result)
+            review = await flashcards_service.review_session_card(user_id, card_id, result)
         except LookupError as exc:
             raise web.HTTPNotFound(text=str(exc)) from exc
 
-        return web.json_response({"success": True})
+        # Dashboard change, so the mini app doesn't refetch /dashboard
+        return web.json_response({"success": True, **review})
 
     except web.HTTPException:
         raise
@@ -463,6 +463,49 @@ async def review_global_session_card(request: web.Request) -> web.Response:
         raise web.HTTPInternalServerError(text="Failed to review card")
 
 
+async def review_global_session_cards(request: web.Request) -> web.Response:
+    """Apply a batch of queued reviews from the global SRS session."""
+    user_id = get_user_id_from_request(request)
+
+    if not user_id:
+        raise web.HTTPUnauthorized(text="Invalid authentication")
+
+    if not mongo_service.is_ready():
+        raise web.HTTPServiceUnavailable(text="Database unavailable")
+
+    try:
+        data = await request.json()
+        raw_reviews = data.get("reviews") if isinstance(data, dict) else None
+        if not isinstance(raw_reviews, list) or not raw_reviews:
+            raise web.HTTPBadRequest(text="reviews must be a non-empty list")
+        if len(raw_reviews) > flashcards_service.REVIEW_BATCH_MAX_SIZE:
+            raise web.HTTPBadRequest(text="Too many reviews in one batch")
+
+        reviews = []
+        for item in raw_reviews:
+            if not isinstance(item, dict):
+                raise web.HTTPBadRequest(text="Each review must be an object")
+            review_id = str(item.get("id") or "").strip()
+            card_id = str(item.get("card_id") or "").strip()
+            result = str(item.get("result") or "").strip()
+            if not review_id or len(review_id) > 64 or not ObjectId.is_valid(card_id) or result not in {"know", "dontknow"}:
+                raise web.HTTPBadRequest(text="Each review needs an id, a card_id and a valid result")
+            try:
+                reviewed_at = datetime.fromisoformat(item["reviewed_at"]) if item.get("reviewed_at") else None
+            except (TypeError, ValueError) as exc:
+                raise web.HTTPBadRequest(text="Invalid reviewed_at") from exc
+            reviews.append({"id": review_id, "card_id": card_id, "result": result, "reviewed_at": reviewed_at})
+
+        review = await flashcards_service.review_session_cards(user_id, reviews)
+        return web.json_response({"success": True, **review})
+
+    except web.HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reviewing flashcard batch: {e}")
+        raise web.HTTPInternalServerError(text="Failed to review cards")
+
+
 async def get_sets(request: web.Request) -> web.Response:
     """Get all flashcard sets for user."""
     user_id = get_user_id_from_request(request)
@@ -474,27 +517,8 @@ async def get_sets(request: web.Request) -> web.Response:
         raise web.HTTPServiceUnavailable(text="Database unavailable")
     
     try:
-        overview = await flashcards_service.get_user_flashcards_overview(user_id)
-        sets = []
-        for item in overview["sets"]:
-            sets.append({
-                "_id": item["_id"],
-                "name": item["name"],
-                "card_count": item["card_count"],
-                "new_count": item["new_count"],
-                "learning_count": item["learning_count"],
-                "known_count": item["known_count"],
-                "due_count": item["due_count"],
-                "problem_count": item["problem_count"],
-                "deck_status": item["deck_status"],
-                "queue_position": item["queue_position"],
-                "created_at": item["created_at"].isoformat() if item["created_at"] else None,
-                "updated_at": item["updated_at"].isoformat() if item["updated_at"] else None,
-                "activated_at": item["activated_at"].isoformat() if item["activated_at"] else None,
-                "completed_at": item["completed_at"].isoformat() if item["completed_at"] else None,
-                "last_studied_at": item["last_studied_at"].isoformat() if item["last_studied_at"] else None,
-            })
-        return web.json_response({"sets": sets})
+        snapshot = await flashcards_service.get_overview_snapshot(user_id)
+        return web.json_response({"sets": snapshot["sets"]})
         
     except Exception as e:
         logger.error(f"Error getting sets: {e}")
@@ -526,10 +550,12 @@ async def create_set(request: web.Request) -> web.Response:
             "user_id": user_id,
             "name": name,
             "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "updated_at": datetime.now(timezone.utc),
+            "counters": flashcards_service.build_set_counters([], datetime.now(timezone.utc))
         }
         
         result = await mongo_service.db().flashcard_sets.insert_one(set_doc)
+        await flashcards_service.invalidate_overview(user_id)
         
         return web.json_response({
             "success": True,
@@ -576,6 +602,7 @@ async def delete_set(request: web.Request) -> web.Response:
             "_id": ObjectId(set_id),
             "user_id": user_id
         })
+        await flashcards_service.invalidate_overview(user_id)
         
         return web.json_response({"success": True})
         
@@ -623,6 +650,7 @@ async def update_set(request: web.Request) -> web.Response:
             {"_id": ObjectId(set_id), "user_id": user_id},
             {"$set": {"name": name, "updated_at": datetime.now(timezone.utc)}}
         )
+        await flashcards_service.invalidate_overview(user_id)
 
         return web.json_response({"success": True})
 
@@ -733,10 +761,13 @@ async def add_card(request: web.Request) -> web.Response:
         
         result = await mongo_service.db().flashcards.insert_one(card_doc)
         
-        # Update set's updated_at
-        await mongo_service.db().flashcard_sets.update_one(
-            {"_id": ObjectId(set_id)},
-            {"$set": {"updated_at": datetime.now(timezone.utc)}}
+        # Count the card in its set and update the set's updated_at
+        await flashcards_service.record_card_change(
+            user_id,
+            set_id,
+            None,
+            card_doc,
+            set_fields={"updated_at": datetime.now(timezone.utc)},
         )
         
         return web.json_response({
@@ -779,10 +810,12 @@ async def delete_card(request: web.Request) -> web.Response:
             raise web.HTTPNotFound(text="Card not found")
         
         # Delete the card
-        await mongo_service.db().flashcards.delete_one({
+        result = await mongo_service.db().flashcards.delete_one({
             "_id": ObjectId(card_id),
             "user_id": user_id
         })
+        if result.deleted_count:
+            await flashcards_service.record_card_change(user_id, set_id, card, None)
         
         return web.json_response({"success": True})
         
@@ -850,6 +883,7 @@ async def update_card(request: web.Request) -> web.Response:
             {"_id": ObjectId(set_id)},
             {"$set": {"updated_at": datetime.now(timezone.utc)}}
         )
+        await flashcards_service.invalidate_overview(user_id)
 
         return web.json_response({"success": True})
 
@@ -1035,6 +1069,7 @@ def create_webapp_routes() -> web.Application:
     app.router.add_get('/api/flashcards/dashboard', get_dashboard)
     app.router.add_get('/api/flashcards/session', get_global_session)
     app.router.add_post('/api/flashcards/session/review', review_global_session_card)
+    app.router.add_post('/api/flashcards/session/reviews', review_global_session_cards)
     app.router.add_get('/api/flashcards/sets', get_sets)
     app.router.add_post('/api/flashcards/sets', create_set)
     app.router.add_put('/api/flashcards/sets/{set_id}', update_set)
@@ -5,6 +5,9 @@ const SWIPE_THRESHOLD_PX = 50;
 const GLOBAL_REVIEW_THRESHOLD_PX = 110;
 const GLOBAL_REQUEUE_MIN_OFFSET = 3;
 const GLOBAL_REQUEUE_MAX_OFFSET = 5;
+const REVIEW_QUEUE_STORAGE_KEY = 'flashcards_review_queue';
+const REVIEW_FLUSH_INTERVAL_MS = 5000;
+const REVIEW_BATCH_SIZE = 100;
 
 // Initialize Telegram WebApp
 const tg = window.Telegram.WebApp;
@@ -241,6 +244,8 @@ let state = {
     isFlipped: false,
     editCardId: null,
     sessionStats: { correct: 0, incorrect: 0 },
+    reviewQueue: loadReviewQueue(),
+    reviewFlush: null,
     drag: {
         active: false,
         pointerId: null,
@@ -253,6 +258,34 @@ let state = {
     }
 };
 
+// Reviews waiting to be sent; kept in localStorage so they survive a closed app.
+// The key is per Telegram user, since several accounts can share one device.
+function reviewQueueStorageKey() {
+    const userId = tg.initDataUnsafe?.user?.id;
+    return userId ? `${REVIEW_QUEUE_STORAGE_KEY}:${userId}` : REVIEW_QUEUE_STORAGE_KEY;
+}
+
+function loadReviewQueue() {
+    try {
+        return JSON.parse(localStorage.getItem(reviewQueueStorageKey()) || '[]');
+    } catch (error) {
+        return [];
+    }
+}
+
+function saveReviewQueue() {
+    try {
+        localStorage.setItem(reviewQueueStorageKey(), JSON.stringify(state.reviewQueue));
+    } catch (error) {
+        console.error('Error saving review queue:', error);
+    }
+}
+
+function generateReviewId() {
+    if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
 // Get text by key
 function t(key, params = null) {
     let template = TEXTS[state.lang]?.[key] || TEXTS['ru'][key] || key;
@@ -331,14 +364,18 @@ async function apiRequest(endpoint, method = 'GET', body = null) {
     };
     if (body) options.body = JSON.stringify(body);
     const response = await fetch(`${API_BASE}${endpoint}`, options);
-    if (!response.ok) throw new Error(`API error: ${response.status}`);
+    if (!response.ok) {
+        const error = new Error(`API error: ${response.status}`);
+        error.status = response.status;
+        throw error;
+    }
     return response.json();
 }
 
 async function fetchSets() { return apiRequest('/sets'); }
 async function fetchDashboard() { return apiRequest('/dashboard'); }
 async function fetchGlobalSession() { return apiRequest('/session'); }
-async function reviewGlobalSessionCard(cardId, result) { return apiRequest('/session/review', 'POST', { card_id: cardId, result }); }
+async function reviewGlobalSessionCards(reviews) { return apiRequest('/session/reviews', 'POST', { reviews }); }
 async function createSet(name) { return apiRequest('/sets', 'POST', { name }); }
 async function updateSetApi(setId, name) { return apiRequest(`/sets/${setId}`, 'PUT', { name }); }
 async function deleteSetApi(setId) { return apiRequest(`/sets/${setId}`, 'DELETE'); }
@@ -806,6 +843,7 @@ function updateStudyModeUI() {
 async function startGlobalStudySession() {
     try {
         hideSessionSummary();
+        await flushReviewQueue();
         const data = await fetchGlobalSession();
         const cards = data.cards || [];
 
@@ -836,8 +874,10 @@ async function finishGlobalStudySession() {
     const total = state.sessionStats.correct + state.sessionStats.incorrect;
     stopTimer();
     resetSwipeBadges();
+    // The last flush returns the dashboard; refetch it only if the flush failed
+    const flushed = await flushReviewQueue();
     await loadSets();
-    await loadDashboard();
+    if (!flushed) await loadDashboard();
     showSessionSummary(state.sessionStats.correct, state.sessionStats.incorrect, total);
     state.studyMode = 'set';
     state.currentCards = [];
@@ -890,12 +930,78 @@ function applyGlobalReviewToDashboard(card, result) {
     renderDashboard();
 }
 
+function applyDashboardDelta(review) {
+    Object.assign(state.dashboard, review.dashboard);
+    Object.entries(review.totals_delta || {}).forEach(([key, amount]) => {
+        state.dashboard[key] = Math.max(0, (state.dashboard[key] || 0) + amount);
+    });
+    renderDashboard();
+}
+
+function queueReview(cardId, result) {
+    state.reviewQueue.push({
+        id: generateReviewId(),
+        card_id: cardId,
+        result,
+        reviewed_at: new Date().toISOString(),
+    });
+    saveReviewQueue();
+}
+
+// A rejected batch won't pass on retry; auth, timeouts and rate limits might
+function isPermanentReviewError(error) {
+    return error.status >= 400 && error.status < 500 && ![401, 408, 429].includes(error.status);
+}
+
+// Send queued reviews in order. Reviews stay queued until the server
+// confirms them; their ids make a resend after a lost response harmless.
+// Network and server errors keep the queue for the next flush. When the
+// server rejects a batch, its reviews are resent one by one and only the
+// rejected ones are dropped.
+async function flushReviewQueue() {
+    if (state.reviewFlush) return state.reviewFlush;
+    if (state.reviewQueue.length === 0) return true;
+
+    state.reviewFlush = (async () => {
+        let batchSize = REVIEW_BATCH_SIZE;
+        try {
+            while (state.reviewQueue.length > 0) {
+                const batch = state.reviewQueue.slice(0, batchSize);
+                let response = null;
+                try {
+                    response = await reviewGlobalSessionCards(batch);
+                } catch (error) {
+                    if (!isPermanentReviewError(error)) throw error;
+                    if (batch.length > 1) {
+                        batchSize = 1;
+                        continue;
+                    }
+                    console.error('Dropping rejected review:', batch[0], error);
+                }
+                const sentIds = new Set(batch.map(review => review.id));
+                state.reviewQueue = state.reviewQueue.filter(review => !sentIds.has(review.id));
+                saveReviewQueue();
+                if (state.reviewQueue.length === 0 && response?.dashboard) {
+                    applyDashboardDelta(response);
+                }
+            }
+            return true;
+        } catch (error) {
+            console.error('Error sending queued reviews:', error);
+            return false;
+        } finally {
+            state.reviewFlush = null;
+        }
+    })();
+    return state.reviewFlush;
+}
+
 async function handleGlobalSessionReview(result) {
     const card = state.currentCards[state.currentCardIndex];
     if (!card) return;
 
     try {
-        await reviewGlobalSessionCard(card._id, result);
+        queueReview(card._id, result);
         applyGlobalReviewToDashboard(card, result);
 
         if (result === 'know') {
@@ -1685,6 +1791,7 @@ async function init() {
     try {
         state.lang = await fetchUserLang();
         applyLocalization();
+        await flushReviewQueue(); // Reviews left over from a previous visit
         await Promise.all([loadSets(), loadDashboard()]);
         initButtonAnimations(); // Initialize animations
         initTimer(); // Initialize study timer
@@ -1701,4 +1808,9 @@ async function init() {
     }
 }
 
+setInterval(flushReviewQueue, REVIEW_FLUSH_INTERVAL_MS);
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushReviewQueue();
+});
+
 init();
@@ -1,12 +1,23 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 from itertools import count
 
 from bot.services.flashcards_service import (
+    build_active_deck_review_delta,
     build_cards_by_set,
+    build_set_counter_delta,
+    build_set_counters,
     build_srs_review_update,
     build_today_session_cards,
+    fold_card_reviews,
     prepare_autopilot_state,
+    set_counters_to_stats,
 )
+from bot.services.redis_service import redis_service
+from bot.services.token_budget_service import token_budget_service
+from bot.services.translation_service import TranslationService
+from bot.services.write_buffer_service import _PendingWrite
+from bot.utils import codec
 
 
 _ID_COUNTER = count(1)
@@ -261,6 +272,262 @@ def test_srs_interval_progression_is_preserved():
     assert dont_know_update["$set"]["srs_next_review"] == now + timedelta(days=1)
 
 
+def apply_counter_delta(counters, update):
+    counters = {**counters, "due_at": dict(counters["due_at"])}
+    for path, amount in update.get("$inc", {}).items():
+        field = path.split(".", 1)[1]
+        if field.startswith("due_at."):
+            bucket = field.split(".", 1)[1]
+            counters["due_at"][bucket] = counters["due_at"].get(bucket, 0) + amount
+        else:
+            counters[field] = counters.get(field, 0) + amount
+    for path, value in update.get("$max", {}).items():
+        field = path.split(".", 1)[1]
+        counters[field] = max(filter(None, (counters.get(field), value)))
+    return counters
+
+
+def test_stored_set_counters_match_card_based_overview():
+    now = datetime(2026, 4, 16, 9, 0, tzinfo=timezone.utc)
+    first_set = make_set("Deck A", now - timedelta(days=5))
+    second_set = make_set("Deck B", now - timedelta(days=4))
+    cards = [
+        make_card(str(first_set["_id"]), now - timedelta(days=5), srs_status="new"),
+        make_card(
+            str(first_set["_id"]),
+            now - timedelta(days=5),
+            srs_status="learning",
+            srs_next_review=now - timedelta(hours=2),
+            last_reviewed_at=now - timedelta(days=1),
+        ),
+        make_card(
+            str(first_set["_id"]),
+            now - timedelta(days=5),
+            srs_status="known",
+            srs_next_review=now + timedelta(days=3),
+            last_reviewed_at=now - timedelta(days=4),
+        ),
+        make_card(str(second_set["_id"]), now - timedelta(days=4), srs_status="known"),
+    ]
+    cards_by_set = build_cards_by_set(cards)
+    user_doc = {"trainer_timezone": "Europe/Berlin"}
+
+    expected = prepare_autopilot_state([first_set, second_set], cards_by_set, user_doc=user_doc, now=now)
+    for set_doc in (first_set, second_set):
+        set_doc["counters"] = build_set_counters(cards_by_set[set_doc["_id"]], now - timedelta(days=1))
+    from_counters = prepare_autopilot_state([first_set, second_set], user_doc=user_doc, now=now)
+
+    assert from_counters["sets"] == expected["sets"]
+    assert from_counters["totals"] == expected["totals"] == {"new": 1, "learning": 1, "known": 2, "due": 2}
+
+
+def test_set_counter_deltas_follow_card_changes():
+    now = datetime(2026, 4, 16, 9, 0, tzinfo=timezone.utc)
+    deck = make_set("Deck A", now - timedelta(days=5))
+    new_card = make_card(deck["_id"], now - timedelta(days=5), srs_status="new")
+    known_card = make_card(deck["_id"], now - timedelta(days=5), srs_status="known", srs_next_review=now)
+    counters = build_set_counters([known_card], now)
+
+    counters = apply_counter_delta(counters, build_set_counter_delta(None, new_card))
+    reviewed = {**new_card, **build_srs_review_update(new_card, "dontknow", now=now)["$set"]}
+    counters = apply_counter_delta(counters, build_set_counter_delta(new_card, reviewed))
+    counters = apply_counter_delta(counters, build_set_counter_delta(known_card, None))
+
+    later = now + timedelta(days=2)
+    assert set_counters_to_stats(counters, later) == set_counters_to_stats(build_set_counters([reviewed], now), later)
+    assert set_counters_to_stats(counters, later)["due_count"] == 1
+    assert set_counters_to_stats(counters, now)["due_count"] == 0
+    assert counters["latest_reviewed_at"] == now
+    assert build_set_counter_delta(reviewed, dict(reviewed)) == {}
+
+
+def test_review_delta_keeps_active_deck_and_defers_completion():
+    now = datetime(2026, 4, 16, 9, 0, tzinfo=timezone.utc)
+    deck = make_set(
+        "Deck A",
+        now - timedelta(days=2),
+        deck_status="active",
+        queue_position=1,
+        activated_at=now - timedelta(days=1),
+    )
+    first = make_card(deck["_id"], now - timedelta(days=2), srs_status="new")
+    second = make_card(deck["_id"], now - timedelta(days=2), srs_status="new")
+    user_doc = {"flashcards_daily_new_limit": 10}
+
+    reviewed = {**first, **build_srs_review_update(first, "know", now=now)["$set"]}
+    deck["counters"] = build_set_counters([reviewed, second], now)
+    delta = build_active_deck_review_delta(deck, first, reviewed, user_doc=user_doc, now=now)
+    assert delta["dashboard"]["active_set"]["new_count"] == 1
+    assert delta["dashboard"]["today_new_count"] == 1
+    assert delta["totals_delta"] == {"new": -1, "known": 1}
+
+    last = {**second, **build_srs_review_update(second, "know", now=now)["$set"]}
+    deck["counters"] = build_set_counters([reviewed, last], now)
+    assert build_active_deck_review_delta(deck, second, last, user_doc=user_doc, now=now) is None
+
+
+def test_batched_reviews_of_one_card_fold_into_one_update():
+    now = datetime(2026, 4, 16, 9, 0, tzinfo=timezone.utc)
+    card = make_card("set-x", now - timedelta(days=1), srs_status="new", srs_interval=0)
+
+    reviewed, update_doc = fold_card_reviews(
+        card, [("dontknow", now), ("know", now + timedelta(minutes=2))]
+    )
+
+    assert reviewed["srs_status"] == "known"
+    assert update_doc["$set"]["srs_interval"] == 3
+    assert update_doc["$set"]["srs_next_review"] == now + timedelta(minutes=2, days=3)
+    assert update_doc["$set"]["last_review_result"] == "know"
+    assert update_doc["$inc"] == {"srs_incorrect": 1, "srs_correct": 1}
+
+
+def test_cancelled_translation_caller_settles_reservation_once():
+    budget = {"reserved": 500}  # Another request of the same user is in flight
+    calls = []
+
+    async def reserve(user_id, estimate, tz_name=None):
+        budget["reserved"] += estimate
+        return estimate
+
+    async def commit(user_id, reserved, actual, feature, tz_name=None):
+        calls.append(("commit", reserved, actual))
+        budget["reserved"] = max(0, budget["reserved"] - reserved)
+
+    async def release(user_id, reserved, feature, tz_name=None):
+        calls.append(("release", reserved))
+        budget["reserved"] = max(0, budget["reserved"] - reserved)
+
+    async def no_cache(*args):
+        return None
+
+    async def run():
+        service = TranslationService()
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def translate_uncached(*args):
+            started.set()
+            await finish.wait()
+            return "Hallo", 42
+
+        service._translate_uncached = translate_uncached
+        caller = asyncio.create_task(service.translate("hello", "en", "de", user_id=1))
+        await started.wait()
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        finish.set()
+        await asyncio.sleep(0)
+        while service._translate_flight._inflight:
+            await asyncio.sleep(0)
+
+    patched = [
+        (token_budget_service, "reserve", reserve),
+        (token_budget_service, "commit", commit),
+        (token_budget_service, "release", release),
+        (redis_service, "get_cached_translation", no_cache),
+    ]
+    originals = [(obj, name, obj.__dict__.get(name)) for obj, name, _ in patched]
+    for obj, name, fake in patched:
+        setattr(obj, name, fake)
+    try:
+        asyncio.run(run())
+    finally:
+        for obj, name, original in originals:
+            if original is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+
+    assert len(calls) == 1 and calls[0][0] == "commit"
+    assert budget["reserved"] == 500
+
+
+def test_buffered_writes_merge_into_one_valid_update():
+    first = datetime(2026, 4, 16, 9, 0, tzinfo=timezone.utc)
+    second = first + timedelta(minutes=1)
+    op = _PendingWrite({"user_id": 1, "date": "2026-04-16"}, upsert=True)
+
+    # A day without configured goals, then one with them
+    op.merge(
+        {"total_tasks": 1, "quality_sum": 80},
+        None,
+        {"updated_at": first, "last_answer_quality": 80},
+        {"created_at": first, "expected_tasks": 0},
+    )
+    op.merge(
+        {"total_tasks": 1, "quality_sum": 100},
+        {"expected_tasks": 5},
+        {"updated_at": second, "last_answer_quality": 100},
+        {"created_at": second},
+    )
+    op.merge(None, {"expected_tasks": 3})
+
+    assert op.to_update() == {
+        "$inc": {"total_tasks": 2, "quality_sum": 180},
+        "$max": {"expected_tasks": 5},
+        "$set": {"updated_at": second, "last_answer_quality": 100},
+        # expected_tasks can't also be under $setOnInsert
+        "$setOnInsert": {"created_at": first},
+    }
+
+
+def test_requeued_failed_write_yields_to_newer_values():
+    older = datetime(2026, 4, 16, 9, 0, tzinfo=timezone.utc)
+    newer = older + timedelta(minutes=1)
+    failed = _PendingWrite({"user_id": 1}, upsert=True)
+    failed.merge({"total_tasks": 2}, {"expected_tasks": 7}, {"updated_at": older}, {"created_at": older})
+    queued = _PendingWrite({"user_id": 1}, upsert=True)
+    queued.merge({"total_tasks": 1}, {"expected_tasks": 4}, {"updated_at": newer}, {"created_at": newer})
+
+    queued.merge(failed.inc, failed.max, failed.set, failed.set_on_insert, older=True)
+
+    assert queued.to_update() == {
+        "$inc": {"total_tasks": 3},
+        "$max": {"expected_tasks": 7},
+        "$set": {"updated_at": newer},
+        "$setOnInsert": {"created_at": older},
+    }
+
+
+def test_codec_round_trips_every_available_format():
+    value = {"videoId": "abc", "words": ["Straße", "über"] * 300, "count": 3, "nested": {"ok": True}}
+    serializers = [None] + ([codec.msgpack] if codec.msgpack else [])
+    compressors = [None] + ([codec.zstandard] if codec.zstandard else [])
+    originals = codec.msgpack, codec.zstandard
+    try:
+        for serializer in serializers:
+            for compressor in compressors:
+                codec.msgpack, codec.zstandard = serializer, compressor
+                for threshold, compression in (
+                    (-1, codec.COMPRESSION_NONE),
+                    (10 ** 9, codec.COMPRESSION_NONE),
+                    (0, codec.COMPRESSION_ZSTD if compressor else codec.COMPRESSION_ZLIB),
+                ):
+                    raw = codec.encode_value(value, threshold)
+                    flags = (codec.SERIALIZER_MSGPACK if serializer else codec.SERIALIZER_JSON) | compression
+                    assert raw[:codec.HEADER_SIZE] == codec.MAGIC + bytes((codec.VERSION, flags))
+                    assert codec.decode_value(raw) == value
+    finally:
+        codec.msgpack, codec.zstandard = originals
+
+
+def test_codec_reads_legacy_json_and_rejects_unknown_versions():
+    assert codec.decode_value(None) is None
+    assert codec.decode_value('{"words": ["Straße"]}') == {"words": ["Straße"]}
+    assert codec.decode_value('{"words": ["Straße"]}'.encode("utf-8")) == {"words": ["Straße"]}
+
+    for raw in (
+        codec.MAGIC + bytes((codec.VERSION + 1, codec.SERIALIZER_JSON)) + b"{}",
+        codec.MAGIC + bytes((codec.VERSION, 0x0F)) + b"{}",
+        codec.MAGIC + bytes((codec.VERSION, 0xF0)) + b"{}",
+    ):
+        try:
+            codec.decode_value(raw)
+        except codec.CodecError:
+            continue
+        raise AssertionError(f"{raw!r} was decoded")
+
+
 if __name__ == "__main__":
     test_first_non_empty_unresolved_set_becomes_active()
     test_previous_deck_due_cards_do_not_enter_active_today_session()
@@ -269,4 +536,13 @@ if __name__ == "__main__":
     test_newly_completed_active_deck_does_not_unlock_next_deck_same_day()
     test_session_limits_new_cards_to_daily_budget()
     test_srs_interval_progression_is_preserved()
+    test_stored_set_counters_match_card_based_overview()
+    test_set_counter_deltas_follow_card_changes()
+    test_review_delta_keeps_active_deck_and_defers_completion()
+    test_batched_reviews_of_one_card_fold_into_one_update()
+    test_cancelled_translation_caller_settles_reservation_once()
+    test_buffered_writes_merge_into_one_valid_update()
+    test_requeued_failed_write_yields_to_newer_values()
+    test_codec_round_trips_every_available_format()
+    test_codec_reads_legacy_json_and_rejects_unknown_versions()
     print("flashcards_service_tests_ok")